@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+"""
+Measures the save and reload throughput and the file size of every codec.
+
+Usage:
+
+>>>> python3 -m benchmarks.codecs [number of objects]
+"""
+import os
+import sys
+import time
+import tempfile
+import models
+from models import FileStorage
+from models.place import Place
+from models.engine.codecs import codecs, get_codec
+
+
+def bench(name, size):
+    """
+    Times a full save and a reload of (size) places.
+
+    Args:
+    -   name (str): The codec name.
+    -   size (int): The number of stored objects.
+
+    Returns:
+    -   tuple: The save and reload throughputs (objects per second)
+            and the file size in bytes.
+    """
+    FileStorage._FileStorage__objects = {}
+    storage = FileStorage(codec=get_codec(name, trusted=True))
+    models.storage = storage
+    for i in range(size):
+        place = Place()
+        place.name = f"place {i}"
+        place.number_rooms = i % 8
+        place.latitude = 30.0 + i / size
+        place.amenity_ids = ["wifi", "pool"]
+
+    start = time.perf_counter()
+    storage.save()
+    saved = time.perf_counter() - start
+    path = storage._FileStorage__file_path
+    file_size = os.path.getsize(path)
+
+    FileStorage._FileStorage__objects = {}
+    start = time.perf_counter()
+    storage.reload()
+    loaded = time.perf_counter() - start
+    os.remove(path)
+    return size / saved, size / loaded, file_size
+
+
+def main():
+    """Prints the throughputs and file size of every codec."""
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    print(f"{size} objects")
+    print(f"{'codec':<10}{'save/s':>12}{'reload/s':>12}{'bytes':>12}")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        for name in codecs:
+            save, reload, file_size = bench(name, size)
+            print(f"{name:<10}{save:>12.0f}{reload:>12.0f}{file_size:>12}")
+        os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
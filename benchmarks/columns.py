@@ -0,0 +1,87 @@
+#!/usr/bin/python3
+"""
+Compares the aggregates of the Place numeric attributes computed from
+the columnar store with a scan of the stored instances.
+
+Usage:
+
+>>>> python3 -m benchmarks.columns [number of places] [number of cities]
+"""
+import sys
+import time
+import random
+import models
+from models import FileStorage
+from models.place import Place
+from models.engine import columns
+from models.engine.file_storage import number
+
+
+def scan(storage, func, name, where=None):
+    """
+    Returns the (func) aggregate of (name) by city_id of the places
+    matching (where), computed by a scan of the instances.
+    """
+    states = {}
+    for pl in storage.all("Place").values():
+        if where is not None and not where(pl):
+            continue
+        value = number(getattr(pl, name))
+        if value is None:
+            continue
+        state = states.setdefault(pl.city_id, [0, 0, value, value])
+        state[0] += 1
+        state[1] += value
+        state[2] = min(state[2], value)
+        state[3] = max(state[3], value)
+    return {
+        city_id: {
+            "count": count, "sum": total, "mean": total / count,
+            "min": low, "max": high,
+        }[func]
+        for city_id, (count, total, low, high) in states.items()
+    }
+
+
+def main():
+    """Prints the time of each aggregate with and without the columns."""
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    FileStorage._FileStorage__objects = {}
+    storage = FileStorage()
+    models.storage = storage
+    rand = random.Random(0)
+    cities = [f"city-{i}" for i in range(count)]
+    for _ in range(size):
+        pl = Place()
+        pl.city_id = rand.choice(cities)
+        pl.price_by_night = rand.randint(20, 300)
+        pl.max_guest = rand.randint(1, 10)
+
+    start = time.perf_counter()
+    store = storage.columns("Place")
+    build = (time.perf_counter() - start) * 1000
+    engine = "numpy" if columns.numpy is not None else "array"
+    print(f"{size} places, {count} cities, columns ({engine}) built in "
+          f"{build:.1f} ms (ms per aggregate)")
+    print(f"{'aggregate':<30}{'scan':>10}{'columns':>10}")
+    for label, func, name, where, test in (
+        ("mean price by city", "mean", "price_by_night", (), None),
+        ("max guests by city", "max", "max_guest", (), None),
+        ("count price <= 50 by city", "count", "price_by_night",
+         [("price_by_night", "<=", 50)],
+         lambda pl: pl.price_by_night <= 50),
+    ):
+        times = []
+        for run in (
+            lambda: scan(storage, func, name, test),
+            lambda: store.aggregate(func, name, where, by="city_id"),
+        ):
+            start = time.perf_counter()
+            run()
+            times.append((time.perf_counter() - start) * 1000)
+        print(f"{label:<30}{times[0]:>10.1f}{times[1]:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
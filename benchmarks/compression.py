@@ -0,0 +1,89 @@
+#!/usr/bin/python3
+"""
+Measures the compression ratio and the save/reload time of every
+compression (whole file and per-record indexed mode).
+
+Usage:
+
+>>>> python3 -m benchmarks.compression [number of objects]
+"""
+import os
+import sys
+import time
+import tempfile
+import models
+from models import FileStorage
+from models.city import City
+from models.place import Place
+
+
+def bench(compression, indexed, size):
+    """
+    Times a full save, a reload and 100 point reads of (size) places.
+
+    Args:
+    -   compression (str): The compression (None for no compression).
+    -   indexed (bool): If True, runs the storage in indexed mode.
+    -   size (int): The number of stored objects.
+
+    Returns:
+    -   tuple: The save, reload and get times in milliseconds and
+            the size of the files in bytes.
+    """
+    FileStorage._FileStorage__objects = {}
+    storage = FileStorage(compression=compression, indexed=indexed)
+    models.storage = storage
+    cities = [City() for _ in range(max(size // 100, 1))]
+    ids = []
+    for i in range(size):
+        place = Place()
+        place.city_id = cities[i % len(cities)].id
+        place.name = f"place {i}"
+        place.number_rooms = i % 8
+        ids.append(place.id)
+
+    start = time.perf_counter()
+    storage.save()
+    saved = time.perf_counter() - start
+    paths = [path for path in os.listdir() if path.startswith("hbnb.")]
+    file_size = sum(os.path.getsize(path) for path in paths)
+
+    FileStorage._FileStorage__objects = {}
+    start = time.perf_counter()
+    storage.reload()
+    loaded = time.perf_counter() - start
+    start = time.perf_counter()
+    for obj_id in ids[::max(size // 100, 1)]:
+        storage.get("Place", obj_id)
+    got = time.perf_counter() - start
+
+    storage.close()
+    for path in paths:
+        os.remove(path)
+    return saved * 1000, loaded * 1000, got * 1000, file_size
+
+
+def main():
+    """Prints the ratio and times of every compression."""
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    print(f"{size} objects (ms, ratio to the uncompressed files)")
+    print(f"{'compression':<20}{'save':>9}{'reload':>9}{'get x100':>10}"
+          f"{'ratio':>8}")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        for indexed in (False, True):
+            plain = None
+            for compression in (None, "gzip", "lzma", "zlib"):
+                save, reload, get, file_size = bench(
+                    compression, indexed, size
+                )
+                plain = plain or file_size
+                name = f"{compression}{' (indexed)' if indexed else ''}"
+                print(f"{name:<20}{save:>9.1f}{reload:>9.1f}{get:>10.2f}"
+                      f"{file_size / plain:>8.2f}")
+        os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+"""
+Measures the cost of one FileStorage.save() for each durability level.
+
+Usage:
+
+>>>> python3 -m benchmarks.durability [number of objects] [number of saves]
+"""
+import os
+import sys
+import time
+import tempfile
+import models
+from models import FileStorage
+from models.place import Place
+
+
+def bench(durability, journal, size, saves):
+    """
+    Times (saves) single-object updates followed by a save.
+
+    Args:
+    -   durability (str): The durability level.
+    -   journal (bool): If True, runs the storage in journal mode.
+    -   size (int): The number of stored objects.
+    -   saves (int): The number of timed saves.
+
+    Returns:
+    -   float: The mean time of one save in milliseconds.
+    """
+    FileStorage._FileStorage__objects = {}
+    storage = FileStorage(journal=journal, durability=durability)
+    models.storage = storage
+    places = [Place() for _ in range(size)]
+    storage.save()
+
+    start = time.perf_counter()
+    for i in range(saves):
+        places[i % size].name = f"place {i}"
+        storage.save()
+    elapsed = time.perf_counter() - start
+
+    for path in ("hbnb.json", "hbnb.json.log"):
+        if os.path.exists(path):
+            os.remove(path)
+    return elapsed / saves * 1000
+
+
+def main():
+    """Prints the mean save time of every durability level."""
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    saves = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    print(f"{size} objects, {saves} saves (ms per save)")
+    print(f"{'durability':<12}{'full rewrite':>14}{'journal':>10}")
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        for durability in FileStorage.durabilities:
+            full = bench(durability, False, size, saves)
+            journal = bench(durability, True, size, saves)
+            print(f"{durability:<12}{full:>14.3f}{journal:>10.3f}")
+        os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
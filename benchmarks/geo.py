@@ -0,0 +1,71 @@
+#!/usr/bin/python3
+"""
+Compares the geospatial index of the Place coordinates with a linear
+scan of the stored instances (radius and nearest-neighbour queries).
+
+Usage:
+
+>>>> python3 -m benchmarks.geo [number of places] [queries]
+"""
+import sys
+import time
+import random
+import models
+from models import FileStorage
+from models.place import Place
+from models.engine.geo import distance
+
+
+def scan(storage, lat, lon, km):
+    """
+    Returns the places within (km) of (lat, lon), nearest first,
+    found by a linear scan.
+    """
+    found = []
+    for pl in storage.all("Place").values():
+        d = distance(lat, lon, pl.latitude, pl.longitude)
+        if d <= km:
+            found.append((d, pl))
+    found.sort(key=lambda entry: entry[0])
+    return found
+
+
+def main():
+    """Prints the mean time of a query with and without the index."""
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    FileStorage._FileStorage__objects = {}
+    storage = FileStorage()
+    models.storage = storage
+    rand = random.Random(0)
+    for _ in range(size):
+        pl = Place()
+        pl.latitude = rand.uniform(22.0, 31.5)
+        pl.longitude = rand.uniform(25.0, 35.0)
+    points = [
+        (rand.uniform(22.0, 31.5), rand.uniform(25.0, 35.0))
+        for _ in range(count)
+    ]
+
+    start = time.perf_counter()
+    storage.near("Place", 0, 0, k=1)
+    build = (time.perf_counter() - start) * 1000
+    print(f"{size} places, index built in {build:.1f} ms (ms per query)")
+    print(f"{'query':<14}{'scan':>10}{'index':>10}")
+    for name, run, linear in (
+        ("5 km", lambda lat, lon: storage.near("Place", lat, lon, km=5),
+         lambda lat, lon: scan(storage, lat, lon, 5)),
+        ("10 nearest", lambda lat, lon: storage.near("Place", lat, lon, k=10),
+         lambda lat, lon: scan(storage, lat, lon, 20000)[:10]),
+    ):
+        times = []
+        for query in (linear, run):
+            start = time.perf_counter()
+            for point in points:
+                query(*point)
+            times.append((time.perf_counter() - start) / count * 1000)
+        print(f"{name:<14}{times[0]:>10.3f}{times[1]:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
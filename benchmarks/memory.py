@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+"""
+Compares the memory taken by the model instances with the memory taken
+by their compact variants (see models.compact), in bytes per instance.
+
+Usage:
+
+>>>> python3 -m benchmarks.memory [number of objects]
+"""
+import sys
+import gc
+import random
+import tracemalloc
+from datetime import datetime
+from models.compact import compact
+from models.place import Place
+from models.review import Review
+from models.state import State
+
+
+def records(cls_name, size):
+    """
+    Returns (size) stored dictionaries of the (cls_name) class, as read
+    back by a reload (a few of them with an attribute the class doesn't
+    declare).
+    """
+    rand = random.Random(0)
+    now = datetime.now().isoformat()
+    found = []
+    for i in range(size):
+        record = {
+            "id": f"{i:08x}-0000-4000-8000-000000000000",
+            "created_at": now,
+            "updated_at": now,
+        }
+        if cls_name == "Place":
+            record.update(
+                city_id="0a1b", user_id="2c3d", name=f"Place {i}",
+                description="A quiet place", number_rooms=rand.randint(1, 6),
+                number_bathrooms=rand.randint(1, 3),
+                max_guest=rand.randint(1, 10),
+                price_by_night=rand.randint(20, 300),
+                latitude=rand.uniform(22.0, 31.5),
+                longitude=rand.uniform(25.0, 35.0), amenity_ids=[],
+            )
+        elif cls_name == "Review":
+            record.update(place_id="0a1b", user_id="2c3d", text="Great")
+        else:
+            record.update(name=f"{cls_name} {i}")
+        if i % 10 == 0:
+            record["color"] = "blue"
+        found.append(record)
+    return found
+
+
+def measure(cls, data):
+    """
+    Returns the bytes allocated per instance of (cls) built from (data).
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objs = [cls(**record) for record in data]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del objs
+    return used / len(data)
+
+
+def main():
+    """Prints the bytes per instance of the regular and compact classes."""
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print(f"{size} objects per class (bytes per object)")
+    print(f"{'class':<10}{'regular':>10}{'compact':>10}{'saved':>8}")
+    for cls in (Place, Review, State):
+        cls_name = cls.__name__
+        data = records(cls_name, size)
+        regular = measure(cls, data)
+        slotted = measure(compact(cls), data)
+        saved = (1 - slotted / regular) * 100
+        print(f"{cls_name:<10}{regular:>10.0f}{slotted:>10.0f}{saved:>7.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/python3
+"""
+Compares the sorted index of the Place numeric attributes with a linear
+scan of the stored instances (range queries and top-k).
+
+Usage:
+
+>>>> python3 -m benchmarks.range_index [number of places] [queries]
+"""
+import sys
+import time
+import random
+import models
+from models import FileStorage
+from models.place import Place
+
+
+def scan(storage, low, high, limit):
+    """
+    Returns the places priced between (low) and (high), cheapest first,
+    found by a linear scan.
+    """
+    found = [
+        pl for pl in storage.all("Place").values()
+        if low <= int(pl.price_by_night) <= high
+    ]
+    found.sort(key=lambda pl: int(pl.price_by_night))
+    return found[:limit]
+
+
+def timed(queries, run):
+    """
+    Returns the mean time of (run) over (queries) in milliseconds.
+    """
+    start = time.perf_counter()
+    for query in queries:
+        run(*query)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def main():
+    """Prints the mean time of a query with and without the index."""
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    FileStorage._FileStorage__objects = {}
+    storage = FileStorage()
+    models.storage = storage
+    rand = random.Random(0)
+    for _ in range(size):
+        Place().price_by_night = rand.randrange(10, 1000)
+
+    queries = []
+    for _ in range(count):
+        low = rand.randrange(10, 990)
+        queries.append((low, low + rand.randrange(1, 20), None))
+    queries += [(0, 1000, 10)] * count
+
+    start = time.perf_counter()
+    storage.ordered("Place", "price_by_night", limit=1)
+    build = (time.perf_counter() - start) * 1000
+
+    def index(low, high, limit):
+        return storage.ordered(
+            "Place", "price_by_night", low, high, limit=limit
+        )
+
+    print(f"{size} places, index built in {build:.1f} ms (ms per query)")
+    print(f"{'query':<14}{'scan':>10}{'index':>10}")
+    for name, selected in (
+        ("range", queries[:count]), ("top-10", queries[count:])
+    ):
+        linear = timed(selected, lambda *q: scan(storage, *q))
+        indexed = timed(selected, index)
+        print(f"{name:<14}{linear:>10.3f}{indexed:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,11 +8,17 @@ on the instances through the console.
 The console offers the following functionalities:
 
 - Creating new instances of various classes.
+- Creating many new instances at once (saved with one save).
 - Showing information about existing instances based on class and id.
 - Updating existing instances by adding or modifying their attributes.
 - Deleting existing instances from the storage.
 - Counting the number of instances for each class.
+- Searching the instances near a point (for the classes with coordinates).
+- Searching the instances by text (for the classes with text attributes).
+- Querying the instances with predicates, an ordering, a limit and fields.
+- Aggregating the instances (count, sum, avg, min, max, distinct) by group.
 """
+import ast
 import json
 import os
 import re
@@ -20,6 +26,9 @@ import cmd
 from typing import TypedDict
 from models import storage
 from models import classes
+from models.engine.file_storage import geo_indexes, text_indexes
+from models.engine.query import Query
+from models.relationships import prefetch
 
 
 # for auto-completion
@@ -32,6 +41,15 @@ class ErrorMessages(TypedDict):
     no_attr_name: str
     no_attr_val: str
     no_json: str
+    no_geo: str
+    no_coords: str
+    no_number: str
+    no_text: str
+    no_terms: str
+    no_query: str
+    no_relation: str
+    no_aggregate: str
+    no_date: str
 
 
 error_messages: ErrorMessages = {
@@ -43,6 +61,15 @@ error_messages: ErrorMessages = {
     "no_attr_name": "** attribute name missing **",
     "no_attr_val": "** value missing **",
     "no_json": "** invalid json object **",
+    "no_geo": "** class has no coordinates **",
+    "no_coords": "** latitude, longitude or radius missing **",
+    "no_number": "** invalid number **",
+    "no_text": "** class has no text **",
+    "no_terms": "** search terms missing **",
+    "no_query": "** invalid query **",
+    "no_relation": "** relationship doesn't exist **",
+    "no_aggregate": "** aggregate missing **",
+    "no_date": "** invalid date **",
 }
 
 
@@ -133,11 +160,17 @@ class HBNBCommand(cmd.Cmd):
         """
         commands = {
             # "create": self.do_create,
+            "create_many": self.do_create_many,
             "count": self.do_count,
             "all": self.do_all,
             "show": self.do_show,
             "destroy": self.do_destroy,
             "update": self.do_update,
+            "near": self.do_near,
+            "search": self.do_search,
+            "where": self.do_where,
+            "explain": self.do_explain,
+            "aggregate": self.do_aggregate,
         }
 
         pattern = r"^(\w+)\.(\w+)\((.*)\)$"
@@ -160,6 +193,11 @@ class HBNBCommand(cmd.Cmd):
             commands[method](cls_name)
             return
 
+        if method in ("near", "search", "where", "explain", "aggregate",
+                      "create_many"):
+            commands[method](f"{cls_name} {cmd[2]}")
+            return
+
         obj_id = cmd[2]
         args = f"{cls_name} {obj_id}"
         if method in ("show", "destroy"):
@@ -198,10 +236,56 @@ class HBNBCommand(cmd.Cmd):
         instance.save()
         print(instance.id)
 
+    def do_create_many(self, arg):
+        """
+        Creates a number of new instances (with the attributes of an
+        optional JSON object), and saves them to the JSON file at once.
+
+        Usage: create_many <class> <number> [<json object>]
+        or <class>.create_many(<number>[, <json object>])
+
+        Args:
+        -   arg (str): The user input argument (command to be interpreted).
+
+        Return:
+        -   None (prints the created instance ids, one per line).
+
+        Raises:
+        -   None (prints error messages to the console).
+        """
+        values = arg.split(None, 2)
+        args = validate(" ".join(values[:1]))
+        if not args:
+            return
+
+        cls_name = args["cls_name"]
+        if cls_name == "all":
+            print(error_messages["no_cls"])
+            return
+        values = values[1:]
+        count = values[0].rstrip(",") if values else ""
+        if not count.isdigit():
+            print(error_messages["no_number"])
+            return
+        defaults = {}
+        if len(values) > 1:
+            try:
+                defaults = json.loads(values[1])
+            except ValueError:
+                defaults = None
+            if type(defaults) is not dict:
+                print(error_messages["no_json"])
+                return
+        created = classes[cls_name].create_many(int(count), **defaults)
+        if created:
+            print("\n".join(obj.id for obj in created))
+
     def do_show(self, arg, check_id=True):
         """
         Prints the string representation of an instance
-        based on the class name and its id.
+        based on the class name and its id, followed by its related
+        instances if `include=<relationship>[.<relationship>...],...`
+        ends the arguments (e.g. `show State <id> include=cities.places`).
 
         Args:
         -   arg (str): The user input argument (command to be interpreted).
@@ -215,20 +299,55 @@ class HBNBCommand(cmd.Cmd):
         Raises:
         -   None (prints error messages to the console).
         """
+        paths = []
+        matched = re.search(r"[\s,]include=(.*)$", arg)
+        if matched:
+            paths = [
+                path.strip(" '\"") for path in matched.group(1).split(",")
+            ]
+            arg = arg[:matched.start()].rstrip(" ,")
         args = validate(arg, check_id=check_id)
         if not args:
             return
 
         cls_name = args["cls_name"]
         obj_id = args["obj_id"]
-        all_objs = storage.all()
-        key = f"{cls_name}.{obj_id}"
-        obj = all_objs.get(key)
+        obj = storage.get(cls_name, obj_id)
 
         if obj is None:
             print(error_messages["no_obj"])
             return
+        try:
+            joined = prefetch([obj], *[path for path in paths if path])
+        except ValueError:
+            print(error_messages["no_relation"])
+            return
         print(obj)
+        self.__show_related(obj, paths, joined)
+
+    def __show_related(self, obj, paths, joined, depth=1):
+        """
+        Prints the instances related to (obj) through (paths), one per
+        line, indented by their (depth) in the prefetched graph.
+
+        Args:
+        -   obj (BaseModel): The instance.
+        -   paths (list): The dotted relationship paths.
+        -   joined (dict): The prefetched relationships.
+        -   depth (int): The depth of the related instances.
+        """
+        names = dict.fromkeys(path.split('.')[0] for path in paths if path)
+        for name in names:
+            rest = [
+                path.split('.', 1)[1] for path in paths
+                if path.startswith(f"{name}.")
+            ]
+            related = joined[f"{obj.__class__.__name__}.{obj.id}"][name]
+            if type(related) is not list:
+                related = [] if related is None else [related]
+            for other in related:
+                print(f"{'    ' * depth}{name}: {other}")
+                self.__show_related(other, rest, joined, depth + 1)
 
     def do_all(self, arg):
         """
@@ -250,12 +369,8 @@ class HBNBCommand(cmd.Cmd):
             print("** class doesn't exist **")
             return
 
-        all_objs = storage.all()
-        obj_list = [
-            obj.__str__()
-            for obj in all_objs.values()
-            if not cls_name or obj.__class__.__name__ == cls_name
-        ]
+        all_objs = storage.all(cls_name) if cls_name else storage.all()
+        obj_list = [obj.__str__() for obj in all_objs.values()]
         print(obj_list)
 
     def do_update(
@@ -293,15 +408,17 @@ class HBNBCommand(cmd.Cmd):
         attr_name = args["attr_name"]
         attr_value = args["attr_value"]
 
-        all_objs = storage.all()
-        key = f"{cls_name}.{obj_id}"
-        obj = all_objs.get(key)
+        obj = storage.get(cls_name, obj_id)
 
         if obj is None:
             print(error_messages["no_obj"])
             return
 
-        setattr(obj, attr_name, attr_value)
+        try:
+            setattr(obj, attr_name, attr_value)
+        except (TypeError, ValueError):
+            print(error_messages["no_date"])
+            return
         obj.save()
 
     def do_destroy(self, arg, check_id=True):
@@ -321,13 +438,12 @@ class HBNBCommand(cmd.Cmd):
         cls_name = args["cls_name"]
         obj_id = args["obj_id"]
 
-        all_objs = storage.all()
-        key = f"{cls_name}.{obj_id}"
-        removed_obj = all_objs.pop(key, None)
+        removed_obj = storage.get(cls_name, obj_id)
         if removed_obj is None:
             print(error_messages["no_obj"])
             return
 
+        storage.delete(removed_obj)
         storage.save()
 
     def do_count(self, arg):
@@ -341,15 +457,160 @@ class HBNBCommand(cmd.Cmd):
         if not args:
             return
 
-        nm_instances = 0
-        all_objs = storage.all()
-        for obj in all_objs.values():
-            nm_instances += (
-                1
-                if arg == "all" or obj.__class__.__name__ == args["cls_name"]
-                else 0
-            )
-        print(nm_instances)
+        cls_name = args["cls_name"]
+        print(storage.count(None if cls_name == "all" else cls_name))
+
+    def do_near(self, arg):
+        """
+        Prints the instances within a radius (in km) of a point,
+        nearest first.
+
+        Usage: near <class> <latitude> <longitude> <km>
+        or <class>.near(<latitude>, <longitude>, <km>)
+
+        Args:
+        -   arg (str): The user input argument (command to be interpreted).
+        """
+        args = validate(arg)
+        if not args:
+            return
+
+        cls_name = args["cls_name"]
+        if cls_name not in geo_indexes:
+            print(error_messages["no_geo"])
+            return
+        values = arg.replace(",", " ").split()[1:]
+        if len(values) < 3:
+            print(error_messages["no_coords"])
+            return
+        try:
+            found = storage.near(cls_name, *values[:2], km=values[2])
+        except ValueError:
+            print(error_messages["no_number"])
+            return
+        print([obj.__str__() for _, obj in found])
+
+    def do_search(self, arg):
+        """
+        Prints the instances holding every search term, best ranked
+        first (or any of the terms if they are separated by OR).
+
+        Usage: search <class> <terms>
+        or <class>.search(<terms>)
+
+        Args:
+        -   arg (str): The user input argument (command to be interpreted).
+        """
+        args = validate(arg)
+        if not args:
+            return
+
+        cls_name = args["cls_name"]
+        if cls_name not in text_indexes:
+            print(error_messages["no_text"])
+            return
+        terms = arg.replace('"', " ").replace("'", " ").split()[1:]
+        mode = "or" if "OR" in terms else "and"
+        query = " ".join(term for term in terms if term != "OR")
+        if not query:
+            print(error_messages["no_terms"])
+            return
+        found = storage.search(cls_name, query, mode)
+        print([obj.__str__() for _, obj in found])
+
+    def do_where(self, arg):
+        """
+        Prints the instances matching every predicate, one per line,
+        as they are found (read through the storage indexes).
+
+        Usage: where <class> <predicates and modifiers>
+        or <class>.where(<predicates and modifiers>)
+
+        The predicates are `<attribute> <op> <value>` with op one of
+        =, !=, <, <=, >, >=, in and contains (e.g. `price_by_night <= 100`,
+        `city_id in ["a", "b"]`); the modifiers are `order_by=<attribute>`
+        (`order_by=-<attribute>` for descending), `limit=<n>` and
+        `fields(<attribute>, ...)`.
+
+        Args:
+        -   arg (str): The user input argument (command to be interpreted).
+        """
+        query = self.__query(arg)
+        if query is None:
+            return
+        for found in query:
+            print(found if type(found) is dict else found.__str__())
+
+    def do_explain(self, arg):
+        """
+        Runs a query (see where) and prints its plan: the index used,
+        the number of instances examined and returned.
+
+        Usage: explain <class> <predicates and modifiers>
+        or <class>.explain(<predicates and modifiers>)
+
+        Args:
+        -   arg (str): The user input argument (command to be interpreted).
+        """
+        query = self.__query(arg)
+        if query is not None:
+            print(query.explain())
+
+    def do_aggregate(self, arg):
+        """
+        Prints an aggregate of the instances matching every predicate
+        (see where), or one `<group>: <aggregate>` line per group.
+
+        Usage: aggregate <class> <aggregate>, [by=<attributes>,] <predicates>
+        or <class>.aggregate(<aggregate>, [by=<attributes>,] <predicates>)
+
+        The aggregate is count(), count(<attribute>), sum(<attribute>),
+        avg(<attribute>), min(<attribute>), max(<attribute>) or
+        distinct(<attribute>); the instances are grouped by the value
+        of `by=<attribute>` or `by=(<attribute>, ...)` (or a list)
+        (e.g. `Place.aggregate(avg(price_by_night), by=city_id)`).
+
+        Args:
+        -   arg (str): The user input argument (command to be interpreted).
+        """
+        args = validate(arg.split(maxsplit=1)[0] if arg.strip() else "")
+        if not args:
+            return
+        text = arg.split(maxsplit=1)[1] if len(arg.split()) > 1 else ""
+        try:
+            query, func, name, by = parse_aggregate(args["cls_name"], text)
+        except (ValueError, TypeError):
+            print(error_messages["no_query"])
+            return
+        if func is None:
+            print(error_messages["no_aggregate"])
+            return
+        try:
+            found = query.aggregate(func, name, by)
+        except ValueError:
+            print(error_messages["no_aggregate"])
+            return
+        if by is None:
+            print(found)
+            return
+        for group, value in found.items():
+            print(f"{group!r}: {value}")
+
+    @staticmethod
+    def __query(arg):
+        """
+        Returns the Query of a where/explain argument
+        (None after printing the error if it is invalid).
+        """
+        args = validate(arg.split(maxsplit=1)[0] if arg.strip() else "")
+        if not args:
+            return None
+        text = arg.split(maxsplit=1)[1] if len(arg.split()) > 1 else ""
+        try:
+            return parse_query(args["cls_name"], text)
+        except (ValueError, TypeError):
+            print(error_messages["no_query"])
+            return None
 
     def do_reset(self, arg):
         """
@@ -359,11 +620,13 @@ class HBNBCommand(cmd.Cmd):
 
     def do_quit(self, arg):
         """Quit command to exit the program"""
+        storage.close()
         return True
 
     def do_EOF(self, arg):
         """EOF signal to exit the program."""
         print("")
+        storage.close()
         return True
 
     def emptyline(self):
@@ -371,6 +634,121 @@ class HBNBCommand(cmd.Cmd):
         pass
 
 
+def split_args(text):
+    """
+    Splits (text) at its commas that are outside quotes,
+    brackets and parentheses.
+
+    Returns:
+    -   list: The stripped non-empty parts.
+    """
+    parts = []
+    depth = 0
+    quote = None
+    start = 0
+    for i, char in enumerate(text):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "\"'":
+            quote = char
+        elif char in "([{":
+            depth += 1
+        elif char in ")]}":
+            depth -= 1
+        elif char == "," and not depth:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+
+def parse_value(text):
+    """
+    Returns the Python literal of (text) (a quoted string, a number,
+    a list...) or text itself if it isn't a literal.
+    """
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+
+def parse_query(cls_name, text):
+    """
+    Builds the Query of the (cls_name) instances described by (text),
+    the comma separated predicates and modifiers of the where command
+    (e.g. `price_by_night <= 100, order_by=-price_by_night, limit=5`).
+
+    Returns:
+    -   Query: The query.
+
+    Raises:
+    -   ValueError: If a predicate or a modifier is invalid.
+    """
+    query = Query(storage, cls_name)
+    for part in split_args(text):
+        matched = re.match(r"^fields\((.*)\)$", part)
+        if matched:
+            query.fields(*(
+                name.strip(" '\"") for name in split_args(matched.group(1))
+            ))
+            continue
+        matched = re.match(r"^(order_by|limit)\s*=\s*(.+)$", part)
+        if matched and matched.group(1) == "limit":
+            limit = parse_value(matched.group(2))
+            if type(limit) is not int or limit < 0:
+                raise ValueError(f"invalid limit: {matched.group(2)}")
+            query.limit(limit)
+            continue
+        if matched:
+            name = matched.group(2).strip(" '\"")
+            query.order_by(name.lstrip("-"), reverse=name.startswith("-"))
+            continue
+        matched = re.match(r"^(\w+)\s*(<=|>=|!=|==|=|<|>)\s*(.+)$", part) \
+            or re.match(r"^(\w+)\s+(in|contains)\s+(.+)$", part)
+        if not matched:
+            raise ValueError(f"invalid predicate: {part}")
+        name, op, value = matched.groups()
+        query.where(name, "=" if op == "==" else op, parse_value(value))
+    return query
+
+
+def parse_aggregate(cls_name, text):
+    """
+    Parses the arguments of the aggregate command: the aggregate
+    (e.g. `avg(price_by_night)`), the `by=` attributes and the
+    predicates of the where command.
+
+    Returns:
+    -   tuple: The Query, the aggregate function (None if missing),
+            the aggregated attribute and the group by attribute(s).
+
+    Raises:
+    -   ValueError: If a predicate is invalid.
+    """
+    func = name = by = None
+    rest = []
+    for part in split_args(text):
+        matched = re.match(r"^(\w+)\(\s*([^()]*?)\s*\)$", part)
+        if matched and func is None and matched.group(1) != "fields":
+            func = matched.group(1)
+            name = matched.group(2).strip("'\"") or None
+            continue
+        matched = re.match(r"^by\s*=\s*(.+)$", part)
+        if matched:
+            names = matched.group(1).strip()
+            if names[:1] + names[-1:] in ("()", "[]"):
+                by = tuple(
+                    n.strip("'\"") for n in split_args(names[1:-1])
+                )
+            else:
+                by = names.strip("'\"")
+            continue
+        rest.append(part)
+    return parse_query(cls_name, ", ".join(rest)), func, name, by
+
+
 def validate(arg, **kwargs):
     """
     Validates user input arguments for the HBNBCommand methods.
@@ -1,7 +1,28 @@
 #!/usr/bin/python3
 """Defines the storage object of the engine module"""
+from os import getenv
 from models.engine.file_storage import FileStorage
 from models.engine.file_storage import classes
 
-storage = FileStorage()
+if getenv("HBNB_COMPACT") == "1":
+    from models.compact import compact
+    classes.update({name: compact(cls) for name, cls in classes.items()})
+
+if getenv("HBNB_TYPE_STORAGE") == "db":
+    from models.engine.db_storage import DBStorage
+    storage = DBStorage(path=getenv("HBNB_DB_PATH", "hbnb.db"))
+else:
+    storage = FileStorage(
+        journal=getenv("HBNB_FILE_JOURNAL") == "1",
+        sharded=getenv("HBNB_FILE_SHARDED") == "1",
+        lazy=getenv("HBNB_FILE_LAZY") == "1",
+        indexed=getenv("HBNB_FILE_INDEXED") == "1",
+        write_behind=(
+            float(getenv("HBNB_FILE_WRITE_BEHIND"))
+            if getenv("HBNB_FILE_WRITE_BEHIND") else None
+        ),
+        durability=getenv("HBNB_FILE_DURABILITY", "flush"),
+        codec=getenv("HBNB_FILE_CODEC", "json"),
+        compression=getenv("HBNB_FILE_COMPRESSION") or None,
+    )
 storage.reload()
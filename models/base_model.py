@@ -1,9 +1,143 @@
 #!/usr/bin/python3
 """Define the BaseModel class module"""
+import os
 import uuid
+from copy import copy
+from weakref import WeakKeyDictionary
 from datetime import datetime
 import models
 
+# The cached to_dict() and __str__() of the instances, kept out of their
+# __dict__ (dropped when an attribute is set).
+encodings = WeakKeyDictionary()
+
+
+# The attribute types that can be modified in place, without setting the
+# attribute (the __str__() of the instances holding one isn't cached).
+mutables = frozenset((list, dict, set))
+
+
+def uncache(obj):
+    """
+    Drops the cached encodings of (obj), for the callers that modify
+    its __dict__ directly (e.g. to roll it back).
+    """
+    encodings.pop(obj, None)
+
+
+# The UUID 4 version (0100) and variant (10) bits set in a byte.
+VERSION = bytes((byte & 0x0f) | 0x40 for byte in range(256))
+VARIANT = bytes((byte & 0x3f) | 0x80 for byte in range(256))
+
+
+def uuids(n, chunk=4096):
+    """
+    Generates (n) random ids formatted as str(uuid.uuid4()), reading
+    the random bytes of (chunk) ids at a time from os.urandom().
+
+    Args:
+    -   n (int): The number of ids.
+    -   chunk (int): The number of ids per os.urandom() call.
+            (defaults to 4096)
+    """
+    while n > 0:
+        size = min(n, chunk)
+        n -= size
+        buf = bytearray(os.urandom(16 * size))
+        buf[6::16] = buf[6::16].translate(VERSION)
+        buf[8::16] = buf[8::16].translate(VARIANT)
+        digits = buf.hex()
+        for i in range(0, 32 * size, 32):
+            yield (f"{digits[i:i + 8]}-{digits[i + 8:i + 12]}-"
+                   f"{digits[i + 12:i + 16]}-{digits[i + 16:i + 20]}-"
+                   f"{digits[i + 20:i + 32]}")
+
+
+def isoformat(value):
+    """
+    Returns the (value) timestamp as an ISO 8601 string
+    (as is if it is still the string it was read as).
+    """
+    return value if type(value) is str else value.isoformat()
+
+
+class Timestamp:
+    """
+    A datetime attribute of the instances (created_at, updated_at) kept
+    in their __dict__ as it was read from the storage (an ISO 8601
+    string) and only parsed when it is accessed, so loading and saving
+    an instance neither parses nor formats its timestamps.
+
+    Attributes:
+    -   name (str): The attribute name.
+    """
+
+    def __init__(self):
+        """
+        Initializes a new Timestamp instance.
+        """
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        """Records the attribute name."""
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        """
+        Returns the datetime of (obj) (the descriptor itself when read
+        on the class).
+
+        Raises:
+        -   AttributeError: If obj has no such timestamp.
+        """
+        if obj is None:
+            return self
+        if self.name not in obj.__dict__:
+            raise AttributeError(
+                f"'{type(obj).__name__}' object has no attribute "
+                f"'{self.name}'"
+            )
+        return self.parse(obj)
+
+    def __set__(self, obj, value):
+        """
+        Sets the timestamp of (obj) (a datetime, or an ISO 8601 string
+        parsed right away: only the timestamps loaded from the storage
+        are parsed lazily).
+
+        Raises:
+        -   TypeError: If value is neither a datetime nor a string.
+        -   ValueError: If value isn't an ISO 8601 string.
+        """
+        if type(value) is str:
+            value = datetime.fromisoformat(value)
+        elif not isinstance(value, datetime):
+            raise TypeError(
+                f"{self.name} must be a datetime or an ISO 8601 string"
+            )
+        obj.__dict__[self.name] = value
+
+    def __delete__(self, obj):
+        """Removes the timestamp of (obj)."""
+        try:
+            del obj.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name)
+
+    def parse(self, obj):
+        """
+        Replaces the string timestamp of (obj) by its datetime,
+        in place (the instance isn't modified for the storage).
+
+        Returns:
+        -   datetime: The timestamp (None if obj has none).
+        """
+        value = obj.__dict__.get(self.name)
+        if type(value) is str:
+            value = datetime.fromisoformat(value)
+            obj.__dict__[self.name] = value
+        return value
+
 
 class BaseModel:
     """
@@ -15,6 +149,9 @@ class BaseModel:
     -   updated_at (datetime): Timestamp representing the last update date.
     """
 
+    created_at = Timestamp()
+    updated_at = Timestamp()
+
     def __init__(self, *args, **kwargs):
         """
         Initializes a new BaseModel instance. If keyword arguments are provided
@@ -28,26 +165,97 @@ class BaseModel:
         -   **kwargs: Arbitrary keyword arguments.
         """
         if kwargs:
-            for key, value in kwargs.items():
-                if key == "__class__":
-                    continue
-                if key == "created_at" or key == "updated_at":
-                    value = datetime.fromisoformat(value)
-                setattr(self, key, value)
+            kwargs.pop("__class__", None)
+            self.__dict__.update(kwargs)
         else:
             self.id = str(uuid.uuid4())
             self.created_at = datetime.now()
             self.updated_at = datetime.now()
             models.storage.new(self)
 
+    @classmethod
+    def create_many(cls, n, **defaults):
+        """
+        Creates (n) new instances sharing one timestamp, registers them
+        in the storage at once and saves them with one save.
+
+        Args:
+        -   n (int): The number of instances.
+        -   **defaults: The attributes of every instance (the lists,
+                dictionaries and sets are copied for each instance).
+
+        Returns:
+        -   list: The new instances.
+
+        Raises:
+        -   ValueError: If n is negative.
+        """
+        if n < 0:
+            raise ValueError(f"can't create {n} instances")
+        now = datetime.now()
+        defaults.pop("__class__", None)
+        attrs = {**defaults, "created_at": now, "updated_at": now}
+        mutable = [
+            name for name, value in defaults.items()
+            if isinstance(value, (list, dict, set))
+        ]
+        objs = []
+        for uid in uuids(n):
+            attrs["id"] = uid
+            for name in mutable:
+                attrs[name] = copy(defaults[name])
+            objs.append(cls(**attrs))
+        if objs:
+            models.storage.new_many(objs)
+            models.storage.save()
+        return objs
+
+    def __setattr__(self, name, value):
+        """
+        Sets the attribute (name) to (value), drops the cached encodings
+        and flags the instance as modified in the storage so it is
+        serialized on the next save.
+
+        Args:
+        -   name (str): The attribute name.
+        -   value (any): The attribute value.
+        """
+        encodings.pop(self, None)
+        models.storage.touch(self)
+        super().__setattr__(name, value)
+
+    def __delattr__(self, name):
+        """
+        Unsets the attribute (name), drops the cached encodings and flags
+        the instance as modified in the storage so the attribute is
+        dropped on the next save.
+
+        Args:
+        -   name (str): The attribute name.
+        """
+        encodings.pop(self, None)
+        models.storage.touch(self)
+        super().__delattr__(name)
+
     def __str__(self):
         """
         A string representation of the BaseModel instance.
 
         Returns:
-        -   str: A string representation of the model instance.
+        -   str: A string representation of the model instance
+                (cached until an attribute is set, unless an attribute
+                is a list, a dictionary or a set).
         """
-        return f"[{self.__class__.__name__}] ({self.id}) {self.__dict__}"
+        cached = encodings.setdefault(self, {})
+        if "str" in cached:
+            return cached["str"]
+        BaseModel.created_at.parse(self)
+        BaseModel.updated_at.parse(self)
+        string = f"[{self.__class__.__name__}] ({self.id}) {self.__dict__}"
+        if not any(type(value) in mutables
+                   for value in self.__dict__.values()):
+            cached["str"] = string
+        return string
 
     def save(self):
         """
@@ -55,6 +263,7 @@ class BaseModel:
         the class instance to the storage file.
         """
         self.updated_at = datetime.now()
+        models.storage.new(self)
         models.storage.save()
 
     def to_dict(self):
@@ -62,10 +271,14 @@ class BaseModel:
         A dictionary representation of the BaseModel instance.
 
         Returns:
-        -   _dict: A dictionary representation of the model instance.
+        -   _dict: A dictionary representation of the model instance
+                (a copy of the one cached until an attribute is set).
         """
-        _dict = self.__dict__.copy()
-        _dict["__class__"] = self.__class__.__name__
-        _dict['created_at'] = _dict['created_at'].isoformat()
-        _dict['updated_at'] = _dict['updated_at'].isoformat()
-        return _dict
+        cached = encodings.setdefault(self, {})
+        if "dict" not in cached:
+            _dict = self.__dict__.copy()
+            _dict["__class__"] = self.__class__.__name__
+            _dict['created_at'] = isoformat(_dict['created_at'])
+            _dict['updated_at'] = isoformat(_dict['updated_at'])
+            cached["dict"] = _dict
+        return cached["dict"].copy()
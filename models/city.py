@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 """Define the City class module"""
 from models.base_model import BaseModel
+from models.relationships import BelongsTo, HasMany
 
 
 class City(BaseModel):
@@ -8,3 +9,5 @@ class City(BaseModel):
 
     name = ""
     state_id = ""  # it will be the State.id later
+    state = BelongsTo("State", "state_id")
+    places = HasMany("Place", "city_id")
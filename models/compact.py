@@ -0,0 +1,247 @@
+#!/usr/bin/python3
+"""
+Define the compact models module.
+
+A compact model class is a subclass of its model class (e.g. Place)
+that stores the attributes declared by the model class (e.g.
+Place.name) in slots instead of the per-instance __dict__: the defaults
+stay on the class, and the other attributes go to an overflow
+dictionary only when an instance has some. Its __dict__ is a view of
+its slots and overflow attributes, so to_dict(), __str__(), setattr()
+and the storage engines handle it like a model instance.
+"""
+from collections.abc import MutableMapping
+import models
+from models.base_model import BaseModel, encodings
+from models.relationships import Relationship
+
+
+# The compact variant of each model class (see compact()).
+compacts = {}
+
+
+def overflow(obj):
+    """
+    Returns the overflow attributes of the compact instance (obj)
+    (None if it has none).
+    """
+    try:
+        return type(obj)._overflow.__get__(obj)
+    except AttributeError:
+        return None
+
+
+class Field:
+    """
+    A declared attribute of a compact model class: its slot, read as
+    the class default while unset.
+
+    Attributes:
+    -   slot (member_descriptor): The slot holding the value.
+    -   default (any): The class default.
+    """
+
+    __slots__ = ("slot", "default")
+
+    def __init__(self, slot, default):
+        """
+        Initializes a new Field instance.
+
+        Args:
+        -   slot (member_descriptor): The slot holding the value.
+        -   default (any): The class default.
+        """
+        self.slot = slot
+        self.default = default
+
+    def __get__(self, obj, owner=None):
+        """Returns the value of the slot (or the class default)."""
+        if obj is None:
+            return self.default
+        try:
+            return self.slot.__get__(obj, owner)
+        except AttributeError:
+            return self.default
+
+    def __set__(self, obj, value):
+        """Sets the value of the slot."""
+        self.slot.__set__(obj, value)
+
+    def __delete__(self, obj):
+        """Unsets the slot."""
+        self.slot.__delete__(obj)
+
+
+class Attributes(MutableMapping):
+    """
+    The attributes of a compact instance as a dictionary
+    (its set slots, then its overflow attributes).
+    """
+
+    __slots__ = ("__obj",)
+
+    def __init__(self, obj):
+        """
+        Initializes a new Attributes instance.
+
+        Args:
+        -   obj (CompactModel): The compact instance.
+        """
+        self.__obj = obj
+
+    def __getitem__(self, name):
+        """Returns the (name) attribute (KeyError if it isn't set)."""
+        obj = self.__obj
+        slot = obj._slots.get(name)
+        try:
+            if slot is not None:
+                return slot.__get__(obj)
+            return overflow(obj)[name]
+        except (AttributeError, TypeError):
+            raise KeyError(name)
+
+    def __setitem__(self, name, value):
+        """Sets the (name) attribute."""
+        obj = self.__obj
+        slot = obj._slots.get(name)
+        if slot is not None:
+            slot.__set__(obj, value)
+            return
+        extra = overflow(obj)
+        if extra is None:
+            extra = {}
+            type(obj)._overflow.__set__(obj, extra)
+        extra[name] = value
+
+    def __delitem__(self, name):
+        """Unsets the (name) attribute (KeyError if it isn't set)."""
+        obj = self.__obj
+        slot = obj._slots.get(name)
+        try:
+            if slot is not None:
+                slot.__delete__(obj)
+                return
+            extra = overflow(obj)
+            del extra[name]
+            if not extra:
+                type(obj)._overflow.__delete__(obj)
+        except (AttributeError, TypeError):
+            raise KeyError(name)
+
+    def __iter__(self):
+        """Yields the names of the set attributes."""
+        obj = self.__obj
+        for name, slot in obj._slots.items():
+            try:
+                slot.__get__(obj)
+            except AttributeError:
+                continue
+            yield name
+        yield from list(overflow(obj) or ())
+
+    def __len__(self):
+        """Returns the number of set attributes."""
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        """Returns the representation of the attributes dictionary."""
+        return repr(dict(self))
+
+    def copy(self):
+        """Returns the attributes as a new dictionary."""
+        return dict(self)
+
+
+class CompactModel:
+    """
+    The mixin of the compact model classes (see compact()), placed
+    before their model class.
+
+    The BaseModel methods are inherited as is, the attributes are
+    read and written through __dict__ (an Attributes view).
+    """
+
+    __slots__ = ()
+
+    @property
+    def __dict__(self):
+        """The attributes of the instance (a dictionary view)."""
+        return Attributes(self)
+
+    def __getattr__(self, name):
+        """
+        Returns the (name) overflow attribute (called when (name)
+        isn't a set slot nor a class attribute).
+        """
+        extra = overflow(self)
+        if extra is not None and name in extra:
+            return extra[name]
+        raise AttributeError(
+            f"'{type(self).__name__}' object has no attribute '{name}'"
+        )
+
+    def __setattr__(self, name, value):
+        """
+        Sets the attribute (name) to (value) (in its slot, or in the
+        overflow attributes), drops the cached encodings and flags the
+        instance as modified in the storage.
+        """
+        encodings.pop(self, None)
+        models.storage.touch(self)
+        if name in ("created_at", "updated_at"):
+            getattr(BaseModel, name).__set__(self, value)
+            return
+        Attributes(self)[name] = value
+
+    def __delattr__(self, name):
+        """
+        Unsets the attribute (name).
+        """
+        encodings.pop(self, None)
+        models.storage.touch(self)
+        try:
+            del Attributes(self)[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+def compact(cls):
+    """
+    Returns the compact variant of the (cls) model class: a subclass of
+    the same name whose declared attributes (the class attributes of
+    cls, e.g. Place.name) are stored in slots
+    (built once per model class, a compact class is its own variant).
+
+    Args:
+    -   cls (type): The model class (BaseModel or a subclass).
+
+    Returns:
+    -   type: The compact model class.
+    """
+    if issubclass(cls, CompactModel):
+        return cls
+    if cls in compacts:
+        return compacts[cls]
+    defaults = {}
+    for klass in reversed(cls.__mro__[:cls.__mro__.index(BaseModel)]):
+        for name, value in vars(klass).items():
+            if not name.startswith('_') and not callable(value) \
+                    and not isinstance(value, Relationship):
+                defaults[name] = value
+    names = ("id", "created_at", "updated_at", *defaults)
+    compact_cls = type(cls.__name__, (CompactModel, cls), {
+        "__slots__": (*names, "_CompactModel__overflow"),
+        "__dict__": vars(CompactModel)["__dict__"],
+        "__module__": cls.__module__,
+        "__qualname__": cls.__qualname__,
+        "__doc__": cls.__doc__,
+    })
+    compact_cls._slots = {name: vars(compact_cls)[name] for name in names}
+    compact_cls._overflow = vars(compact_cls)["_CompactModel__overflow"]
+    # The timestamps are parsed when accessed, as for the model instances.
+    compact_cls.created_at = BaseModel.created_at
+    compact_cls.updated_at = BaseModel.updated_at
+    for name, default in defaults.items():
+        setattr(compact_cls, name, Field(compact_cls._slots[name], default))
+    compacts[cls] = compact_cls
+    return compact_cls
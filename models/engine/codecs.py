@@ -0,0 +1,407 @@
+#!/usr/bin/python3
+"""
+Define the storage codecs module.
+
+A codec turns the instance records (the instance attributes plus their
+`__class__` name) into the bytes written by the storage engine:
+
+- JSONCodec ("json"): the default, human readable JSON file.
+- PickleCodec ("pickle") and MarshalCodec ("marshal"): length-prefixed
+    binary records encoded by the stdlib pickle/marshal modules, which
+    keep ints, floats and datetimes native. Reading such a file can run
+    arbitrary code, so they are only built with trusted=True.
+
+There is no safe binary codec: a record format decoded by Python code
+is several times slower than the C json module it would replace.
+
+Files can be converted from a codec to another:
+
+>>>> python3 -m models.engine.codecs <src> <codec> <dst> <codec>
+"""
+import sys
+import json
+import struct
+import pickle
+import marshal
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def _isoformat(value):
+    """
+    Encodes the datetime values of the records for json.dumps().
+
+    Raises:
+    -   TypeError: If (value) is not a datetime.
+    """
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class JSONCodec:
+    """
+    Encode the records as JSON (the `{"<key>": {<record>}, ...}` file
+    and one JSON object per journal line).
+
+    Attributes:
+    -   name (str): The codec name.
+    -   extension (str): The extension of the storage files.
+    -   separator (bytes): The bytes written after each record
+            of a lines file.
+    """
+
+    name = "json"
+    extension = ".json"
+    separator = b"\n"
+
+    def encode(self, record):
+        """
+        Returns the (record) dictionary encoded as bytes.
+        """
+        return json.dumps(record, default=_isoformat).encode()
+
+    def decode(self, data):
+        """
+        Returns the record dictionary encoded in (data) bytes.
+        """
+        return json.loads(data)
+
+    def dump(self, f, items):
+        """
+        Writes the encoded records to the binary file (f).
+
+        Args:
+        -   f (file): The file open for writing.
+        -   items (iterable): The (key, encoded record) pairs.
+        """
+        f.write(b"{")
+        sep = b""
+        for key, data in items:
+            f.write(b'%s%s: %s' % (sep, json.dumps(key).encode(), data))
+            sep = b", "
+        f.write(b"}")
+
+    def load(self, f):
+        """
+        Reads the records of the binary file (f).
+
+        Returns:
+        -   dict: The record dictionaries by key.
+        """
+        return json.loads(f.read())
+
+    def append(self, f, key, data):
+        """
+        Appends one journal record to the binary file (f).
+
+        Args:
+        -   f (file): The journal open for appending.
+        -   key (str): The instance key.
+        -   data (bytes): The encoded record (None if deleted).
+        """
+        op = b"del" if data is None else b"set"
+        f.write(b'{"op": "%s", "key": %s, "obj": %s}\n' % (
+            op, json.dumps(key).encode(), b"null" if data is None else data
+        ))
+
+    def replay(self, f, _dict):
+        """
+        Applies the journal records of the binary file (f) to (_dict).
+        A partial last record (left by a crash) ends the replay.
+
+        Returns:
+        -   tuple: The number of replayed records and the offset
+                following the last one (where the journal is valid).
+        """
+        size = end = 0
+        for line in f:
+            if not line.endswith(self.separator):
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            if record["op"] == "del":
+                _dict.pop(record["key"], None)
+            else:
+                _dict[record["key"]] = record["obj"]
+            size += 1
+            end += len(line)
+        return size, end
+
+
+class FramedCodec(ABC):
+    """
+    Base class of the binary codecs: the records are stored as
+    length-prefixed binary frames, encoded by the subclass.
+
+    A file starts with the `magic` bytes followed by one frame per
+    record: the key length (4 bytes), the key, the record length
+    (4 bytes) and the record. A journal frame is prefixed by one
+    operation byte (b"S" for set, b"D" for delete).
+
+    Attributes:
+    -   name (str): The codec name.
+    -   extension (str): The extension of the storage files.
+    -   separator (bytes): The bytes written after each record
+            of a lines file.
+    -   magic (bytes): The first bytes of a file of the codec.
+    """
+
+    separator = b""
+
+    __size = struct.Struct("<I")
+
+    @abstractmethod
+    def encode(self, record):
+        """
+        Returns the (record) dictionary encoded as bytes.
+        """
+
+    @abstractmethod
+    def decode(self, data):
+        """
+        Returns the record dictionary encoded in (data) bytes.
+        """
+
+    def dump(self, f, items):
+        """
+        Writes the encoded records to the binary file (f).
+
+        Args:
+        -   f (file): The file open for writing.
+        -   items (iterable): The (key, encoded record) pairs.
+        """
+        pack = self.__size.pack
+        f.write(self.magic)
+        for key, data in items:
+            key = key.encode()
+            f.write(b"".join((pack(len(key)), key, pack(len(data)), data)))
+
+    def load(self, f):
+        """
+        Reads the records of the binary file (f).
+
+        Returns:
+        -   dict: The record dictionaries by key.
+
+        Raises:
+        -   ValueError: If (f) is not a file of the codec.
+        """
+        buf = memoryview(f.read())
+        if bytes(buf[:len(self.magic)]) != self.magic:
+            raise ValueError(f"not a {self.name} file")
+        _dict = {}
+        pos = len(self.magic)
+        while pos < len(buf):
+            key, pos = self.__read_frame(buf, pos)
+            data, pos = self.__read_frame(buf, pos)
+            _dict[bytes(key).decode()] = self.decode(data)
+        return _dict
+
+    def append(self, f, key, data):
+        """
+        Appends one journal frame to the binary file (f).
+
+        Args:
+        -   f (file): The journal open for appending.
+        -   key (str): The instance key.
+        -   data (bytes): The encoded record (None if deleted).
+        """
+        pack = self.__size.pack
+        key = key.encode()
+        if data is None:
+            f.write(b"".join((b"D", pack(len(key)), key)))
+        else:
+            f.write(b"".join(
+                (b"S", pack(len(key)), key, pack(len(data)), data)
+            ))
+
+    def replay(self, f, _dict):
+        """
+        Applies the journal frames of the binary file (f) to (_dict).
+        A partial last frame (left by a crash) ends the replay.
+
+        Returns:
+        -   tuple: The number of replayed frames and the offset
+                following the last one (where the journal is valid).
+        """
+        buf = memoryview(f.read())
+        pos = size = 0
+        try:
+            while pos < len(buf):
+                op = buf[pos:pos + 1]
+                if op != b"S" and op != b"D":
+                    break
+                key, end = self.__read_frame(buf, pos + 1)
+                key = bytes(key).decode()
+                if op == b"D":
+                    _dict.pop(key, None)
+                else:
+                    data, end = self.__read_frame(buf, end)
+                    _dict[key] = self.decode(data)
+                pos = end
+                size += 1
+        except (ValueError, IndexError, struct.error):
+            pass
+        return size, pos
+
+    def __read_frame(self, buf, pos):
+        """
+        Reads the length-prefixed frame starting at (pos) of (buf).
+
+        Returns:
+        -   tuple: The frame and the position following it.
+
+        Raises:
+        -   ValueError: If the frame is truncated.
+        """
+        end = pos + self.__size.size
+        if end > len(buf):
+            raise ValueError("truncated frame")
+        length, = self.__size.unpack_from(buf, pos)
+        if end + length > len(buf):
+            raise ValueError("truncated frame")
+        return buf[end:end + length], end + length
+
+
+class PickleCodec(FramedCodec):
+    """
+    Encode the records with the stdlib pickle module (framed file).
+    Unpickling runs arbitrary code: only use it on trusted files.
+    """
+
+    name = "pickle"
+    extension = ".pickle"
+    magic = b"HBNBP\x01"
+
+    def __init__(self, *, trusted=False):
+        """
+        Initializes a new PickleCodec instance.
+
+        Args:
+        -   trusted (bool): Must be True to acknowledge that the files
+                are trusted.
+
+        Raises:
+        -   ValueError: If trusted is not set.
+        """
+        if not trusted:
+            raise ValueError(f"the {self.name} codec requires trusted=True")
+
+    def encode(self, record):
+        """
+        Returns the (record) dictionary encoded as bytes.
+        """
+        return pickle.dumps(record, pickle.HIGHEST_PROTOCOL)
+
+    def decode(self, data):
+        """
+        Returns the record dictionary encoded in (data) bytes.
+        """
+        return pickle.loads(data)
+
+
+class MarshalCodec(PickleCodec):
+    """
+    Encode the records with the stdlib marshal module (framed file),
+    the datetimes are stored as ("\\0datetime", <microseconds>) tuples.
+    Unmarshalling malformed data can crash: only use it on trusted files.
+    """
+
+    name = "marshal"
+    extension = ".marshal"
+    magic = b"HBNBM\x01"
+    tag = "\0datetime"
+
+    def encode(self, record):
+        """
+        Returns the (record) dictionary encoded as bytes.
+        """
+        record = {
+            key: (self.tag, (value - EPOCH) // MICROSECOND)
+            if isinstance(value, datetime) else value
+            for key, value in record.items()
+        }
+        return marshal.dumps(record)
+
+    def decode(self, data):
+        """
+        Returns the record dictionary encoded in (data) bytes.
+        """
+        record = marshal.loads(data)
+        for key, value in record.items():
+            if type(value) is tuple and len(value) == 2 \
+                    and value[0] == self.tag:
+                record[key] = EPOCH + value[1] * MICROSECOND
+        return record
+
+
+codecs = {
+    'json': JSONCodec,
+    'pickle': PickleCodec,
+    'marshal': MarshalCodec,
+}
+
+
+def get_codec(codec, trusted=False):
+    """
+    Returns the codec instance of (codec).
+
+    Args:
+    -   codec (str | object): A codec name (or a codec instance).
+    -   trusted (bool): Allows the pickle and marshal codecs.
+            (defaults to False)
+
+    Raises:
+    -   ValueError: If the codec name is unknown.
+    """
+    if not isinstance(codec, str):
+        return codec
+    if codec not in codecs:
+        raise ValueError(f"unknown codec: {codec}")
+    if issubclass(codecs[codec], PickleCodec):
+        return codecs[codec](trusted=trusted)
+    return codecs[codec]()
+
+
+def convert(src_path, src_codec, dst_path, dst_codec):
+    """
+    Converts a storage file from a codec to another.
+
+    Args:
+    -   src_path (str): The path to the source file.
+    -   src_codec (str | object): The codec of the source file.
+    -   dst_path (str): The path to the converted file.
+    -   dst_codec (str | object): The codec of the converted file.
+
+    Returns:
+    -   int: The number of converted records.
+    """
+    src_codec = get_codec(src_codec, trusted=True)
+    dst_codec = get_codec(dst_codec, trusted=True)
+    with open(src_path, 'rb') as f:
+        _dict = src_codec.load(f)
+    for record in _dict.values():
+        for key in ("created_at", "updated_at"):
+            if isinstance(record.get(key), str):
+                record[key] = datetime.fromisoformat(record[key])
+    with open(dst_path, 'wb') as f:
+        dst_codec.dump(f, (
+            (key, dst_codec.encode(record)) for key, record in _dict.items()
+        ))
+    return len(_dict)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 5:
+        print(
+            "Usage: python3 -m models.engine.codecs "
+            "<src> <codec> <dst> <codec>"
+        )
+        sys.exit(1)
+    print(convert(*sys.argv[1:]), "records converted")
@@ -0,0 +1,335 @@
+#!/usr/bin/python3
+"""
+Define the columnar store module.
+
+A ColumnStore keeps the numeric attributes of the instances of a class
+in columns (one array of floats per attribute, one row per instance)
+and the attributes they are grouped by dictionary encoded (one array
+of codes per attribute), so the filters and aggregates run over
+contiguous arrays instead of the instances: vectorized with NumPy when
+it can be imported, in one pass over the arrays otherwise.
+"""
+import math
+import operator
+from array import array
+from itertools import compress
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+NAN = float("nan")
+
+comparisons = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+aggregates = ("count", "sum", "mean", "min", "max")
+
+
+def real(value):
+    """
+    Returns the number (value) as a float (NaN for None).
+    """
+    if value is None:
+        return NAN
+    try:
+        return float(value)
+    except OverflowError:
+        return math.copysign(math.inf, value)
+
+
+class ColumnStore:
+    """
+    The numeric attributes of the instances of a class in columns.
+
+    Attributes:
+    -   names (tuple): The numeric attributes (one column each, NaN
+            for an instance whose value isn't a number).
+    -   groups (tuple): The attributes the rows can be grouped by.
+    """
+
+    def __init__(self, names, groups=()):
+        """
+        Initializes a new ColumnStore instance.
+
+        Args:
+        -   names (iterable): The numeric attributes.
+        -   groups (iterable): The attributes to group by.
+                (defaults to (), no grouping)
+        """
+        self.names = tuple(names)
+        self.groups = tuple(groups)
+        self.__columns = {name: array('d') for name in self.names}
+        self.__codes = {name: array('q') for name in self.groups}
+        self.__labels = {name: [] for name in self.groups}
+        self.__encoding = {name: {} for name in self.groups}
+        self.__keys = []
+        self.__rows = {}
+
+    def __len__(self):
+        """Returns the number of rows."""
+        return len(self.__keys)
+
+    def __contains__(self, key):
+        """Returns True if the (key) instance has a row."""
+        return key in self.__rows
+
+    def set(self, key, values, labels=()):
+        """
+        Sets the row of the (key) instance (appended if new).
+
+        Args:
+        -   key (str): The instance key.
+        -   values (iterable): The number (or None) of each attribute
+                of `names`.
+        -   labels (iterable): The (hashable) value of each attribute
+                of `groups`.
+                (defaults to ())
+        """
+        values = [real(value) for value in values]
+        codes = [self.__code(name, label)
+                 for name, label in zip(self.groups, labels)]
+        row = self.__rows.get(key)
+        if row is None:
+            self.__rows[key] = len(self.__keys)
+            self.__keys.append(key)
+            for name, value in zip(self.names, values):
+                self.__columns[name].append(value)
+            for name, code in zip(self.groups, codes):
+                self.__codes[name].append(code)
+            return
+        for name, value in zip(self.names, values):
+            self.__columns[name][row] = value
+        for name, code in zip(self.groups, codes):
+            self.__codes[name][row] = code
+
+    def remove(self, key):
+        """
+        Removes the row of the (key) instance (the last row moves
+        in its place).
+        """
+        row = self.__rows.pop(key, None)
+        if row is None:
+            return
+        last = self.__keys.pop()
+        columns = [*self.__columns.values(), *self.__codes.values()]
+        if last != key:
+            self.__keys[row] = last
+            self.__rows[last] = row
+            for column in columns:
+                column[row] = column[-1]
+        for column in columns:
+            column.pop()
+
+    def keys(self, where=()):
+        """
+        Returns the keys of the rows matching the predicates (where).
+
+        Args:
+        -   where (iterable): The (attribute, operator, value)
+                predicates (see `comparisons`), all to be matched.
+                (defaults to (), every row)
+
+        Returns:
+        -   list: The matching keys.
+
+        Raises:
+        -   ValueError: If a predicate is invalid.
+        """
+        mask = self.__mask(where)
+        if mask is None:
+            return list(self.__keys)
+        if numpy is not None:
+            return [self.__keys[row] for row in numpy.flatnonzero(mask)]
+        return list(compress(self.__keys, mask))
+
+    def aggregate(self, func, name=None, where=(), by=None):
+        """
+        Aggregates the (name) column of the rows matching (where),
+        leaving out the rows whose value isn't a number.
+
+        Args:
+        -   func (str): One of `aggregates`.
+        -   name (str): The numeric attribute (optional to count rows).
+                (defaults to None)
+        -   where (iterable): The (attribute, operator, value)
+                predicates, all to be matched.
+                (defaults to (), every row)
+        -   by (str): The attribute to group the rows by.
+                (defaults to None, no grouping)
+
+        Returns:
+        -   int | float | None: The aggregate (None for the mean, min
+                or max of no value).
+        -   dict: The aggregate by value of (by) if given (the groups
+                without value are left out).
+
+        Raises:
+        -   ValueError: If func, name, by or a predicate is invalid.
+        """
+        if func not in aggregates:
+            raise ValueError(f"unknown aggregate: {func!r}")
+        if name is None and func != "count":
+            raise ValueError(f"{func} needs an attribute")
+        if name is not None and name not in self.__columns:
+            raise ValueError(f"{name} is not a column")
+        if by is not None and by not in self.__codes:
+            raise ValueError(f"can't group by {by}")
+        mask = self.__mask(where)
+        if numpy is not None:
+            return self.__vectorized(func, name, mask, by)
+        return self.__scanned(func, name, mask, by)
+
+    def __code(self, name, label):
+        """
+        Returns the code of the (label) value of the (name) attribute.
+        """
+        encoding = self.__encoding[name]
+        code = encoding.get(label)
+        if code is None:
+            code = encoding[label] = len(self.__labels[name])
+            self.__labels[name].append(label)
+        return code
+
+    def __column(self, name):
+        """
+        Returns the (name) column as a NumPy array (shares its buffer).
+        """
+        if name in self.__columns:
+            return numpy.frombuffer(self.__columns[name], dtype=numpy.float64)
+        return numpy.frombuffer(self.__codes[name], dtype=numpy.int64)
+
+    def __mask(self, where):
+        """
+        Returns the rows matching (where) as a NumPy array or a list
+        of booleans (None to match every row).
+        """
+        mask = None
+        for name, op, value in where:
+            test = self.__test(name, op, value)
+            if mask is None:
+                mask = test
+            elif numpy is not None:
+                mask &= test
+            else:
+                mask = [a and b for a, b in zip(mask, test)]
+        return mask
+
+    def __test(self, name, op, value):
+        """
+        Returns the rows matching one predicate.
+        """
+        compare = comparisons.get(op)
+        if compare is None:
+            raise ValueError(f"unknown operator: {op!r}")
+        if name in self.__codes:
+            if op not in ("=", "!="):
+                raise ValueError(f"{name} only supports = and !=")
+            try:
+                code = self.__encoding[name].get(value, -1)
+            except TypeError:
+                code = -1
+            if numpy is not None:
+                return compare(self.__column(name), code)
+            return [compare(c, code) for c in self.__codes[name]]
+        if name not in self.__columns:
+            raise ValueError(f"{name} is not a column")
+        if type(value) is not int and type(value) is not float:
+            raise ValueError(f"{name} {op} takes a number: {value!r}")
+        if numpy is not None:
+            column = self.__column(name)
+            test = compare(column, value)
+            if op == "!=":
+                test &= ~numpy.isnan(column)
+            return test
+        return [v == v and compare(v, value) for v in self.__columns[name]]
+
+    def __vectorized(self, func, name, mask, by):
+        """
+        Returns the aggregate of the rows computed by NumPy.
+        """
+        rows = numpy.ones(len(self.__keys), dtype=bool) \
+            if mask is None else mask
+        values = None
+        if name is not None:
+            values = self.__column(name)
+            rows = rows & ~numpy.isnan(values)
+            values = values[rows]
+        if by is None:
+            if func == "count":
+                return int(numpy.count_nonzero(rows))
+            if func == "sum":
+                return float(values.sum())
+            if not values.size:
+                return None
+            return float(getattr(values, func)())
+        codes = self.__column(by)[rows]
+        labels = self.__labels[by]
+        counts = numpy.bincount(codes, minlength=len(labels))
+        if func == "count":
+            result = counts
+        elif func in ("sum", "mean"):
+            result = numpy.bincount(codes, values, minlength=len(labels))
+            if func == "mean":
+                result = result / numpy.maximum(counts, 1)
+        else:
+            reduce = numpy.minimum if func == "min" else numpy.maximum
+            result = numpy.full(
+                len(labels), math.inf if func == "min" else -math.inf
+            )
+            reduce.at(result, codes, values)
+        return {labels[i]: result[i].item() for i in numpy.flatnonzero(counts)}
+
+    def __scanned(self, func, name, mask, by):
+        """
+        Returns the aggregate of the rows computed in one pass.
+        """
+        rows = range(len(self.__keys))
+        if mask is not None:
+            rows = compress(rows, mask)
+        column = self.__columns[name] if name is not None else None
+        codes = self.__codes[by] if by is not None else None
+        states = {}
+        for row in rows:
+            value = 0.0 if column is None else column[row]
+            if value != value:
+                continue
+            code = 0 if codes is None else codes[row]
+            state = states.get(code)
+            if state is None:
+                states[code] = [1, value, value, value]
+                continue
+            state[0] += 1
+            state[1] += value
+            if value < state[2]:
+                state[2] = value
+            if value > state[3]:
+                state[3] = value
+        found = {code: final(func, state) for code, state in states.items()}
+        if by is not None:
+            labels = self.__labels[by]
+            return {labels[code]: found[code] for code in sorted(found)}
+        if 0 in found:
+            return found[0]
+        return {"count": 0, "sum": 0.0}.get(func)
+
+
+def final(func, state):
+    """
+    Returns the (func) aggregate of a (count, sum, min, max) state.
+    """
+    count, total, low, high = state
+    return {
+        "count": count,
+        "sum": total,
+        "mean": total / count,
+        "min": low,
+        "max": high,
+    }[func]
@@ -0,0 +1,195 @@
+#!/usr/bin/python3
+"""
+Define the storage compression module.
+
+The whole storage files (the main file and the class files of the
+sharded mode) are streamed through a gzip, lzma or zlib compressor,
+so the encoded and compressed payloads are never both held in memory.
+
+In indexed mode every record is compressed on its own (raw deflate)
+against a preset dictionary shared by all the records, so get() still
+only reads and inflates the line of the requested instance.
+"""
+import io
+import gzip
+import lzma
+import zlib
+from datetime import datetime
+
+CHUNK = 64 * 1024
+
+
+class ZlibFile(io.BufferedIOBase):
+    """
+    Stream zlib compressed data to or from a binary file object
+    (the file object isn't closed with the ZlibFile).
+    """
+
+    def __init__(self, f, mode='rb', level=zlib.Z_DEFAULT_COMPRESSION):
+        """
+        Initializes a new ZlibFile instance.
+
+        Args:
+        -   f (file): The underlying binary file object.
+        -   mode (str): 'rb' or 'wb'.
+                (defaults to 'rb')
+        -   level (int): The compression level.
+        """
+        super().__init__()
+        self.__f = f
+        self.__mode = mode
+        if 'w' in mode:
+            self.__zlib = zlib.compressobj(level)
+        else:
+            self.__zlib = zlib.decompressobj()
+        self.__buf = b""
+
+    def readable(self):
+        """Returns True if the file is open for reading."""
+        return 'r' in self.__mode
+
+    def writable(self):
+        """Returns True if the file is open for writing."""
+        return 'w' in self.__mode
+
+    def write(self, data):
+        """
+        Compresses (data) to the underlying file.
+
+        Returns:
+        -   int: The number of uncompressed bytes written.
+        """
+        self.__f.write(self.__zlib.compress(data))
+        return len(data)
+
+    def read(self, size=-1):
+        """
+        Reads up to (size) uncompressed bytes (all of them if negative).
+        """
+        chunks = [self.__buf]
+        length = len(self.__buf)
+        while (size is None or size < 0 or length < size) \
+                and not self.__zlib.eof:
+            data = self.__f.read(CHUNK)
+            if not data:
+                break
+            data = self.__zlib.decompress(data)
+            chunks.append(data)
+            length += len(data)
+        data = b"".join(chunks)
+        if size is None or size < 0:
+            size = len(data)
+        self.__buf = data[size:]
+        return data[:size]
+
+    read1 = read
+
+    def close(self):
+        """
+        Writes the end of the compressed stream (if open for writing).
+        """
+        if not self.closed and self.writable():
+            self.__f.write(self.__zlib.flush())
+        super().close()
+
+
+compressions = {
+    'gzip': ('.gz', lambda f, mode: gzip.GzipFile(
+        fileobj=f, mode=mode, mtime=0
+    )),
+    'lzma': ('.xz', lzma.LZMAFile),
+    'zlib': ('.zz', ZlibFile),
+}
+
+
+def open_compressed(f, compression, mode='rb'):
+    """
+    Wraps the binary file object (f) into a (compression) stream.
+
+    Args:
+    -   f (file): The underlying binary file object.
+    -   compression (str): "gzip", "lzma" or "zlib".
+    -   mode (str): 'rb' or 'wb'.
+            (defaults to 'rb')
+
+    Raises:
+    -   ValueError: If the compression is unknown.
+    """
+    if compression not in compressions:
+        raise ValueError(f"unknown compression: {compression}")
+    return compressions[compression][1](f, mode)
+
+
+class RecordCodec:
+    """
+    Compress every record encoded by a codec on its own
+    (raw deflate with a preset dictionary).
+
+    Attributes:
+    -   name (str): The name of the wrapped codec.
+    -   extension (str): The extension of the wrapped codec.
+    -   separator (bytes): The bytes written after each record
+            of a lines file (none, the records are length-indexed).
+    -   zdict (bytes): The preset dictionary.
+    """
+
+    separator = b""
+
+    def __init__(self, codec, zdict, level=zlib.Z_DEFAULT_COMPRESSION):
+        """
+        Initializes a new RecordCodec instance.
+
+        Args:
+        -   codec (object): The wrapped codec.
+        -   zdict (bytes): The preset dictionary.
+        -   level (int): The compression level.
+        """
+        self.__codec = codec
+        self.__level = level
+        self.name = codec.name
+        self.extension = codec.extension
+        self.zdict = zdict
+
+    def encode(self, record):
+        """
+        Returns the (record) dictionary encoded and compressed.
+        """
+        z = zlib.compressobj(
+            self.__level, zlib.DEFLATED, -15, zdict=self.zdict
+        )
+        return z.compress(self.__codec.encode(record)) + z.flush()
+
+    def decode(self, data):
+        """
+        Returns the record dictionary compressed in (data) bytes.
+        """
+        z = zlib.decompressobj(-15, zdict=self.zdict)
+        return self.__codec.decode(z.decompress(data) + z.flush())
+
+
+def preset(codec, classes):
+    """
+    Builds a preset dictionary from one template record of each class
+    (its class attributes and the BaseModel attributes).
+
+    Args:
+    -   codec (object): The codec encoding the records.
+    -   classes (dict): The classes by name.
+
+    Returns:
+    -   bytes: The preset dictionary (at most 32KB, zlib's window).
+    """
+    date = datetime(2000, 1, 1, 0, 0, 0, 1)
+    templates = []
+    for cls_name, cls in classes.items():
+        record = {
+            "id": "00000000-0000-0000-0000-000000000000",
+            "created_at": date, "updated_at": date,
+        }
+        for name, value in vars(cls).items():
+            if not name.startswith('_') \
+                    and isinstance(value, (str, int, float, list)):
+                record[name] = value
+        record["__class__"] = cls_name
+        templates.append(codec.encode(record))
+    return b"".join(templates)[-32768:]
@@ -0,0 +1,703 @@
+#!/usr/bin/python3
+"""Define the DBStorage class module"""
+import json
+import sqlite3
+from contextlib import contextmanager
+from models.base_model import uncache
+from models.engine.file_storage import classes, class_name
+from models.engine.file_storage import secondary_indexes
+from models.engine.file_storage import range_indexes, number, numbers
+from models.engine.file_storage import geo_indexes, text_indexes
+from models.engine.geo import GridIndex, bounds, valid
+from models.engine.geo import KM_PER_DEGREE, HALF_CIRCUMFERENCE
+from models.engine.text import TextIndex, tokenize
+
+
+def terms(text):
+    """
+    Returns the terms of (text) joined and surrounded by spaces
+    (the SQL `terms` function, so a term is found with instr()).
+    """
+    return f" {' '.join(tokenize(text))} "
+
+
+class DBStorage:
+    """
+    Manage the storage of class instances in a SQLite database
+    (one table per class in `classes`).
+
+    The instances are loaded from the database when accessed through
+    all() or get(), and only the instances created, modified or deleted
+    since the last save are written by save().
+
+    Attributes:
+    -   __objects (dict): A dictionary containing the loaded instances.
+    """
+
+    def __init__(self, *, path="hbnb.db"):
+        """
+        Initializes a new DBStorage instance.
+
+        Args:
+        -   path (str): The path to the SQLite database file.
+                (defaults to "hbnb.db")
+        """
+        self.__path = path
+        self.__conn = None
+        self.__objects = {}
+        self.__partitions = {}
+        self.__tables = set()
+        self.__dirty = set()
+        self.__version = 0
+        self.__depth = 0
+        self.__undo = None
+        self.__deferred = False
+
+    def all(self, cls=None):
+        """
+        Returns A dictionary containing all instances
+        (only the instances of cls if given, read from its partition)
+        (loads every table, or the table of cls, on first call).
+
+        Args:
+        -   cls (type | str): The class (or class name) of the instances.
+                (defaults to None)
+
+        Raises:
+        -   TypeError: If cls is neither a class nor a class name.
+        """
+        if cls is not None:
+            cls_name = class_name(cls)
+            if cls_name in classes:
+                self.__load(cls_name)
+            return self.__partitions.setdefault(cls_name, {})
+        for cls_name in classes:
+            self.__load(cls_name)
+        return self.__objects
+
+    def count(self, cls=None):
+        """
+        Returns the number of instances (only the instances of cls
+        if given), counted by the database for the tables that are not
+        loaded (the changes of the current session are taken into
+        account).
+
+        Args:
+        -   cls (type | str): The class (or class name) of the instances.
+                (defaults to None)
+
+        Raises:
+        -   TypeError: If cls is neither a class nor a class name.
+        """
+        if cls is None:
+            return sum(self.__count(cls_name) for cls_name in classes)
+        cls_name = class_name(cls)
+        if cls_name not in classes:
+            return 0
+        return self.__count(cls_name)
+
+    def __count(self, cls_name):
+        """
+        Returns the number of instances of the (cls_name) class.
+        """
+        if cls_name in self.__tables:
+            return len(self.__partitions.get(cls_name, {}))
+        prefix = f"{cls_name}."
+        dirty = [k[len(prefix):] for k in self.__dirty if k.startswith(prefix)]
+        sql = f'SELECT COUNT(*) FROM "{cls_name}"'
+        if dirty:
+            sql += f" WHERE id NOT IN ({', '.join('?' * len(dirty))})"
+        count = self.__connection().execute(sql, dirty).fetchone()[0]
+        return count + sum(prefix + obj_id in self.__objects
+                           for obj_id in dirty)
+
+    @property
+    def version(self):
+        """
+        The version of the session, bumped by every new, modified or
+        deleted instance and every reload (the results computed from
+        the instances hold until it changes).
+        """
+        return self.__version
+
+    def lookup(self, cls, name, value):
+        """
+        Returns the instances of cls whose (name) attribute equals
+        (value), read through the SQL index of the attribute
+        (the changes of the current session are taken into account).
+
+        Args:
+        -   cls (type | str): The class (or class name) of the instances.
+        -   name (str): The attribute, one of the `secondary_indexes`.
+        -   value (any): The attribute value.
+
+        Returns:
+        -   dict: The matching instances by key.
+
+        Raises:
+        -   TypeError: If cls is neither a class nor a class name.
+        -   ValueError: If the attribute isn't indexed.
+        """
+        cls_name = class_name(cls)
+        if name not in secondary_indexes.get(cls_name, ()):
+            raise ValueError(f"{cls_name}.{name} is not indexed")
+        found = self.__select(
+            cls_name, f"json_extract(data, '$.{name}') = ?", (value,)
+        )
+        return {
+            key: obj for key, obj in found.items()
+            if getattr(obj, name, None) == value
+        }
+
+    def ordered(
+        self, cls, name, low=None, high=None, reverse=False, limit=None
+    ):
+        """
+        Returns the instances of cls ordered by their (name) attribute,
+        read through the SQL index of the attribute (the changes of the
+        current session are taken into account, the instances whose
+        value isn't a number are left out).
+
+        Args:
+        -   cls (type | str): The class (or class name) of the instances.
+        -   name (str): The attribute, one of the `range_indexes`.
+        -   low (int | float): The lowest value (included).
+                (defaults to None, no lower bound)
+        -   high (int | float): The highest value (included).
+                (defaults to None, no upper bound)
+        -   reverse (bool): If True, the highest values come first.
+                (defaults to False)
+        -   limit (int): The maximum number of instances (top-k).
+                (defaults to None, no limit)
+
+        Returns:
+        -   list: The matching instances.
+
+        Raises:
+        -   TypeError: If cls is neither a class nor a class name.
+        -   ValueError: If the attribute isn't indexed or if a bound
+                isn't a number.
+        """
+        cls_name = class_name(cls)
+        if name not in range_indexes.get(cls_name, ()):
+            raise ValueError(f"{cls_name}.{name} is not range indexed")
+        low = None if low is None else number(low)
+        high = None if high is None else number(high)
+        expr = self.__number(cls_name, name)
+        where = []
+        params = []
+        for op, bound in ((">=", low), ("<=", high)):
+            if bound is None:
+                continue
+            where.append(f"{expr} {op} ?")
+            params.append(bound)
+        found = self.__select(
+            cls_name, " AND ".join(where), params,
+            order=f"{expr} {'DESC' if reverse else 'ASC'}", limit=limit
+        )
+        entries = []
+        for obj in found.values():
+            value = number(getattr(obj, name, None))
+            if value is None or low is not None and value < low \
+                    or high is not None and value > high:
+                continue
+            entries.append((value, obj))
+        entries.sort(key=lambda entry: entry[0], reverse=reverse)
+        return [obj for _, obj in entries[:limit]]
+
+    def box(self, cls, south, west, north, east):
+        """
+        Returns the instances of cls within a bounding box, read through
+        the SQL index of the latitude (the changes of the current
+        session are taken into account).
+
+        Args:
+        -   cls (type | str): The class (or class name) of the instances.
+        -   south (float): The lowest latitude.
+        -   west (float): The western longitude (greater than east for
+                a box crossing the antimeridian).
+        -   north (float): The highest latitude.
+        -   east (float): The eastern longitude.
+
+        Returns:
+        -   list: The matching instances.
+
+        Raises:
+        -   TypeError: If cls is neither a class nor a class name.
+        -   ValueError: If the class has no geospatial index or if a
+                coordinate isn't a number.
+        """
+        box = numbers(south, west, north, east)
+        grid = self.__grid(class_name(cls), box)
+        return [self.__objects[key] for key in grid.box(*box)]
+
+    def near(self, cls, lat, lon, km=None, k=None):
+        """
+        Returns the instances of cls within (km) of (lat, lon) and/or
+        the (k) nearest ones, nearest first (the searched radius doubles
+        until k instances are found).
+
+        Args:
+        -   cls (type | str): The class (or class name) of the instances.
+        -   lat (float): The latitude of the point.
+        -   lon (float): The longitude of the point.
+        -   km (float): The radius in km.
+                (defaults to None, no radius)
+        -   k (int): The maximum number of instances.
+                (defaults to None, no limit)
+
+        Returns:
+        -   list: The (distance in km, instance) pairs.
+
+        Raises:
+        -   TypeError: If cls is neither a class nor a class name.
+        -   ValueError: If the class has no geospatial index, if neither
+                km nor k is given or if a value isn't a number.
+        """
+        if km is None and k is None:
+            raise ValueError("near() needs a radius (km) or a count (k)")
+        cls_name = class_name(cls)
+        lat, lon = numbers(lat, lon)
+        radius = numbers(km)[0] if k is None else KM_PER_DEGREE
+        while True:
+            grid = self.__grid(cls_name, bounds(lat, lon, radius))
+            found = grid.near(lat, lon, radius)
+            if k is None or len(found) >= k or radius >= HALF_CIRCUMFERENCE:
+                break
+            radius *= 2
+        if k is not None:
+            found = found[:k]
+            if km is not None:
+                found = [(d, key) for d, key in found if d <= numbers(km)[0]]
+        return [(d, self.__objects[key]) for d, key in found]
+
+    def search(self, cls, query, mode="and", limit=None):
+        """
+        Returns the instances of cls whose text attributes hold the
+        terms of (query), best ranked (BM25 among the matching
+        instances) first.
+
+        Args:
+        -   cls (type | str): The class (or class name) of the instances.
+        -   query (str): The searched terms.
+        -   mode (str): "and" to match every term, "or" to match any.
+                (defaults to "and")
+        -   limit (int): The maximum number of instances.
+                (defaults to None, no limit)
+
+        Returns:
+        -   list: The (score, instance) pairs.
+
+        Raises:
+        -   TypeError: If cls is neither a class nor a class name.
+        -   ValueError: If the class has no full-text index or if the
+                mode is unknown.
+        """
+        cls_name = class_name(cls)
+        if cls_name not in text_indexes:
+            raise ValueError(f"{cls_name} has no full-text index")
+        if mode not in ("and", "or"):
+            raise ValueError(f"unknown search mode: {mode}")
+        words = list(dict.fromkeys(tokenize(query)))
+        if not words:
+            return []
+        names = text_indexes[cls_name]
+        document = " || ' ' || ".join(
+            f"COALESCE(json_extract(data, '$.{name}'), '')" for name in names
+        )
+        where = f" {mode.upper()} ".join(
+            [f"instr(terms({document}), ?)"] * len(words)
+        )
+        found = self.__select(
+            cls_name, f"({where})", [f" {word} " for word in words]
+        )
+        index = TextIndex()
+        for key, obj in found.items():
+            values = (getattr(obj, name, None) for name in names)
+            index.add(key, " ".join(str(value) for value in values if value))
+        return [
+            (score, found[key])
+            for score, key in index.search(query, mode, limit)
+        ]
+
+    def __grid(self, cls_name, box):
+        """
+        Returns a geospatial index of the (cls_name) instances within
+        the (south, west, north, east) (box).
+
+        Raises:
+        -   ValueError: If the class has no geospatial index.
+        """
+        if cls_name not in geo_indexes:
+            raise ValueError(f"{cls_name} has no geospatial index")
+        names = geo_indexes[cls_name]
+        lat, lon = (self.__number(cls_name, name) for name in names)
+        south, west, north, east = box
+        where = f"{lat} BETWEEN ? AND ? AND " + (
+            f"{lon} BETWEEN ? AND ?" if west <= east
+            else f"({lon} >= ? OR {lon} <= ?)"
+        )
+        found = self.__select(cls_name, where, (south, north, west, east))
+        grid = GridIndex()
+        for key, obj in found.items():
+            point = [number(getattr(obj, name, None)) for name in names]
+            if valid(*point):
+                grid.add(key, *point)
+        return grid
+
+    def __select(self, cls_name, where, params=(), order="", limit=None):
+        """
+        Returns the instances of the (cls_name) rows matching the SQL
+        (where) clause along with the instances of the class changed in
+        the current session (the callers filter them again).
+
+        Args:
+        -   cls_name (str): The class name.
+        -   where (str): The SQL condition (none if empty).
+        -   params (iterable): The parameters of the condition.
+        -   order (str): The SQL ORDER BY expression (none if empty).
+        -   limit (int): The number of rows needed by the caller.
+                (defaults to None, no limit)
+
+        Returns:
+        -   dict: The instances by key.
+        """
+        dirty = [k for k in self.__dirty if k.startswith(f"{cls_name}.")]
+        sql = f'SELECT id, created_at, updated_at, data FROM "{cls_name}"'
+        params = list(params)
+        if where:
+            sql += f" WHERE {where}"
+        if order:
+            sql += f" ORDER BY {order}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit + len(dirty))
+        found = {}
+        for row in self.__connection().execute(sql, params):
+            key = f"{cls_name}.{row[0]}"
+            if key in self.__dirty:
+                continue
+            if key not in self.__objects:
+                self.__place(key, self.__build(cls_name, row))
+            found[key] = self.__objects[key]
+        for key in dirty:
+            if key in self.__objects:
+                found[key] = self.__objects[key]
+        return found
+
+    @staticmethod
+    def __number(cls_name, name):
+        """
+        Returns the SQL expression of the (name) attribute as a number
+        (the class attribute when missing from the row).
+        """
+        default = number(getattr(classes[cls_name], name, 0)) or 0
+        return (
+            f"CAST(COALESCE(json_extract(data, '$.{name}'), {default}) "
+            f"AS REAL)"
+        )
+
+    def __load(self, cls_name):
+        """
+        Loads the table of the (cls_name) class (once per session).
+        """
+        if cls_name in self.__tables:
+            return
+        rows = self.__connection().execute(
+            f'SELECT id, created_at, updated_at, data FROM "{cls_name}"'
+        )
+        for row in rows:
+            key = f"{cls_name}.{row[0]}"
+            if key not in self.__objects and key not in self.__dirty:
+                self.__place(key, self.__build(cls_name, row))
+        self.__tables.add(cls_name)
+
+    def __place(self, key, obj):
+        """
+        Sets the (key) instance in __objects and in the partition
+        of its class.
+        """
+        self.__objects[key] = obj
+        self.__partitions.setdefault(key.split('.')[0], {})[key] = obj
+
+    def __displace(self, key):
+        """
+        Removes the (key) instance from __objects and from the partition
+        of its class.
+
+        Returns:
+        -   BaseModel: The removed instance (None if not found).
+        """
+        self.__partitions.get(key.split('.')[0], {}).pop(key, None)
+        return self.__objects.pop(key, None)
+
+    def get(self, cls, id):
+        """
+        Retrieves one object (reads only its row).
+
+        Args:
+        -   cls (type | str): The class (or class name) of the object.
+        -   id (str): The object id.
+
+        Returns:
+        -   BaseModel: The object if found, (None) otherwise.
+        """
+        cls_name = cls if type(cls) is str else cls.__name__
+        if cls_name not in classes:
+            return None
+        key = f"{cls_name}.{id}"
+        if key in self.__objects or cls_name in self.__tables \
+                or key in self.__dirty:
+            return self.__objects.get(key)
+        row = self.__connection().execute(
+            f'SELECT id, created_at, updated_at, data '
+            f'FROM "{cls_name}" WHERE id = ?', (id,)
+        ).fetchone()
+        if row is None:
+            return None
+        obj = self.__build(cls_name, row)
+        self.__place(key, obj)
+        return obj
+
+    def new(self, obj):
+        """
+        Adds the obj to the current database session.
+
+        Args:
+        -   obj (BaseModel): The object to be added.
+        """
+        key = f"{obj.__class__.__name__}.{obj.id}"
+        if self.__undo is not None:
+            self.__remember(key, self.__objects.get(key))
+        self.__place(key, obj)
+        self.__dirty.add(key)
+        self.__version += 1
+
+    def new_many(self, objs):
+        """
+        Adds the (objs) to the current database session at once
+        (the version of the session is bumped once).
+
+        Args:
+        -   objs (iterable): The objects to be added.
+        """
+        for obj in objs:
+            key = f"{obj.__class__.__name__}.{obj.id}"
+            if self.__undo is not None:
+                self.__remember(key, self.__objects.get(key))
+            self.__place(key, obj)
+            self.__dirty.add(key)
+        self.__version += 1
+
+    def touch(self, obj):
+        """
+        Flags obj as modified so it is written on the next save
+        (only if obj is in the current session; otherwise, do nothing).
+
+        Args:
+        -   obj (BaseModel): The modified object.
+        """
+        key = f"{obj.__class__.__name__}.{getattr(obj, 'id', None)}"
+        if self.__objects.get(key) is obj:
+            self.__dirty.add(key)
+            self.__version += 1
+            if self.__undo is not None:
+                self.__remember(key, obj)
+
+    def delete(self, obj=None):
+        """
+        Deletes obj from the current database session
+        (removed from the database on the next save).
+
+        Args:
+        -   obj (BaseModel): The object to be deleted.
+        """
+        if obj is None:
+            return
+        key = f"{obj.__class__.__name__}.{obj.id}"
+        if self.__undo is not None and key in self.__objects:
+            self.__remember(key, self.__objects[key])
+        if self.__displace(key) is not None:
+            self.__dirty.add(key)
+            self.__version += 1
+
+    def save(self):
+        """
+        Commits the changes of the current database session
+        (one executemany per class and per statement)
+        (inside a batch the save is deferred to the end of the batch)
+        """
+        if self.__depth:
+            self.__deferred = True
+            return
+        upserts = {}
+        deletes = {}
+        for key in self.__dirty:
+            cls_name, obj_id = key.split('.', 1)
+            obj = self.__objects.get(key)
+            if obj is None:
+                deletes.setdefault(cls_name, []).append((obj_id,))
+                continue
+            data = obj.to_dict()
+            del data["__class__"]
+            row = (
+                data.pop("id"),
+                data.pop("created_at"),
+                data.pop("updated_at"),
+                json.dumps(data),
+            )
+            upserts.setdefault(cls_name, []).append(row)
+
+        conn = self.__connection()
+        with conn:
+            for cls_name, rows in deletes.items():
+                conn.executemany(
+                    f'DELETE FROM "{cls_name}" WHERE id = ?', rows
+                )
+            for cls_name, rows in upserts.items():
+                conn.executemany(
+                    f'INSERT OR REPLACE INTO "{cls_name}" '
+                    f'(id, created_at, updated_at, data) VALUES (?, ?, ?, ?)',
+                    rows
+                )
+        self.__dirty.clear()
+
+    @contextmanager
+    def batch(self):
+        """
+        Coalesces the saves made inside the `with` block into one save
+        on exit. If an exception escapes the block, the changes made
+        inside it are rolled back in memory and nothing is saved.
+        (nested batches are part of the outermost one)
+        """
+        self.__depth += 1
+        if self.__depth == 1:
+            self.__undo = {}
+            self.__deferred = False
+        try:
+            yield self
+        except BaseException:
+            self.__depth -= 1
+            if not self.__depth:
+                self.__rollback()
+            raise
+        self.__depth -= 1
+        if not self.__depth:
+            self.__undo = None
+            if self.__deferred:
+                self.__deferred = False
+                self.save()
+
+    transaction = batch
+
+    def __remember(self, key, obj):
+        """
+        Records the state of the (key) instance before its first change
+        in the current batch.
+
+        Args:
+        -   key (str): The instance key.
+        -   obj (BaseModel): The session instance (None if not in it).
+        """
+        if key not in self.__undo:
+            self.__undo[key] = None if obj is None else (
+                obj, obj.__dict__.copy()
+            )
+
+    def __rollback(self):
+        """
+        Restores the instances changed in the current batch.
+        """
+        undo, self.__undo = self.__undo, None
+        self.__deferred = False
+        self.__version += 1
+        for key, state in undo.items():
+            self.__dirty.add(key)
+            if state is None:
+                self.__displace(key)
+                continue
+            obj, _dict = state
+            obj.__dict__.clear()
+            obj.__dict__.update(_dict)
+            uncache(obj)
+            self.__place(key, obj)
+
+    def reload(self):
+        """
+        Opens the database (creating the missing tables)
+        and starts a new session (the changes not saved are discarded).
+        """
+        if self.__conn is not None:
+            self.__conn.close()
+            self.__conn = None
+        self.__connection()
+        self.__objects = {}
+        self.__partitions = {}
+        self.__tables = set()
+        self.__dirty.clear()
+        self.__version += 1
+
+    def close(self):
+        """
+        Saves the changes of the session and closes the database
+        (the session is kept, the database is reopened on the next
+        access).
+        """
+        if self.__dirty and not self.__depth:
+            self.save()
+        if self.__conn is not None:
+            self.__conn.close()
+            self.__conn = None
+
+    def __connection(self):
+        """
+        Returns the database connection, opened (and the missing
+        tables created) on first use.
+        """
+        if self.__conn is not None:
+            return self.__conn
+        self.__conn = sqlite3.connect(self.__path)
+        self.__conn.create_function("terms", 1, terms, deterministic=True)
+        self.__conn.execute("PRAGMA journal_mode=WAL")
+        self.__conn.execute("PRAGMA synchronous=NORMAL")
+        with self.__conn:
+            for cls_name in classes:
+                self.__conn.execute(
+                    f'CREATE TABLE IF NOT EXISTS "{cls_name}" ('
+                    f'id TEXT PRIMARY KEY, created_at TEXT, '
+                    f'updated_at TEXT, data TEXT NOT NULL)'
+                )
+            for cls_name, names in secondary_indexes.items():
+                for name in names:
+                    self.__conn.execute(
+                        f'CREATE INDEX IF NOT EXISTS "{cls_name}_{name}" '
+                        f'ON "{cls_name}" (json_extract(data, \'$.{name}\'))'
+                    )
+            for cls_name, names in [
+                *range_indexes.items(), *geo_indexes.items()
+            ]:
+                for name in names:
+                    self.__conn.execute(
+                        f'CREATE INDEX IF NOT EXISTS "{cls_name}_{name}" '
+                        f'ON "{cls_name}" ({self.__number(cls_name, name)})'
+                    )
+        return self.__conn
+
+    @staticmethod
+    def __build(cls_name, row):
+        """
+        Builds an instance from its table row.
+
+        Args:
+        -   cls_name (str): The class name.
+        -   row (tuple): The (id, created_at, updated_at, data) row.
+
+        Returns:
+        -   BaseModel: The built instance.
+        """
+        obj_id, created_at, updated_at, data = row
+        kwargs = json.loads(data)
+        kwargs.update(
+            id=obj_id, created_at=created_at, updated_at=updated_at
+        )
+        return classes[cls_name](**kwargs)
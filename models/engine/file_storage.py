@@ -1,13 +1,27 @@
 #!/usr/bin/python3
 """Define the FileStorage class module"""
+import os
 import json
-from models.base_model import BaseModel
+import mmap
+import time
+import atexit
+import threading
+from bisect import bisect_left, bisect_right
+from functools import wraps
+from contextlib import contextmanager
+from models.base_model import BaseModel, mutables, uncache
 from models.amenity import Amenity
 from models.user import User
 from models.city import City
 from models.state import State
 from models.place import Place
 from models.review import Review
+from models.engine.codecs import get_codec
+from models.engine.compression import compressions, open_compressed
+from models.engine.compression import RecordCodec, preset
+from models.engine.columns import ColumnStore
+from models.engine.geo import GridIndex, valid
+from models.engine.text import TextIndex
 
 
 classes = {
@@ -20,25 +34,351 @@ classes = {
     'Review': Review,
 }
 
+secondary_indexes = {
+    'City': ('state_id',),
+    'Place': ('city_id', 'user_id'),
+    'Review': ('place_id', 'user_id'),
+}
+
+range_indexes = {
+    'Place': (
+        'price_by_night', 'number_rooms', 'number_bathrooms', 'max_guest'
+    ),
+}
+
+geo_indexes = {
+    'Place': ('latitude', 'longitude'),
+}
+
+column_indexes = {
+    'Place': (
+        'price_by_night', 'number_rooms', 'number_bathrooms', 'max_guest',
+        'latitude', 'longitude'
+    ),
+}
+
+text_indexes = {
+    'Place': ('name', 'description'),
+    'Review': ('text',),
+}
+
+
+def class_name(cls):
+    """
+    Returns the name of (cls), a class or a class name.
+
+    Raises:
+    -   TypeError: If cls is neither a class nor a class name.
+    """
+    if type(cls) is str:
+        return cls
+    if isinstance(cls, type):
+        return cls.__name__
+    raise TypeError(f"{cls!r} is not a class")
+
+
+def number(value):
+    """
+    Returns (value) as an int or a float (the console stores the
+    updated values as strings), None if it isn't a number.
+    """
+    if type(value) is int or type(value) is float:
+        return None if value != value else value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if value != value else value
+
+
+# The secondary index entry of the values that can't be hashed (e.g. a
+# list set by the console), matched by equality when looked up.
+UNHASHABLE = object()
+
+
+def index_key(value):
+    """
+    Returns (value) as a key of a secondary index (UNHASHABLE if it
+    can't be hashed).
+    """
+    try:
+        hash(value)
+    except TypeError:
+        return UNHASHABLE
+    return value
+
+
+def numbers(*values):
+    """
+    Returns (values) as numbers (see number()).
+
+    Raises:
+    -   ValueError: If a value isn't a number.
+    """
+    converted = tuple(number(value) for value in values)
+    if None in converted:
+        raise ValueError(f"not a number: {values[converted.index(None)]!r}")
+    return converted
+
+
+def _locked(method):
+    """
+    Runs the FileStorage (method) while holding the storage lock
+    (keeps the write-behind thread out of the objects being changed).
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._FileStorage__lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
 
 class FileStorage:
     """
     Manage serialization and deserialization of class instances.
 
+    Only the instances created, modified or deleted since the last save
+    are serialized again, the others are written from their cached
+    encoding.
+
     Attributes:
     -   __file_path (str): The path to the Json file.
     -   __objects (dict): A dictionary containing every class instance.
+    -   __compact_min (int): The minimum number of journal records
+            before the journal is folded back into the JSON file.
+    -   durabilities (tuple): The supported durability levels.
     """
 
     __file_path = "hbnb.json"
     __objects = {}
+    __compact_min = 1000
+    durabilities = ("none", "flush", "fsync-file", "fsync-dir")
+
+    def __init__(
+        self, *, journal=False, sharded=False, lazy=False, indexed=False,
+        write_behind=None, write_behind_changes=1000, durability="flush",
+        codec="json", compression=None
+    ):
+        """
+        Initializes a new FileStorage instance.
 
-    def all(self):
+        Args:
+        -   journal (bool):
+                If True, save() appends the changes made since the last
+                save to a log file next to the JSON file instead of
+                rewriting the whole JSON file.
+                (defaults to False)
+        -   sharded (bool):
+                If True, each class is stored in its own JSON file
+                (hbnb.<class name>.json), save() only rewrites the files
+                of the modified classes and reload() defers loading
+                a file until its class is accessed.
+                (defaults to False)
+        -   lazy (bool):
+                If True, reload() keeps the deserialized dictionaries
+                and only builds an instance from its dictionary when
+                the instance is accessed through all() or get().
+                (defaults to False)
+        -   indexed (bool):
+                If True, the instances are stored one per line
+                (hbnb.jsonl) along with an index of their offsets
+                (hbnb.jsonl.idx), get() reads only the line of
+                the requested instance through mmap and save() appends
+                the modified instances to the file.
+                (defaults to False)
+        -   write_behind (float):
+                If set, save() only queues the write and a background
+                thread writes the files once per window of
+                (write_behind) seconds.
+                (defaults to None)
+        -   write_behind_changes (int):
+                The number of queued changes that ends a write-behind
+                window early.
+                (defaults to 1000)
+        -   durability (str):
+                How far a write is pushed before save() returns:
+                "none" (left to the file object), "flush" (handed to
+                the OS), "fsync-file" (the file is on disk) or
+                "fsync-dir" (the file and its directory entry are on
+                disk). Whole files are always written to a temporary
+                file that then replaces the previous one.
+                (defaults to "flush")
+        -   codec (str | object):
+                The codec of the storage files ("json"), the file
+                extensions follow the codec (e.g. hbnb.pickle).
+                A PickleCodec or MarshalCodec instance can be passed
+                for trusted files.
+                (defaults to "json")
+        -   compression (str):
+                If set, the storage files are streamed through a
+                "gzip", "lzma" or "zlib" compressor (hbnb.json.gz,
+                hbnb.json.xz or hbnb.json.zz); the journal is kept
+                uncompressed. In indexed mode every line is deflated
+                on its own against a preset dictionary stored next to
+                the lines file (hbnb.jsonl.zz, hbnb.jsonl.zz.idx and
+                hbnb.jsonl.zz.zdict).
+                (defaults to None)
+
+        Raises:
+        -   ValueError: If more than one of journal, sharded
+                and indexed are set, or if durability, codec or
+                compression is unknown.
         """
-        Returns A dictionary containing all instances stored in __objects.
+        if journal + sharded + indexed > 1:
+            raise ValueError(
+                "journal, sharded and indexed modes are exclusive"
+            )
+        if durability not in self.durabilities:
+            raise ValueError(f"unknown durability: {durability}")
+        if compression is not None and compression not in compressions:
+            raise ValueError(f"unknown compression: {compression}")
+        self.__durability = durability
+        self.__codec = get_codec(codec)
+        self.__compression = compression
+        self.__root = os.path.splitext(self.__file_path)[0]
+        self.__extension = self.__codec.extension
+        self.__file_path = f"{self.__root}{self.__extension}"
+        self.__journal = journal
+        self.__journal_path = f"{self.__file_path}.log"
+        self.__journal_size = 0
+        self.__sharded = sharded
+        self.__shards = {}
+        self.__unloaded = set()
+        self.__lazy = lazy
+        self.__raw = {}
+        self.__indexed = indexed
+        self.__lines_path = f"{self.__file_path}l"
+        if compression is not None and indexed:
+            # The lines are deflated one by one whatever the compression.
+            self.__lines_path += compressions["zlib"][0]
+        self.__index_path = f"{self.__lines_path}.idx"
+        self.__zdict_path = f"{self.__lines_path}.zdict"
+        self.__text_path = f"{self.__root}.text.json"
+        if compression is not None:
+            self.__extension += compressions[compression][0]
+            self.__file_path = f"{self.__root}{self.__extension}"
+        if compression is not None and indexed:
+            self.__codec = RecordCodec(
+                self.__codec, preset(self.__codec, classes)
+            )
+        self.__index = {}
+        self.__index_log = 0
+        self.__dead = 0
+        self.__map = None
+        self.__partitions = {}
+        self.__partitioned = None
+        self.__secondary = {}
+        self.__secondary_values = {}
+        self.__ranges = {}
+        self.__range_values = {}
+        self.__grids = {}
+        self.__texts = {}
+        self.__columns = {}
+        self.__tracked = set()
+        self.__stale = set()
+        self.__version = 0
+        self.__dirty = set()
+        self.__encoded = {}
+        self.__mutable = set()
+        self.__depth = 0
+        self.__undo = None
+        self.__deferred = False
+        self.__lock = threading.RLock()
+        self.__writing = threading.Lock()
+        self.__wakeup = threading.Condition(self.__lock)
+        self.__window = write_behind
+        self.__max_queued = write_behind_changes
+        self.__queued = []
+        self.__requested = False
+        self.__flusher = None
+        self.__closing = False
+        self.__error = None
+
+    @_locked
+    def all(self, cls=None):
+        """
+        Returns A dictionary containing all instances stored in __objects
+        (only the instances of cls if given, read from its partition).
+
+        Args:
+        -   cls (type | str): The class (or class name) of the instances.
+                (defaults to None)
+
+        Raises:
+        -   TypeError: If cls is neither a class nor a class name.
         """
+        if cls is not None:
+            partition = self.__class_partition(cls)
+            unbuilt = [key for key, obj in partition.items() if obj is None]
+            for key in unbuilt:
+                self.get(*key.split('.', 1))
+            return partition
+        if self.__unloaded:
+            self.__load_shards(list(self.__unloaded))
+        for key in self.__index:
+            if key not in self.__objects:
+                self.__load_line(key)
+        if self.__raw:
+            for key, obj in self.__raw.items():
+                self.__objects[key] = classes[key.split('.')[0]](**obj)
+                self.__place(key, self.__objects[key])
+                self.__watch(key, self.__objects[key])
+            self.__raw.clear()
         return self.__objects
 
+    @_locked
+    def count(self, cls=None):
+        """
+        Returns the number of stored instances
+        (only the instances of cls if given), without building them.
+
+        Args:
+        -   cls (type | str): The class (or class name) of the instances.
+                (defaults to None)
+
+        Raises:
+        -   TypeError: If cls is neither a class nor a class name.
+        """
+        if cls is not None:
+            return len(self.__class_partition(cls))
+        if self.__unloaded:
+            self.__load_shards(list(self.__unloaded))
+        return sum(len(p) for p in self.__partition().values())
+
+    @_locked
+    def get(self, cls, id):
+        """
+        Retrieves one object
+        (loads only the file of its class in sharded mode)
+        (builds only this instance in lazy mode)
+        (reads only the line of this instance in indexed mode).
+
+        Args:
+        -   cls (type | str): The class (or class name) of the object.
+        -   id (str): The object id.
+
+        Returns:
+        -   BaseModel: The object if found, (None) otherwise.
+        """
+        cls_name = cls if type(cls) is str else cls.__name__
+        if cls_name in self.__unloaded:
+            self.__load_shards([cls_name])
+        key = f"{cls_name}.{id}"
+        if key in self.__raw:
+            obj = classes[cls_name](**self.__raw.pop(key))
+            self.__objects[key] = obj
+            self.__place(key, obj)
+            self.__watch(key, obj)
+            return obj
+        if key in self.__index and key not in self.__objects:
+            return self.__load_line(key)
+        return self.__objects.get(key)
+
+    @_locked
     def new(self, obj):
         """
         Sets in __objects the obj with key <obj class name>.id
@@ -46,30 +386,1432 @@ class FileStorage:
         Args:
         -   obj (BaseModel): The object to be added.
         """
-        key = f"{obj.__class__.__name__}.{obj.id}"
+        cls_name = obj.__class__.__name__
+        key = f"{cls_name}.{obj.id}"
+        if self.__undo is not None:
+            self.__remember(key, self.__objects.get(key))
         self.__objects[key] = obj
+        self.__place(key, obj)
+        self.__changed(key)
+        self.__raw.pop(key, None)
+        self.__dirty.add(key)
+        if self.__sharded:
+            self.__shards.setdefault(cls_name, set()).add(key)
+
+    @_locked
+    def new_many(self, objs):
+        """
+        Sets in __objects the (objs) at once, one dictionary update
+        per class (the version of the storage is bumped once).
+
+        Args:
+        -   objs (iterable): The objects to be added.
+        """
+        groups = {}
+        for obj in objs:
+            cls_name = obj.__class__.__name__
+            groups.setdefault(cls_name, {})[f"{cls_name}.{obj.id}"] = obj
+        for cls_name, added in groups.items():
+            if self.__undo is not None:
+                for key in added:
+                    self.__remember(key, self.__objects.get(key))
+            self.__objects.update(added)
+            if self.__partitioned is self.__objects:
+                self.__partitions.setdefault(cls_name, {}).update(added)
+            if cls_name in self.__tracked:
+                self.__stale.update(added)
+            if self.__raw:
+                for key in added:
+                    self.__raw.pop(key, None)
+            self.__dirty.update(added)
+            if self.__sharded:
+                self.__shards.setdefault(cls_name, set()).update(added)
+        self.__version += 1
+
+    @_locked
+    def touch(self, obj):
+        """
+        Flags obj as modified so it is serialized on the next save
+        (only if obj is stored in __objects; otherwise, do nothing).
 
+        Args:
+        -   obj (BaseModel): The modified object.
+        """
+        key = f"{obj.__class__.__name__}.{getattr(obj, 'id', None)}"
+        if self.__objects.get(key) is obj:
+            self.__dirty.add(key)
+            self.__changed(key)
+            if self.__undo is not None:
+                self.__remember(key, obj)
+
+    @property
+    @_locked
+    def version(self):
+        """
+        The version of the stored instances, bumped by every new,
+        modified or deleted instance and every reload (the results
+        computed from the instances hold until it changes).
+        """
+        self.__partition()
+        return self.__version
+
+    @_locked
+    def lookup(self, cls, name, value):
+        """
+        Returns the instances of cls whose (name) attribute equals
+        (value), read from the secondary index of the attribute
+        (built on the first lookup of the class, then kept up to date).
+
+        Args:
+        -   cls (type | str): The class (or class name) of the instances.
+        -   name (str): The attribute, one of the `secondary_indexes`.
+        -   value (any): The attribute value.
+
+        Returns:
+        -   dict: The matching instances by key.
+
+        Raises:
+        -   TypeError: If cls is neither a class nor a class name.
+        -   ValueError: If the attribute isn't indexed.
+        """
+        cls_name = class_name(cls)
+        if name not in secondary_indexes.get(cls_name, ()):
+            raise ValueError(f"{cls_name}.{name} is not indexed")
+        partition = self.__class_partition(cls_name)
+        if cls_name not in self.__secondary:
+            self.__secondary[cls_name] = {
+                attr: {} for attr in secondary_indexes[cls_name]
+            }
+            self.__track(cls_name, partition)
+        self.__refresh()
+        keys = self.__secondary[cls_name][name].get(index_key(value), ())
+        found = {key: self.get(*key.split('.', 1)) for key in keys}
+        if index_key(value) is UNHASHABLE:
+            found = {
+                key: obj for key, obj in found.items()
+                if getattr(obj, name, None) == value
+            }
+        return found
+
+    @_locked
+    def box(self, cls, south, west, north, east):
+        """
+        Returns the instances of cls within a bounding box, read from
+        the geospatial index of the class.
+
+        Args:
+        -   cls (type | str): The class (or class name) of the instances.
+        -   south (float): The lowest latitude.
+        -   west (float): The western longitude (greater than east for
+                a box crossing the antimeridian).
+        -   north (float): The highest latitude.
+        -   east (float): The eastern longitude.
+
+        Returns:
+        -   list: The matching instances.
+
+        Raises:
+        -   TypeError: If cls is neither a class nor a class name.
+        -   ValueError: If the class has no geospatial index or if a
+                coordinate isn't a number.
+        """
+        coordinates = numbers(south, west, north, east)
+        keys = self.__grid(cls).box(*coordinates)
+        return [self.get(*key.split('.', 1)) for key in keys]
+
+    @_locked
+    def near(self, cls, lat, lon, km=None, k=None):
+        """
+        Returns the instances of cls within (km) of (lat, lon) and/or
+        the (k) nearest ones, nearest first, read from the geospatial
+        index of the class.
+
+        Args:
+        -   cls (type | str): The class (or class name) of the instances.
+        -   lat (float): The latitude of the point.
+        -   lon (float): The longitude of the point.
+        -   km (float): The radius in km.
+                (defaults to None, no radius)
+        -   k (int): The maximum number of instances.
+                (defaults to None, no limit)
+
+        Returns:
+        -   list: The (distance in km, instance) pairs.
+
+        Raises:
+        -   TypeError: If cls is neither a class nor a class name.
+        -   ValueError: If the class has no geospatial index, if neither
+                km nor k is given or if a value isn't a number.
+        """
+        if km is None and k is None:
+            raise ValueError("near() needs a radius (km) or a count (k)")
+        lat, lon = numbers(lat, lon)
+        grid = self.__grid(cls)
+        if k is None:
+            found = grid.near(lat, lon, numbers(km)[0])
+        else:
+            found = grid.nearest(lat, lon, k)
+            if km is not None:
+                km = numbers(km)[0]
+                found = [(d, key) for d, key in found if d <= km]
+        return [(d, self.get(*key.split('.', 1))) for d, key in found]
+
+    @_locked
+    def search(self, cls, query, mode="and", limit=None):
+        """
+        Returns the instances of cls whose text attributes hold the
+        terms of (query), best ranked (BM25) first, read from the
+        full-text index of the class.
+
+        Args:
+        -   cls (type | str): The class (or class name) of the instances.
+        -   query (str): The searched terms.
+        -   mode (str): "and" to match every term, "or" to match any.
+                (defaults to "and")
+        -   limit (int): The maximum number of instances.
+                (defaults to None, no limit)
+
+        Returns:
+        -   list: The (score, instance) pairs.
+
+        Raises:
+        -   TypeError: If cls is neither a class nor a class name.
+        -   ValueError: If the class has no full-text index or if the
+                mode is unknown.
+        """
+        cls_name = class_name(cls)
+        if cls_name not in text_indexes:
+            raise ValueError(f"{cls_name} has no full-text index")
+        partition = self.__class_partition(cls_name)
+        if cls_name not in self.__texts:
+            self.__texts[cls_name] = TextIndex()
+            self.__track(cls_name, partition)
+        self.__refresh()
+        found = self.__texts[cls_name].search(query, mode, limit)
+        return [(score, self.get(*key.split('.', 1))) for score, key in found]
+
+    @_locked
+    def columns(self, cls):
+        """
+        Returns the up to date columnar store of the numeric attributes
+        of cls (see ColumnStore), to filter and aggregate them without
+        reading the instances, e.g. the mean price by city:
+        `storage.columns("Place").aggregate("mean", "price_by_night",
+        by="city_id")`.
+
+        Args:
+        -   cls (type | str): The class (or class name) of the instances.
+
+        Returns:
+        -   ColumnStore: The columns of the `column_indexes` of the class,
+                grouped by its `secondary_indexes`.
+
+        Raises:
+        -   TypeError: If cls is neither a class nor a class name.
+        -   ValueError: If the class has no columnar store.
+        """
+        cls_name = class_name(cls)
+        if cls_name not in column_indexes:
+            raise ValueError(f"{cls_name} has no columnar store")
+        partition = self.__class_partition(cls_name)
+        if cls_name not in self.__columns:
+            self.__build_columns(cls_name, partition)
+        self.__refresh()
+        return self.__columns[cls_name]
+
+    @_locked
+    def ordered(
+        self, cls, name, low=None, high=None, reverse=False, limit=None
+    ):
+        """
+        Returns the instances of cls ordered by their (name) attribute,
+        read from the sorted index of the attribute (the values are
+        compared as numbers, the instances whose value isn't a number
+        are left out).
+
+        Args:
+        -   cls (type | str): The class (or class name) of the instances.
+        -   name (str): The attribute, one of the `range_indexes`.
+        -   low (int | float): The lowest value (included).
+                (defaults to None, no lower bound)
+        -   high (int | float): The highest value (included).
+                (defaults to None, no upper bound)
+        -   reverse (bool): If True, the highest values come first.
+                (defaults to False)
+        -   limit (int): The maximum number of instances (top-k).
+                (defaults to None, no limit)
+
+        Returns:
+        -   list: The matching instances.
+
+        Raises:
+        -   TypeError: If cls is neither a class nor a class name.
+        -   ValueError: If the attribute isn't indexed or if a bound
+                isn't a number.
+        """
+        cls_name = class_name(cls)
+        if name not in range_indexes.get(cls_name, ()):
+            raise ValueError(f"{cls_name}.{name} is not range indexed")
+        if None in [number(v) for v in (low, high) if v is not None]:
+            raise ValueError(f"invalid bounds: {low!r}, {high!r}")
+        partition = self.__class_partition(cls_name)
+        if cls_name not in self.__ranges:
+            self.__build_ranges(cls_name, partition)
+        self.__refresh()
+        values, keys = self.__ranges[cls_name][name]
+        start = 0 if low is None else bisect_left(values, number(low))
+        end = len(values) if high is None \
+            else bisect_right(values, number(high))
+        if reverse:
+            start, end = len(keys) - end, len(keys) - start
+            keys = keys[::-1]
+        if limit is not None:
+            end = min(end, start + limit)
+        return [self.get(*key.split('.', 1)) for key in keys[start:end]]
+
+    @_locked
+    def delete(self, obj=None):
+        """
+        Deletes obj from __objects if it's inside (nothing otherwise).
+
+        Args:
+        -   obj (BaseModel): The object to be deleted.
+        """
+        if obj is None:
+            return
+        cls_name = obj.__class__.__name__
+        key = f"{cls_name}.{obj.id}"
+        if self.__undo is not None and key in self.__objects:
+            self.__remember(key, self.__objects[key])
+        if self.__objects.pop(key, None) is not None:
+            self.__displace(key)
+            self.__changed(key)
+            self.__dirty.add(key)
+            self.__shards.get(cls_name, set()).discard(key)
+            self.__dead += self.__index.pop(key, (0, 0))[1]
+
+    @_locked
     def save(self):
         """
         Serializes __objects to the JSON file (path: __file_path)
+        (in journal mode only the changes are appended to the journal)
+        (in sharded mode only the files of the modified classes are written)
+        (in indexed mode only the modified instances are appended)
+        (inside a batch the save is deferred to the end of the batch)
+        (in write-behind mode the write is queued to the background thread)
+
+        Raises:
+        -   OSError: If the last write-behind write failed.
+        """
+        if self.__depth:
+            self.__deferred = True
+            return
+        dirty = self.__encode()
+        if self.__window is None:
+            self.__run(self.__write(dirty))
+            return
+
+        if self.__error is not None:
+            error, self.__error = self.__error, None
+            raise error
+        self.__queued.extend(dirty)
+        self.__requested = True
+        if self.__flusher is None:
+            self.__closing = False
+            self.__flusher = threading.Thread(
+                target=self.__flush_loop, name="FileStorage", daemon=True
+            )
+            self.__flusher.start()
+            atexit.register(self.close)
+        self.__wakeup.notify()
+
+    def flush(self):
+        """
+        Writes the saves queued to the write-behind thread now
+        (if any; otherwise, do nothing). Only the snapshot of the
+        queued instances is taken with the storage lock held, the
+        files are written and synced without it.
+        """
+        with self.__lock:
+            if not self.__requested:
+                return
+            dirty = list(dict.fromkeys(self.__queued))
+            self.__queued = []
+            self.__requested = False
+            self.__writing.acquire()
+            try:
+                write = self.__write(dirty)
+            except BaseException:
+                self.__writing.release()
+                self.__queued[:0] = dirty
+                self.__requested = True
+                raise
+        try:
+            write()
+        except BaseException:
+            with self.__lock:
+                self.__queued[:0] = dirty
+                self.__requested = True
+            raise
+        finally:
+            self.__writing.release()
+
+    def close(self):
+        """
+        Writes the queued saves, stops the write-behind thread,
+        folds the changes appended to the index of the lines file
+        and saves the full-text indexes.
+        """
+        with self.__wakeup:
+            self.__closing = True
+            self.__wakeup.notify()
+            flusher, self.__flusher = self.__flusher, None
+        if flusher is not None:
+            flusher.join()
+            atexit.unregister(self.close)
+        self.flush()
+        with self.__lock:
+            if self.__index_log:
+                self.__save_index()
+        self.__save_text()
+
+    def __flush_loop(self):
+        """
+        Runs the write-behind thread: waits for a queued save, lets more
+        saves join it for one window, then writes them all at once
+        (without holding the storage lock, see flush()).
+        """
+        while True:
+            with self.__wakeup:
+                while not self.__requested and not self.__closing:
+                    self.__wakeup.wait()
+                deadline = time.monotonic() + self.__window
+                while (
+                    not self.__closing
+                    and len(self.__queued) < self.__max_queued
+                ):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.__wakeup.wait(remaining)
+            try:
+                self.flush()
+            except Exception as e:
+                with self.__lock:
+                    self.__error = e
+            with self.__lock:
+                if self.__closing:
+                    return
+
+    def __write(self, dirty):
+        """
+        Snapshots the write of the (dirty) instances to the storage
+        files (see __run()).
+
+        Args:
+        -   dirty (list): The keys of the instances changed since
+                the last write (already encoded).
+
+        Returns:
+        -   function: The write of the files.
+        """
+        if self.__sharded:
+            return self.__save_shards({key.split('.')[0] for key in dirty})
+        if self.__indexed:
+            return self.__save_lines(dirty)
+        if self.__journal:
+            return self.__append(dirty)
+        return self.__write_file()
+
+    def __run(self, write):
+        """
+        Runs the (write) of the files returned by a snapshot, one write
+        at a time (the snapshots are taken with the storage lock held,
+        the writes only need it when run from a locked method).
+        """
+        with self.__writing:
+            write()
+
+    def __append(self, dirty):
+        """
+        Snapshots one journal record per (dirty) instance (or the
+        rewrite of the JSON file once the journal grows too long).
+
+        Returns:
+        -   function: Appends the records to the journal (a failed
+                write is cut back off the journal).
+        """
+        records = [(key, self.__encoded.get(key)) for key in dirty]
+        self.__journal_size += len(dirty)
+        if self.__journal_size > max(self.__compact_min, len(self.__objects)):
+            return self.__write_file()
+
+        def write():
+            with open(self.__journal_path, 'ab') as f:
+                start = f.tell()
+                try:
+                    for key, data in records:
+                        self.__codec.append(f, key, data)
+                    self.__sync(f)
+                except BaseException:
+                    f.truncate(start)
+                    raise
+        return write
+
+    @contextmanager
+    def batch(self):
+        """
+        Coalesces the saves made inside the `with` block into one save
+        on exit. If an exception escapes the block, the changes made
+        inside it are rolled back in memory and nothing is saved.
+        (nested batches are part of the outermost one)
+
+        Example:
+
+        >>>> with storage.batch():
+        ....     for name in ("Cairo", "Giza"):
+        ....         City(name=name).save()
+        """
+        self.__depth += 1
+        if self.__depth == 1:
+            self.__undo = {}
+            self.__deferred = False
+        try:
+            yield self
+        except BaseException:
+            self.__depth -= 1
+            if not self.__depth:
+                self.__rollback()
+            raise
+        self.__depth -= 1
+        if not self.__depth:
+            self.__undo = None
+            if self.__deferred:
+                self.__deferred = False
+                self.save()
+
+    transaction = batch
+
+    def __remember(self, key, obj):
+        """
+        Records the state of the (key) instance before its first change
+        in the current batch.
+
+        Args:
+        -   key (str): The instance key.
+        -   obj (BaseModel): The stored instance (None if not stored).
+        """
+        if key not in self.__undo:
+            self.__undo[key] = None if obj is None else (
+                obj, obj.__dict__.copy()
+            )
+
+    @_locked
+    def __rollback(self):
+        """
+        Restores the instances changed in the current batch.
+        """
+        undo, self.__undo = self.__undo, None
+        self.__deferred = False
+        for key, state in undo.items():
+            self.__dirty.add(key)
+            self.__changed(key)
+            cls_name = key.split('.')[0]
+            if state is None:
+                self.__objects.pop(key, None)
+                self.__displace(key)
+                self.__shards.get(cls_name, set()).discard(key)
+                continue
+            obj, _dict = state
+            obj.__dict__.clear()
+            obj.__dict__.update(_dict)
+            uncache(obj)
+            self.__objects[key] = obj
+            self.__place(key, obj)
+            if self.__sharded:
+                self.__shards.setdefault(cls_name, set()).add(key)
+
+    @_locked
+    def compact(self):
+        """
+        Rewrites the JSON file from __objects and discards the journal
+        (in sharded mode rewrites every class file)
+        (in indexed mode rewrites the lines file without the stale lines)
+        (then saves the full-text indexes).
+        """
+        self.__encode()
+        if self.__sharded:
+            names = {*self.__shards, *self.__unloaded}
+            self.__run(self.__save_shards(names))
+        elif self.__indexed:
+            self.__compact_lines()
+        else:
+            self.__run(self.__write_file())
+        self.__save_text()
+
+    @_locked
+    def __save_text(self):
+        """
+        Writes the built full-text indexes next to the storage files
+        (hbnb.text.json) along with the size and modification time of
+        the storage files, so reload() only reuses them if the files
+        didn't change since. The instances changed but not written yet
+        are listed as stale.
+        """
+        if not self.__texts or self.__partitioned is not self.__objects:
+            return
+        stale = {*self.__stale, *self.__dirty, *self.__queued}
+        saved = {
+            "files": self.__fingerprint(),
+            "indexes": {
+                cls_name: index.dump()
+                for cls_name, index in self.__texts.items()
+            },
+            "stale": sorted(
+                key for key in stale if key.split('.')[0] in self.__texts
+            ),
+        }
+        with self.__replacing(self.__text_path) as f:
+            json.dump(saved, f)
+
+    def __reload_text(self):
+        """
+        Reuses the saved full-text indexes (if the storage files didn't
+        change since they were saved; otherwise, they are rebuilt on
+        the first search).
+        """
+        try:
+            with open(self.__text_path) as f:
+                saved = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if saved.get("files") != self.__fingerprint():
+            return
+        self.__partition()
+        for cls_name, data in saved["indexes"].items():
+            self.__texts[cls_name] = TextIndex.load(data)
+            self.__tracked.add(cls_name)
+        self.__stale.update(saved["stale"])
+
+    def __fingerprint(self):
+        """
+        Returns the [size, modification time] of the storage files
+        by path (None for a missing file).
+        """
+        if self.__sharded:
+            paths = [self.__shard_path(name) for name in classes]
+        elif self.__indexed:
+            paths = [self.__lines_path, self.__index_path]
+        else:
+            paths = [self.__file_path, self.__journal_path]
+        files = {}
+        for path in paths:
+            try:
+                st = os.stat(path)
+                files[path] = [st.st_size, st.st_mtime_ns]
+            except FileNotFoundError:
+                files[path] = None
+        return files
+
+    def __write_file(self):
+        """
+        Snapshots the encodings of every instance.
+
+        Returns:
+        -   function: Rewrites the JSON file and discards the journal.
+        """
+        encoded = self.__encoded
+        if self.__raw or encoded.keys() != self.__objects.keys():
+            keys = [*self.__objects, *self.__raw]
+            self.__encoded = {k: encoded[k] for k in keys if k in encoded}
+            self.__cache(keys)
+        items = self.__encoded.copy()
+        self.__journal_size = 0
+
+        def write():
+            self.__dump(self.__file_path, items.items())
+            if os.path.exists(self.__journal_path):
+                os.remove(self.__journal_path)
+        return write
+
+    def __save_lines(self, dirty):
+        """
+        Appends the (dirty) instances to the lines file
+        and their new positions to the index (with the storage lock
+        held: the readers of the lines follow the index).
+
+        Returns:
+        -   function: Nothing left to write.
+        """
+        changes = {}
+        with open(self.__lines_path, 'ab') as f:
+            offset = f.tell()
+            for key in dirty:
+                self.__dead += self.__index.pop(key, (0, 0))[1]
+                changes[key] = None
+                data = self.__encoded.get(key)
+                if data is None:
+                    continue
+                line = data + self.__codec.separator
+                f.write(line)
+                self.__index[key] = changes[key] = (offset, len(line))
+                offset += len(line)
+            self.__sync(f)
+        self.__close_map()
+
+        if self.__dead > max(self.__compact_min, offset // 2):
+            self.__compact_lines()
+        else:
+            self.__append_index(changes)
+        return lambda: None
+
+    def __compact_lines(self):
+        """
+        Rewrites the lines file with the current line of every instance.
+
+        The new lines and their index are both written next to the
+        current files (.new) before either is switched, so a crash leaves
+        a pair that __recover_lines() can complete or drop.
+        """
+        keys = [*self.__objects, *self.__raw]
+        keys += [key for key in self.__index if key not in self.__objects]
+        lines_path = f"{self.__lines_path}.new"
+        index_path = f"{self.__index_path}.new"
+        index = {}
+        offset = 0
+        try:
+            with open(lines_path, 'wb') as f:
+                for key in keys:
+                    if key in self.__objects or key in self.__raw:
+                        line = self.__cache([key])[key]
+                        line += self.__codec.separator
+                    else:
+                        line = self.__read_line(key)
+                    f.write(line)
+                    index[key] = (offset, len(line))
+                    offset += len(line)
+                self.__sync(f)
+            self.__save_zdict()
+            with self.__replacing(index_path) as f:
+                json.dump(index, f)
+                f.write("\n")
+        except BaseException:
+            for path in (lines_path, index_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            raise
+        self.__close_map()
+        # From here on the new index is the one to follow.
+        os.replace(lines_path, self.__lines_path)
+        self.__index = index
+        self.__dead = 0
+        self.__index_log = 0
+        if self.__durability == "fsync-dir":
+            self.__sync_dir(self.__lines_path)
+        os.replace(index_path, self.__index_path)
+        if self.__durability == "fsync-dir":
+            self.__sync_dir(self.__index_path)
+
+    def __recover_lines(self):
+        """
+        Completes or drops a compaction of the lines file interrupted by
+        a crash: the new lines file is only switched once its index is
+        fully written, so a remaining new lines file means the previous
+        pair is intact, while a remaining new index alone belongs to the
+        switched lines file.
+        """
+        lines_path = f"{self.__lines_path}.new"
+        index_path = f"{self.__index_path}.new"
+        if os.path.exists(lines_path):
+            os.remove(lines_path)
+            if os.path.exists(index_path):
+                os.remove(index_path)
+        elif os.path.exists(index_path):
+            os.replace(index_path, self.__index_path)
+
+    def __save_index(self):
+        """
+        Rewrites the index of the lines file (one JSON object holding
+        the position of every line).
+        """
+        self.__save_zdict()
+        with self.__replacing(self.__index_path) as f:
+            json.dump(self.__index, f)
+            f.write("\n")
+        self.__index_log = 0
+
+    def __append_index(self, changes):
+        """
+        Appends the (changes) to the index of the lines file (one JSON
+        object per save, None for a removed line), the index is
+        rewritten once the appended changes outnumber its entries.
+        """
+        if not os.path.exists(self.__index_path):
+            self.__save_index()
+            return
+        self.__save_zdict()
+        with open(self.__index_path, 'a') as f:
+            f.write(json.dumps(changes) + "\n")
+            self.__sync(f)
+        self.__index_log += len(changes)
+        if self.__index_log > max(self.__compact_min, len(self.__index)):
+            self.__save_index()
+
+    def __save_zdict(self):
+        """
+        Writes the preset dictionary of the compressed lines
+        (if missing).
+        """
+        if self.__compression is not None and self.__indexed \
+                and not os.path.exists(self.__zdict_path):
+            with self.__replacing(self.__zdict_path, 'wb') as f:
+                f.write(self.__codec.zdict)
+
+    def __read_line(self, key):
+        """
+        Reads the line of the (key) instance through mmap.
+
+        Returns:
+        -   bytes: The line (with its trailing separator).
+        """
+        if self.__map is None:
+            with open(self.__lines_path, 'rb') as f:
+                self.__map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        offset, length = self.__index[key]
+        return self.__map[offset:offset + length]
+
+    def __load_line(self, key):
+        """
+        Builds the (key) instance from its line.
+
+        Returns:
+        -   BaseModel: The built instance.
+        """
+        data = self.__read_line(key)
+        data = data[:len(data) - len(self.__codec.separator)]
+        obj = classes[key.split('.')[0]](**self.__codec.decode(data))
+        self.__objects[key] = obj
+        self.__place(key, obj)
+        self.__encoded[key] = data
+        self.__watch(key, obj)
+        return obj
+
+    def __class_partition(self, cls):
+        """
+        Returns the partition of the (cls) class
+        (loads the file of the class first in sharded mode).
+
+        Raises:
+        -   TypeError: If cls is neither a class nor a class name.
+        """
+        cls_name = class_name(cls)
+        if cls_name in self.__unloaded:
+            self.__load_shards([cls_name])
+        return self.__partition().setdefault(cls_name, {})
+
+    def __partition(self):
+        """
+        Returns the instances partitioned by class name
+        ({<class name>: {<key>: <instance>}}, None for an instance
+        that isn't built yet), rebuilt if __objects was replaced.
+        """
+        if self.__partitioned is not self.__objects:
+            self.__partitions = {}
+            self.__partitioned = self.__objects
+            self.__version += 1
+            self.__secondary = {}
+            self.__secondary_values = {}
+            self.__ranges = {}
+            self.__range_values = {}
+            self.__grids = {}
+            self.__texts = {}
+            self.__columns = {}
+            self.__tracked = set()
+            self.__stale = set()
+            for key in [*self.__index, *self.__raw]:
+                self.__place(key, None)
+            for key, obj in self.__objects.items():
+                self.__place(key, obj)
+        return self.__partitions
+
+    def __place(self, key, obj):
+        """
+        Sets the (key) instance in the partition of its class
+        (None if the instance isn't built yet).
+        """
+        if self.__partitioned is self.__objects:
+            cls_name = key.split('.')[0]
+            self.__partitions.setdefault(cls_name, {})[key] = obj
+
+    def __displace(self, key):
+        """
+        Removes the (key) instance from the partition of its class.
+        """
+        if self.__partitioned is self.__objects:
+            cls_name = key.split('.')[0]
+            self.__partitions.get(cls_name, {}).pop(key, None)
+
+    def __changed(self, key):
+        """
+        Marks the (key) instance stale in the indexes of its class
+        (if any), so it is moved on the next refresh, and bumps the
+        version of the storage.
+        """
+        self.__version += 1
+        if key.split('.')[0] in self.__tracked:
+            self.__stale.add(key)
+
+    def __track(self, cls_name, partition):
+        """
+        Starts tracking the changes of the (cls_name) instances
+        (all of them are indexed on the next refresh).
+        """
+        self.__tracked.add(cls_name)
+        self.__stale.update(partition)
+
+    def __refresh(self):
+        """
+        Moves the stale (new, modified or deleted) instances to the
+        entries of their current values in the secondary, sorted,
+        geospatial and full-text indexes and the columnar stores.
+        """
+        for key in list(self.__stale):
+            cls_name = key.split('.')[0]
+            if cls_name in self.__secondary:
+                self.__refresh_secondary(key, cls_name)
+            if cls_name in self.__ranges:
+                self.__refresh_ranges(key, cls_name)
+            if cls_name in self.__grids:
+                self.__refresh_grid(key, cls_name)
+            if cls_name in self.__texts:
+                self.__refresh_text(key, cls_name)
+            if cls_name in self.__columns:
+                self.__refresh_columns(key, cls_name)
+            # Only dropped once refreshed: a failure keeps the rest stale.
+            self.__stale.discard(key)
+
+    def __refresh_secondary(self, key, cls_name):
         """
-        with open(self.__file_path, 'w') as f:
-            _dict = {k: v.to_dict() for k, v in self.__objects.items()}
-            json.dump(_dict, f)
+        Moves the (key) instance in the secondary indexes of its class
+        (the values that can't be hashed share the UNHASHABLE entry).
+        """
+        index = self.__secondary[cls_name]
+        names = secondary_indexes[cls_name]
+        old = self.__secondary_values.pop(key, ())
+        for name, value in zip(names, old):
+            keys = index[name][value]
+            keys.discard(key)
+            if not keys:
+                del index[name][value]
+        values = self.__values(key, names)
+        if values is None:
+            return
+        values = tuple(index_key(value) for value in values)
+        self.__secondary_values[key] = values
+        for name, value in zip(names, values):
+            index[name].setdefault(value, set()).add(key)
+
+    def __refresh_grid(self, key, cls_name):
+        """
+        Moves the (key) instance in the geospatial index of its class
+        (left out if its coordinates aren't valid).
+        """
+        grid = self.__grids[cls_name]
+        grid.remove(key)
+        values = self.__values(key, geo_indexes[cls_name])
+        if values is None:
+            return
+        lat, lon = (number(value) for value in values)
+        if valid(lat, lon):
+            grid.add(key, lat, lon)
 
+    def __refresh_text(self, key, cls_name):
+        """
+        Re-indexes the (key) instance in the full-text index of its class
+        (its document is the text of its indexed attributes).
+        """
+        if cls_name in self.__unloaded:
+            self.__load_shards([cls_name])
+        values = self.__values(key, text_indexes[cls_name])
+        if values is None:
+            self.__texts[cls_name].remove(key)
+            return
+        self.__texts[cls_name].add(
+            key, " ".join(str(value) for value in values if value)
+        )
+
+    def __build_columns(self, cls_name, partition):
+        """
+        Builds the columnar store of the (cls_name) class from its
+        (partition) in one pass.
+        """
+        store = ColumnStore(
+            column_indexes[cls_name], secondary_indexes.get(cls_name, ())
+        )
+        for key in partition:
+            self.__store_columns(store, key)
+        self.__columns[cls_name] = store
+        self.__tracked.add(cls_name)
+
+    def __refresh_columns(self, key, cls_name):
+        """
+        Moves the (key) instance in the columnar store of its class
+        (its numbers and its secondary indexed attributes to group by).
+        """
+        self.__store_columns(self.__columns[cls_name], key)
+
+    def __store_columns(self, store, key):
+        """
+        Sets the row of the (key) instance in (store)
+        (removed if the instance isn't stored).
+        """
+        values = self.__values(key, store.names + store.groups)
+        if values is None:
+            store.remove(key)
+            return
+        count = len(store.names)
+        store.set(
+            key,
+            [number(value) for value in values[:count]],
+            [value if type(value) is str else None
+             for value in values[count:]],
+        )
+
+    def __grid(self, cls):
+        """
+        Returns the up to date geospatial index of the (cls) class.
+
+        Raises:
+        -   TypeError: If cls is neither a class nor a class name.
+        -   ValueError: If the class has no geospatial index.
+        """
+        cls_name = class_name(cls)
+        if cls_name not in geo_indexes:
+            raise ValueError(f"{cls_name} has no geospatial index")
+        partition = self.__class_partition(cls_name)
+        if cls_name not in self.__grids:
+            self.__grids[cls_name] = GridIndex()
+            self.__track(cls_name, partition)
+        self.__refresh()
+        return self.__grids[cls_name]
+
+    def __build_ranges(self, cls_name, partition):
+        """
+        Builds the sorted indexes of the (cls_name) class from its
+        (partition) with one sort per attribute.
+        """
+        names = range_indexes[cls_name]
+        columns = {name: [] for name in names}
+        for key in partition:
+            values = self.__values(key, names)
+            if values is None:
+                continue
+            values = tuple(number(value) for value in values)
+            self.__range_values[key] = values
+            for name, value in zip(names, values):
+                if value is not None:
+                    columns[name].append((value, key))
+        self.__ranges[cls_name] = {}
+        for name, entries in columns.items():
+            entries.sort(key=lambda entry: entry[0])
+            self.__ranges[cls_name][name] = (
+                [value for value, _ in entries], [key for _, key in entries]
+            )
+        self.__tracked.add(cls_name)
+
+    def __refresh_ranges(self, key, cls_name):
+        """
+        Moves the (key) instance in the sorted indexes of its class
+        (a pair of aligned lists: the sorted values and their keys).
+        """
+        ranges = self.__ranges[cls_name]
+        names = range_indexes[cls_name]
+        old = self.__range_values.pop(key, ())
+        for name, value in zip(names, old):
+            if value is None:
+                continue
+            values, keys = ranges[name]
+            i = keys.index(key, bisect_left(values, value),
+                           bisect_right(values, value))
+            del values[i]
+            del keys[i]
+        values = self.__values(key, names)
+        if values is None:
+            return
+        values = tuple(number(value) for value in values)
+        self.__range_values[key] = values
+        for name, value in zip(names, values):
+            if value is None:
+                continue
+            i = bisect_right(ranges[name][0], value)
+            ranges[name][0].insert(i, value)
+            ranges[name][1].insert(i, key)
+
+    def __values(self, key, names):
+        """
+        Returns the (names) attribute values of the (key) instance
+        (read from its dictionary if not built yet in lazy mode)
+        or None if the instance isn't stored.
+        """
+        obj = self.__objects.get(key)
+        if obj is None and key in self.__raw:
+            cls = classes[key.split('.')[0]]
+            return tuple(
+                self.__raw[key].get(name, getattr(cls, name, None))
+                for name in names
+            )
+        if obj is None and key in self.__index:
+            obj = self.__load_line(key)
+        if obj is None:
+            return None
+        return tuple(getattr(obj, name, None) for name in names)
+
+    def __close_map(self):
+        """
+        Releases the mmap of the lines file (if any).
+        """
+        if self.__map is not None:
+            self.__map.close()
+            self.__map = None
+
+    def __save_shards(self, names):
+        """
+        Snapshots the instances of the (names) classes.
+
+        Returns:
+        -   function: Rewrites the files of the classes.
+        """
+        self.__load_shards([name for name in names if name in self.__unloaded])
+        files = []
+        for cls_name in names:
+            keys = self.__shards.get(cls_name, set())
+            keys.difference_update([
+                k for k in keys
+                if k not in self.__objects and k not in self.__raw
+            ])
+            files.append((self.__shard_path(cls_name), self.__items(keys)))
+
+        def write():
+            for path, items in files:
+                self.__dump(path, items)
+        return write
+
+    def __shard_path(self, cls_name):
+        """
+        Returns the path to the JSON file of the (cls_name) class.
+        """
+        return f"{self.__root}.{cls_name}{self.__extension}"
+
+    def __items(self, keys):
+        """
+        Returns the (key, cached encoding) pairs of the instances (keys)
+        (encoded first if missing).
+        """
+        encoded = self.__cache(keys)
+        return [(key, encoded[key]) for key in keys]
+
+    def __dump(self, path, items):
+        """
+        Writes the encoded instances to the storage file (path).
+
+        Args:
+        -   path (str): The path to the storage file.
+        -   items (iterable): The (key, encoding) pairs of the instances.
+        """
+        with self.__replacing(path, 'wb') as f:
+            if self.__compression is None:
+                self.__codec.dump(f, items)
+            else:
+                with open_compressed(f, self.__compression, 'wb') as z:
+                    self.__codec.dump(z, items)
+
+    def __load(self, path):
+        """
+        Reads the records of the storage file (path)
+        (streamed through the decompressor, if any).
+
+        Returns:
+        -   dict: The record dictionaries by key.
+        """
+        with open(path, 'rb') as f:
+            if self.__compression is None:
+                return self.__codec.load(f)
+            with open_compressed(f, self.__compression) as z:
+                return self.__codec.load(z)
+
+    @contextmanager
+    def __replacing(self, path, mode='w'):
+        """
+        Opens a temporary file that replaces the file (path) once
+        the `with` block exits (a crash in the middle of the write
+        leaves the previous file intact).
+
+        Args:
+        -   path (str): The path to the replaced file.
+        -   mode (str): The file mode ('w' or 'wb').
+                (defaults to 'w')
+        """
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, mode) as f:
+                yield f
+                self.__sync(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if self.__durability == "fsync-dir":
+            self.__sync_dir(path)
+
+    def __sync(self, f):
+        """
+        Pushes the data written to (f) as far as the durability level.
+
+        Args:
+        -   f (file): The open file.
+        """
+        if self.__durability == "none":
+            return
+        f.flush()
+        if self.__durability != "flush":
+            os.fsync(f.fileno())
+        if self.__durability == "fsync-dir" and 'a' in f.mode:
+            self.__sync_dir(f.name)
+
+    @staticmethod
+    def __sync_dir(path):
+        """
+        Flushes the directory entries of the directory of (path) to disk.
+        """
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def __cache(self, keys):
+        """
+        Encodes the (keys) instances that are missing from the cached
+        encodings.
+
+        Args:
+        -   keys (iterable): The keys of the instances.
+
+        Returns:
+        -   dict: The cached JSON encodings.
+        """
+        encoded = self.__encoded
+        for key in keys:
+            if key in encoded:
+                continue
+            obj = self.__objects.get(key)
+            encoded[key] = self.__codec.encode(
+                self.__raw[key] if obj is None else self.__record(obj)
+            )
+        return encoded
+
+    @staticmethod
+    def __record(obj):
+        """
+        Returns the record of (obj): its attributes and class name
+        (the datetimes are left to the codec).
+        """
+        record = obj.__dict__.copy()
+        record["__class__"] = obj.__class__.__name__
+        return record
+
+    def __encode(self):
+        """
+        Re-encodes the dirty instances into the cached encodings
+        (deleted instances are dropped from the cache), along with the
+        watched instances whose encoding changed (modified in place,
+        e.g. `place.amenity_ids.append(id)`).
+
+        Returns:
+        -   list: The keys of the dirty instances.
+        """
+        dirty = list(self.__dirty)
+        self.__dirty.clear()
+        for key in dirty:
+            obj = self.__objects.get(key)
+            if obj is None:
+                self.__encoded.pop(key, None)
+            else:
+                self.__encoded[key] = self.__codec.encode(self.__record(obj))
+                self.__watch(key, obj)
+        for key in self.__mutable.difference(dirty):
+            obj = self.__objects.get(key)
+            if obj is None:
+                self.__mutable.discard(key)
+                continue
+            data = self.__codec.encode(self.__record(obj))
+            if data != self.__encoded.get(key):
+                self.__encoded[key] = data
+                self.__changed(key)
+                uncache(obj)
+                dirty.append(key)
+        return dirty
+
+    def __watch(self, key, obj):
+        """
+        Watches the (key) instance if one of its attributes is a list,
+        a dictionary or a set: it can be modified in place, without
+        being flagged as modified, so its encoding is compared on every
+        save (the encoding of a loaded instance is cached first).
+        """
+        for value in obj.__dict__.values():
+            if type(value) in mutables:
+                self.__mutable.add(key)
+                if key not in self.__encoded:
+                    self.__encoded[key] = self.__codec.encode(
+                        self.__record(obj)
+                    )
+                return
+
+    @_locked
     def reload(self):
         """
         Deserializes the JSON file to objects
         (only if the JSON file (__file_path) exists; otherwise, do nothing)
         (If the file doesn't exist, no exception should be raised)
+        (then replays the journal on top of it, if any)
+        (in sharded mode the class files are only loaded when accessed)
+        (in indexed mode only the index of the lines file is loaded)
+        (the saves queued to the write-behind thread are written first)
+        (the saved full-text indexes are reused if the files didn't change)
         """
+        self.flush()
+        if self.__indexed:
+            self.__reload_index()
+            return
+        if self.__sharded:
+            self.__objects = {}
+            self.__raw = {}
+            self.__mutable = set()
+            self.__shards = {}
+            self.__unloaded = {
+                name for name in classes
+                if os.path.exists(self.__shard_path(name))
+            }
+            self.__dirty.clear()
+            self.__encoded = {}
+            self.__reload_text()
+            return
 
+        _dict = None
         try:
-            with open(self.__file_path) as f:
-                _dict = json.loads(f.read())
-                self.__objects = {
-                    key: classes[key.split('.')[0]](**obj)
-                    for key, obj in _dict.items()
-                }
+            _dict = self.__load(self.__file_path)
         except FileNotFoundError:
             pass
+
+        try:
+            with open(self.__journal_path, 'r+b') as f:
+                _dict = {} if _dict is None else _dict
+                self.__journal_size, end = self.__codec.replay(f, _dict)
+                if end < f.seek(0, os.SEEK_END):
+                    # Cut the partial last record (left by a crash) so
+                    # the next records aren't appended to it.
+                    f.truncate(end)
+                    self.__sync(f)
+        except FileNotFoundError:
+            pass
+
+        if _dict is None:
+            return
+        self.__objects = {}
+        self.__raw = {}
+        self.__mutable = set()
+        self.__dirty.clear()
+        self.__encoded = {}
+        self.__store(_dict)
+        self.__reload_text()
+
+    def __reload_index(self):
+        """
+        Deserializes the index of the lines file
+        (the lines are only read when their instance is accessed).
+
+        Raises:
+        -   ValueError: If the preset dictionary of the compressed
+                lines is missing.
+        """
+        self.__recover_lines()
+        index = {}
+        size = end = 0
+        line = b"\n"
+        try:
+            with open(self.__index_path, 'rb') as f:
+                for line in f:
+                    try:
+                        changes = json.loads(line)
+                    except ValueError:
+                        break
+                    for key, pos in changes.items():
+                        if pos is None:
+                            index.pop(key, None)
+                        else:
+                            index[key] = pos
+                    size += len(changes)
+                    end += len(line)
+        except FileNotFoundError:
+            return
+        if self.__compression is not None:
+            try:
+                with open(self.__zdict_path, 'rb') as f:
+                    self.__codec.zdict = f.read()
+            except FileNotFoundError:
+                raise ValueError(
+                    f"{self.__zdict_path} is missing, the lines of "
+                    f"{self.__lines_path} can't be inflated"
+                ) from None
+        self.__close_map()
+        self.__objects = {}
+        self.__mutable = set()
+        self.__index = {key: tuple(pos) for key, pos in index.items()}
+        live = sum(length for _, length in self.__index.values())
+        self.__dead = os.path.getsize(self.__lines_path) - live
+        self.__index_log = size - len(index)
+        self.__dirty.clear()
+        self.__encoded = {}
+        if end != os.path.getsize(self.__index_path) \
+                or not line.endswith(b"\n"):
+            # A partial last change (left by a crash) or an index
+            # written without a trailing newline.
+            self.__save_index()
+        self.__reload_text()
+
+    def __store(self, _dict):
+        """
+        Builds the instances of the deserialized dictionaries
+        (in lazy mode the dictionaries are kept until accessed).
+
+        Args:
+        -   _dict (dict): The deserialized dictionaries by key.
+        """
+        if self.__lazy:
+            self.__raw.update(_dict)
+            for key in _dict:
+                self.__place(key, None)
+            return
+        for key, obj in _dict.items():
+            self.__objects[key] = classes[key.split('.')[0]](**obj)
+            self.__place(key, self.__objects[key])
+            self.__watch(key, self.__objects[key])
+
+    def __load_shards(self, names):
+        """
+        Deserializes the JSON files of the (names) classes to objects.
+        Instances created before the file is loaded are kept as is.
+
+        Args:
+        -   names (list): The class names.
+        """
+        for cls_name in names:
+            self.__unloaded.discard(cls_name)
+            _dict = self.__load(self.__shard_path(cls_name))
+            self.__store({
+                key: obj for key, obj in _dict.items()
+                if key not in self.__objects
+            })
+            self.__shards.setdefault(cls_name, set()).update(_dict)
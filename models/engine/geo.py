@@ -0,0 +1,181 @@
+#!/usr/bin/python3
+"""
+Define the geospatial index module.
+
+The GridIndex buckets the points in cells of `cell` degrees, so a box,
+radius or nearest-neighbour query only visits the cells around the
+queried area instead of every point.
+"""
+import math
+
+EARTH_RADIUS = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS / 180
+HALF_CIRCUMFERENCE = math.pi * EARTH_RADIUS
+
+
+def distance(lat1, lon1, lat2, lon2):
+    """
+    Returns the great-circle distance between two points in km
+    (haversine formula).
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    a = math.sin((phi2 - phi1) / 2) ** 2 + math.cos(phi1) * math.cos(phi2) \
+        * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+
+def valid(lat, lon):
+    """
+    Returns True if (lat, lon) are the coordinates of a point.
+    """
+    return lat is not None and lon is not None \
+        and -90 <= lat <= 90 and -180 <= lon <= 180
+
+
+def bounds(lat, lon, km):
+    """
+    Returns the bounding box of the circle of (km) around (lat, lon)
+    (its west is greater than its east if it crosses the antimeridian).
+
+    Returns:
+    -   tuple: The (south, west, north, east) box.
+    """
+    dlat = km / KM_PER_DEGREE
+    south, north = lat - dlat, lat + dlat
+    if south <= -90 or north >= 90:
+        return (max(south, -90), -180, min(north, 90), 180)
+    dlon = dlat / math.cos(math.radians(max(abs(south), abs(north))))
+    if dlon >= 180:
+        return (south, -180, north, 180)
+    west = (lon - dlon + 180) % 360 - 180
+    east = (lon + dlon + 180) % 360 - 180
+    return (south, west, north, east)
+
+
+class GridIndex:
+    """
+    Index points (latitude, longitude) by key in a grid of cells.
+
+    Attributes:
+    -   cell (float): The size of a cell in degrees.
+    """
+
+    def __init__(self, cell=0.05):
+        """
+        Initializes a new GridIndex instance.
+
+        Args:
+        -   cell (float): The size of a cell in degrees.
+                (defaults to 0.05, about 5.5 km of latitude)
+        """
+        self.cell = cell
+        self.__cells = {}
+        self.__points = {}
+
+    def __len__(self):
+        """Returns the number of indexed points."""
+        return len(self.__points)
+
+    def add(self, key, lat, lon):
+        """
+        Indexes (key) at (lat, lon), replacing its previous position.
+        """
+        self.remove(key)
+        self.__points[key] = (lat, lon)
+        self.__cells.setdefault(self.__cell_of(lat, lon), set()).add(key)
+
+    def remove(self, key):
+        """
+        Removes (key) from the index (if indexed).
+        """
+        point = self.__points.pop(key, None)
+        if point is None:
+            return
+        cell = self.__cell_of(*point)
+        keys = self.__cells[cell]
+        keys.discard(key)
+        if not keys:
+            del self.__cells[cell]
+
+    def box(self, south, west, north, east):
+        """
+        Returns the keys of the points within a bounding box
+        (west > east for a box crossing the antimeridian).
+
+        Returns:
+        -   list: The keys.
+        """
+        found = []
+        for key in self.__candidates(south, west, north, east):
+            lat, lon = self.__points[key]
+            if south <= lat <= north and (
+                west <= lon <= east if west <= east
+                else lon >= west or lon <= east
+            ):
+                found.append(key)
+        return found
+
+    def near(self, lat, lon, km):
+        """
+        Returns the points within (km) of (lat, lon), nearest first.
+
+        Returns:
+        -   list: The (distance in km, key) pairs.
+        """
+        found = []
+        for key in self.__candidates(*bounds(lat, lon, km)):
+            d = distance(lat, lon, *self.__points[key])
+            if d <= km:
+                found.append((d, key))
+        found.sort()
+        return found
+
+    def nearest(self, lat, lon, k):
+        """
+        Returns the (k) points nearest to (lat, lon), nearest first
+        (the searched radius doubles until k points are found).
+
+        Returns:
+        -   list: The (distance in km, key) pairs.
+        """
+        km = self.cell * KM_PER_DEGREE
+        while True:
+            found = self.near(lat, lon, km)
+            if len(found) >= k or km >= HALF_CIRCUMFERENCE:
+                return found[:k]
+            km *= 2
+
+    def __cell_of(self, lat, lon):
+        """
+        Returns the (row, column) of the cell holding (lat, lon).
+        """
+        return (math.floor(lat / self.cell), math.floor(lon / self.cell))
+
+    def __candidates(self, south, west, north, east):
+        """
+        Yields the keys of the cells overlapping a bounding box
+        (scans the non-empty cells instead when the box covers more
+        cells than there are).
+        """
+        rows = range(
+            math.floor(south / self.cell), math.floor(north / self.cell) + 1
+        )
+        if west <= east:
+            spans = [(west, east)]
+        else:
+            spans = [(west, 180), (-180, east)]
+        columns = [
+            col for w, e in spans for col in range(
+                math.floor(w / self.cell), math.floor(e / self.cell) + 1
+            )
+        ]
+        if len(rows) * len(columns) > len(self.__cells):
+            columns = set(columns)
+            for (row, col), keys in self.__cells.items():
+                if row in rows and col in columns:
+                    yield from keys
+            return
+        for row in rows:
+            for col in columns:
+                yield from self.__cells.get((row, col), ())
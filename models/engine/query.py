@@ -0,0 +1,526 @@
+#!/usr/bin/python3
+"""
+Define the query module.
+
+A Query selects the instances of a class matching its predicates
+through the most selective index of the storage engine (a secondary
+index lookup, a sorted index range or a scan of the class partition),
+then filters, orders, limits and projects them, or aggregates them.
+"""
+import heapq
+import operator
+from itertools import islice
+from weakref import WeakKeyDictionary
+from models.engine.file_storage import classes, class_name, number
+from models.engine.file_storage import secondary_indexes, range_indexes
+from models.engine.file_storage import column_indexes
+
+
+def contains(value, item):
+    """
+    Returns True if the (value) string or collection holds (item).
+    """
+    try:
+        return isinstance(value, (str, list, tuple, set, dict)) \
+            and item in value
+    except TypeError:
+        return False
+
+
+operators = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda value, values: value in values,
+    "contains": contains,
+}
+
+
+aggregates = ("count", "sum", "avg", "min", "max", "distinct")
+
+# The aggregates computed from each storage engine
+# ({<storage>: (<version>, {<aggregate>: <result>})}).
+results = WeakKeyDictionary()
+
+
+def hashable(value):
+    """
+    Returns (value) as a group key (its representation if it can't
+    be hashed, e.g. a list).
+    """
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+def final(func, state):
+    """
+    Returns the (func) aggregate of a group from its accumulated state.
+    """
+    if func == "distinct":
+        return len(state)
+    if func == "sum":
+        return state[0]
+    if func == "avg":
+        return state[0] / state[1]
+    if func in ("min", "max"):
+        return float(state)
+    return state
+
+
+class Query:
+    """
+    Select the instances of a class stored in a storage engine.
+
+    The predicates, ordering, limit and projection are chained:
+
+        Query(storage, "Place").where("city_id", "=", city.id) \\
+            .where("price_by_night", "<=", 100) \\
+            .order_by("price_by_night").limit(10).fields("name")
+
+    Attributes:
+    -   cls_name (str): The class name of the selected instances.
+    -   examined (int): The number of instances read by the last run.
+    -   aggregated (str): How the last aggregate was computed ("cache",
+            "partition", "columns", "index" or "hash").
+    """
+
+    def __init__(self, storage, cls):
+        """
+        Initializes a new Query instance.
+
+        Args:
+        -   storage (FileStorage | DBStorage): The storage engine.
+        -   cls (type | str): The class (or class name) of the instances.
+
+        Raises:
+        -   TypeError: If cls is neither a class nor a class name.
+        """
+        self.__storage = storage
+        self.cls_name = class_name(cls)
+        self.__predicates = []
+        self.__order = None
+        self.__reverse = False
+        self.__limit = None
+        self.__fields = None
+        self.examined = 0
+        self.aggregated = None
+
+    def where(self, name, op, value):
+        """
+        Adds the predicate (name) (op) (value); an instance matches
+        when all the predicates are true. The values of the attributes
+        with a sorted index are compared as numbers.
+
+        Args:
+        -   name (str): The attribute.
+        -   op (str): "=", "!=", "<", "<=", ">", ">=", "in" (value is
+                a collection) or "contains" (the attribute is a string
+                or a collection holding value).
+        -   value (any): The compared value.
+
+        Returns:
+        -   Query: The query.
+
+        Raises:
+        -   ValueError: If the operator is unknown or if a value compared
+                with a sorted index attribute isn't a number.
+        """
+        if op not in operators:
+            raise ValueError(f"unknown operator: {op}")
+        if op == "in":
+            value = list(value)
+        if op != "contains" and self.__numeric(name):
+            values = value if op == "in" else [value]
+            if None in [number(v) for v in values]:
+                raise ValueError(f"{self.cls_name}.{name} takes numbers")
+            value = [number(v) for v in values] if op == "in" \
+                else number(value)
+        self.__predicates.append((name, op, value))
+        return self
+
+    def order_by(self, name, reverse=False):
+        """
+        Orders the instances by their (name) attribute
+        (the instances without a value come last).
+
+        Returns:
+        -   Query: The query.
+        """
+        self.__order = name
+        self.__reverse = reverse
+        return self
+
+    def limit(self, limit):
+        """
+        Keeps the first (limit) instances.
+
+        Returns:
+        -   Query: The query.
+        """
+        self.__limit = limit
+        return self
+
+    def fields(self, *names):
+        """
+        Projects the instances to dictionaries of their (names)
+        attributes.
+
+        Returns:
+        -   Query: The query.
+        """
+        self.__fields = names or None
+        return self
+
+    def __iter__(self):
+        """
+        Yields the matching instances (or their projection)
+        as they are found.
+        """
+        plan = self.plan()
+        self.examined = 0
+        found = (obj for obj in self.__candidates(plan) if self.__match(obj))
+        if self.__order is not None and plan["order"] == "sort":
+            if self.__limit is None:
+                found = self.__sort(list(found))
+            else:
+                found = self.__top(found, self.__limit)
+        if self.__limit is not None:
+            found = islice(found, self.__limit)
+        for obj in found:
+            yield obj if self.__fields is None else {
+                name: getattr(obj, name, None) for name in self.__fields
+            }
+
+    def all(self):
+        """
+        Returns the list of the matching instances (or their projection).
+        """
+        return list(self)
+
+    def aggregate(self, func, name=None, by=None):
+        """
+        Aggregates the (name) attribute of the matching instances
+        (regardless of the order, limit and projection), grouped by the
+        value of the (by) attribute(s). The sum, avg, min and max read
+        the values as numbers (leaving out the others), the count of an
+        attribute counts the instances where it is set and distinct the
+        number of its distinct values.
+
+        The aggregate is computed, in order of preference, from the
+        class partition (a count), the columnar store of the class
+        (see FileStorage.columns()), a sorted index (a min or a max) or
+        in one pass over the matching instances (hash aggregation), and
+        cached until the next change of the storage (its `version`).
+
+        Args:
+        -   func (str): One of `aggregates`.
+        -   name (str): The attribute (optional to count instances).
+                (defaults to None)
+        -   by (str | tuple | list): The attribute(s) to group by.
+                (defaults to None, no grouping)
+
+        Returns:
+        -   int | float | None: The aggregate (None for the avg, min or
+                max of no value).
+        -   dict: The aggregate by group if (by) is given, the groups
+                are the values of by (tuples of values for several
+                attributes).
+
+        Raises:
+        -   ValueError: If func is unknown or needs an attribute, or if
+                a by attribute isn't an attribute name, or is neither
+                declared by the class nor set on a matching instance.
+        """
+        if func not in aggregates:
+            raise ValueError(f"unknown aggregate: {func}")
+        if name is None and func != "count":
+            raise ValueError(f"{func} needs an attribute")
+        if isinstance(by, (list, tuple)):
+            by = tuple(by)
+        names = by if type(by) is tuple else (by,) if by is not None else ()
+        if (by is not None and not names) \
+                or not all(type(n) is str and n for n in names):
+            raise ValueError(f"can't group by {by!r}")
+        version = getattr(self.__storage, "version", None)
+        cached = results.get(self.__storage)
+        if cached is None or cached[0] != version:
+            cached = (version, {})
+            if version is not None:
+                results[self.__storage] = cached
+        key = repr((self.cls_name, self.__predicates, func, name, by))
+        if key in cached[1]:
+            self.aggregated = "cache"
+        else:
+            cached[1][key] = self.__aggregate(func, name, by)
+        result = cached[1][key]
+        return dict(result) if type(result) is dict else result
+
+    def plan(self):
+        """
+        Chooses how the instances are read, in order of preference:
+        an equality on a secondary index ("lookup"), an equality on a
+        sorted index ("range"), an `in` on a secondary index ("lookup"),
+        bounds on a sorted index ("range") or a scan of the class
+        partition ("scan").
+
+        Returns:
+        -   dict: The access path ("access"), the index used ("index",
+                None for a scan), its values or bounds and how the
+                instances are ordered ("order": "index", "sort" or None).
+        """
+        secondary = secondary_indexes.get(self.cls_name, ())
+        ranges = range_indexes.get(self.cls_name, ())
+        plan = {"access": "scan", "index": None}
+        name = None
+        for ops, names, access in (
+            (("=",), secondary, "lookup"),
+            (("=",), ranges, "range"),
+            (("in",), secondary, "lookup"),
+            (("<", "<=", ">", ">="), ranges, "range"),
+        ):
+            chosen = [
+                (n, op, value) for n, op, value in self.__predicates
+                if op in ops and n in names
+            ]
+            if chosen:
+                name, op, value = chosen[0]
+                plan = {"access": access, "index": f"{self.cls_name}.{name}"}
+                break
+        if plan["access"] == "lookup":
+            plan["values"] = value if op == "in" else [value]
+        elif plan["access"] == "range":
+            plan["low"], plan["high"] = self.__bounds(name)
+        if self.__order is None:
+            plan["order"] = None
+        elif plan["access"] == "range" and self.__order == name:
+            plan["order"] = "index"
+        else:
+            plan["order"] = "sort"
+        return plan
+
+    def explain(self):
+        """
+        Runs the query and reports its plan and the number of
+        instances it read and returned.
+
+        Returns:
+        -   dict: The plan with the "examined" and "returned" counts.
+        """
+        returned = sum(1 for _ in self)
+        plan = self.plan()
+        plan["class"] = self.cls_name
+        plan["examined"] = self.examined
+        plan["returned"] = returned
+        return plan
+
+    def __aggregate(self, func, name, by):
+        """
+        Returns the (func) aggregate of (name) grouped by (by),
+        computed from the cheapest source.
+        """
+        storage = self.__storage
+        if func == "count" and name is None and by is None \
+                and not self.__predicates:
+            self.aggregated = "partition"
+            return storage.count(self.cls_name)
+        if self.__columnar(func, name, by):
+            self.aggregated = "columns"
+            return storage.columns(self.cls_name).aggregate(
+                "mean" if func == "avg" else func, name,
+                self.__predicates, by
+            )
+        if func in ("min", "max") and by is None and not self.__predicates \
+                and self.__numeric(name):
+            self.aggregated = "index"
+            found = storage.ordered(
+                self.cls_name, name, reverse=func == "max", limit=1
+            )
+            return float(self.__value(found[0], name)) if found else None
+        self.aggregated = "hash"
+        return self.__hashed(func, name, by)
+
+    def __columnar(self, func, name, by):
+        """
+        Returns True if the columnar store of the class can compute the
+        aggregate: it holds (name) and (by) and every predicate compares
+        the numbers of a sorted index attribute or a string.
+        """
+        if not hasattr(self.__storage, "columns") or func == "distinct" \
+                or (func == "count") != (name is None):
+            return False
+        names = column_indexes.get(self.cls_name, ())
+        groups = secondary_indexes.get(self.cls_name, ())
+        if not names or (name is not None and name not in names) \
+                or (by is not None and by not in groups):
+            return False
+        for n, op, value in self.__predicates:
+            if n in groups and op in ("=", "!=") and type(value) is str:
+                continue
+            if n not in names or not self.__numeric(n) \
+                    or op not in ("=", "<", "<=", ">", ">="):
+                return False
+        return True
+
+    def __hashed(self, func, name, by):
+        """
+        Returns the aggregate computed in one pass over the matching
+        instances, accumulated in a dictionary of groups.
+        """
+        groups = {}
+        names = by if type(by) is tuple else (by,) if by else ()
+        cls = classes.get(self.cls_name)
+        unknown = {n for n in names if n != "id" and not hasattr(cls, n)}
+        self.examined = 0
+        for obj in self.__candidates(self.plan()):
+            if not self.__match(obj):
+                continue
+            if unknown:
+                unknown.difference_update(obj.__dict__)
+            value = None
+            if name is not None:
+                value = getattr(obj, name, None)
+                if func in ("sum", "avg", "min", "max"):
+                    value = number(value)
+                if value is None:
+                    continue
+            if type(by) is tuple:
+                group = tuple(hashable(getattr(obj, n, None)) for n in by)
+            else:
+                group = hashable(getattr(obj, by, None)) if by else None
+            state = groups.get(group)
+            if func == "count":
+                groups[group] = (state or 0) + 1
+            elif func == "distinct":
+                groups.setdefault(group, set()).add(hashable(value))
+            elif func in ("sum", "avg"):
+                total, count = state or (0.0, 0)
+                groups[group] = (total + value, count + 1)
+            elif state is None or (value < state if func == "min"
+                                   else value > state):
+                groups[group] = value
+        if unknown:
+            raise ValueError(f"unknown attributes: {sorted(unknown)}")
+        found = {group: final(func, state) for group, state in groups.items()}
+        if by is not None:
+            return found
+        empty = {"count": 0, "distinct": 0, "sum": 0.0}.get(func)
+        return found.get(None, empty)
+
+    def __candidates(self, plan):
+        """
+        Yields the instances read by the access path of (plan).
+        """
+        if plan["access"] == "scan":
+            objs = list(self.__storage.all(self.cls_name).values())
+        else:
+            name = plan["index"].split('.', 1)[1]
+        if plan["access"] == "lookup":
+            objs = (
+                obj for value in dict.fromkeys(plan["values"])
+                for obj in self.__storage.lookup(
+                    self.cls_name, name, value
+                ).values()
+            )
+        elif plan["access"] == "range":
+            objs = self.__storage.ordered(
+                self.cls_name, name, plan["low"], plan["high"],
+                reverse=plan["order"] == "index" and self.__reverse,
+                limit=self.__limit if plan["order"] != "sort"
+                and self.__exact(name) else None
+            )
+        for obj in objs:
+            self.examined += 1
+            yield obj
+
+    def __match(self, obj):
+        """
+        Returns True if (obj) matches every predicate.
+        """
+        for name, op, value in self.__predicates:
+            try:
+                if not operators[op](self.__value(obj, name, op), value):
+                    return False
+            except TypeError:
+                return False
+        return True
+
+    def __value(self, obj, name, op="="):
+        """
+        Returns the (name) attribute of (obj)
+        (as a number if the attribute has a sorted index).
+        """
+        value = getattr(obj, name, None)
+        if op != "contains" and self.__numeric(name):
+            return number(value)
+        return value
+
+    def __numeric(self, name):
+        """
+        Returns True if the (name) attribute has a sorted index.
+        """
+        return name in range_indexes.get(self.cls_name, ())
+
+    def __bounds(self, name):
+        """
+        Returns the tightest (low, high) bounds of the predicates
+        on (name) (None for no bound).
+        """
+        low = high = None
+        for n, op, value in self.__predicates:
+            if n != name:
+                continue
+            if op in ("=", ">", ">=") and (low is None or value > low):
+                low = value
+            if op in ("=", "<", "<=") and (high is None or value < high):
+                high = value
+        return low, high
+
+    def __exact(self, name):
+        """
+        Returns True if the bounds of the sorted index of (name) select
+        exactly the matching instances (every predicate is an inclusive
+        bound on name), so the index can apply the limit itself.
+        """
+        return all(
+            n == name and op in ("=", "<=", ">=")
+            for n, op, _ in self.__predicates
+        )
+
+    def __key(self, obj):
+        """
+        Returns the sort key of (obj), missing values last.
+        """
+        value = self.__value(obj, self.__order)
+        if self.__reverse:
+            return (value is not None, value)
+        return (value is None, value)
+
+    def __sort(self, objs):
+        """
+        Returns (objs) sorted (as strings when the values aren't
+        comparable).
+        """
+        try:
+            return sorted(objs, key=self.__key, reverse=self.__reverse)
+        except TypeError:
+            return sorted(
+                objs, reverse=self.__reverse,
+                key=lambda obj: tuple(map(str, self.__key(obj)))
+            )
+
+    def __top(self, objs, k):
+        """
+        Returns the first (k) of (objs) in order, without sorting them all.
+        """
+        objs = list(objs)
+        select = heapq.nlargest if self.__reverse else heapq.nsmallest
+        try:
+            return select(k, objs, key=self.__key)
+        except TypeError:
+            return self.__sort(objs)[:k]
@@ -0,0 +1,153 @@
+#!/usr/bin/python3
+"""
+Define the full-text index module.
+
+The TextIndex maps every term to the keys of the documents holding it
+(an inverted index), so a search only visits the postings of its terms
+instead of scanning every document, and ranks the matches with BM25.
+"""
+import math
+import re
+
+TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """
+    Returns the lowercase terms of (text).
+    """
+    return TOKEN.findall(text.lower()) if text else []
+
+
+class TextIndex:
+    """
+    Index documents by key in an inverted index of their terms.
+
+    Attributes:
+    -   k1 (float): The BM25 term frequency saturation.
+    -   b (float): The BM25 document length normalization.
+    """
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        """
+        Initializes a new TextIndex instance.
+        """
+        self.__postings = {}
+        self.__lengths = {}
+        self.__total = 0
+
+    def __len__(self):
+        """Returns the number of indexed documents."""
+        return len(self.__lengths)
+
+    def add(self, key, text):
+        """
+        Indexes the terms of (text) under (key),
+        replacing its previous document.
+        """
+        self.remove(key)
+        terms = tokenize(text)
+        counts = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        for term, tf in counts.items():
+            self.__postings.setdefault(term, {})[key] = tf
+        self.__lengths[key] = (len(terms), tuple(counts))
+        self.__total += len(terms)
+
+    def remove(self, key):
+        """
+        Removes the (key) document from the index (if indexed).
+        """
+        doc = self.__lengths.pop(key, None)
+        if doc is None:
+            return
+        length, terms = doc
+        self.__total -= length
+        for term in terms:
+            posting = self.__postings[term]
+            del posting[key]
+            if not posting:
+                del self.__postings[term]
+
+    def search(self, query, mode="and", limit=None):
+        """
+        Returns the documents matching the terms of (query),
+        best ranked first.
+
+        Args:
+        -   query (str): The searched terms.
+        -   mode (str): "and" to match every term, "or" to match any.
+                (defaults to "and")
+        -   limit (int): The maximum number of results.
+                (defaults to None, no limit)
+
+        Raises:
+        -   ValueError: If the mode is neither "and" nor "or".
+
+        Returns:
+        -   list: The (score, key) pairs.
+        """
+        if mode not in ("and", "or"):
+            raise ValueError(f"unknown search mode: {mode}")
+        terms = list(dict.fromkeys(tokenize(query)))
+        postings = [self.__postings.get(term, {}) for term in terms]
+        if not terms or (mode == "and" and not all(postings)):
+            return []
+        if mode == "and":
+            keys = set(min(postings, key=len))
+            for posting in postings:
+                keys.intersection_update(posting)
+        else:
+            keys = set().union(*postings)
+        n = len(self.__lengths)
+        average = self.__total / n if n else 0
+        scores = dict.fromkeys(keys, 0.0)
+        for posting in postings:
+            if not posting:
+                continue
+            df = len(posting)
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for key in keys.intersection(posting):
+                tf = posting[key]
+                norm = 1 - self.b + self.b * (
+                    self.__lengths[key][0] / average if average else 0
+                )
+                scores[key] += idf * tf * (self.k1 + 1) \
+                    / (tf + self.k1 * norm)
+        ranked = sorted(
+            ((score, key) for key, score in scores.items()),
+            key=lambda pair: (-pair[0], pair[1])
+        )
+        return ranked if limit is None else ranked[:limit]
+
+    def dump(self):
+        """
+        Returns the index as a JSON serializable dictionary
+        (the postings of every term and the length of every document).
+        """
+        return {
+            "postings": self.__postings,
+            "lengths": {
+                key: length for key, (length, _) in self.__lengths.items()
+            },
+        }
+
+    @classmethod
+    def load(cls, data):
+        """
+        Returns a TextIndex from the dictionary of a dump().
+        """
+        index = cls()
+        terms = {key: [] for key in data["lengths"]}
+        for term, posting in data["postings"].items():
+            index.__postings[term] = dict(posting)
+            for key in posting:
+                terms[key].append(term)
+        for key, length in data["lengths"].items():
+            index.__lengths[key] = (length, tuple(terms[key]))
+            index.__total += length
+        return index
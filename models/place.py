@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 """Define the Place class module"""
 from models.base_model import BaseModel
+from models.relationships import BelongsTo, HasMany, HasList
 
 
 class Place(BaseModel):
@@ -17,3 +18,7 @@ class Place(BaseModel):
     latitude = 0.0  # float - 0.0
     longitude = 0.0  # float - 0.0
     amenity_ids = [""]  # it will be the list of Amenity.id later
+    city = BelongsTo("City", "city_id")
+    user = BelongsTo("User", "user_id")
+    reviews = HasMany("Review", "place_id")
+    amenities = HasList("Amenity", "amenity_ids")
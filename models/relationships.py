@@ -0,0 +1,208 @@
+#!/usr/bin/python3
+"""
+Define the relationships module.
+
+The relationships are read-only attributes of the model classes
+(e.g. `state.cities`, `place.reviews`, `place.amenities`) resolved
+through the storage: a one-to-many relationship reads the secondary
+(reverse) index of its foreign key, a many-to-one one gets its
+instance by id.
+
+prefetch() loads a whole graph of relationships at once, joining
+each level of the graph on the instances of the previous one.
+"""
+import models
+from abc import ABC, abstractmethod
+
+
+class Relationship(ABC):
+    """
+    Base class of the relationships between model classes.
+
+    Attributes:
+    -   cls_name (str): The class name of the related instances.
+    -   foreign_key (str): The attribute holding the id(s) of the link.
+    -   name (str): The relationship attribute name.
+    """
+
+    many = True
+
+    def __init__(self, cls_name, foreign_key):
+        """
+        Initializes a new Relationship instance.
+
+        Args:
+        -   cls_name (str): The class name of the related instances.
+        -   foreign_key (str): The attribute holding the id(s) of the link.
+        """
+        self.cls_name = cls_name
+        self.foreign_key = foreign_key
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        """Records the relationship attribute name."""
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        """
+        Returns the instances related to (obj)
+        (the relationship itself when read on the class).
+        """
+        if obj is None:
+            return self
+        return self.join([obj])[obj.id]
+
+    @abstractmethod
+    def join(self, objs):
+        """
+        Returns the instances related to each of (objs) by id.
+        """
+
+
+class HasMany(Relationship):
+    """
+    The instances of another class whose foreign key is the id of the
+    instance (e.g. the cities of a state).
+    """
+
+    ratio = 8
+
+    def join(self, objs):
+        """
+        Returns the instances related to each of (objs) by id: read from
+        the secondary index of the foreign key for a few instances,
+        otherwise hash joined in one pass over the related class.
+
+        Returns:
+        -   dict: The lists of related instances by id.
+        """
+        storage = models.storage
+        found = {obj.id: [] for obj in objs}
+        if len(found) * self.ratio < storage.count(self.cls_name):
+            for obj_id, related in found.items():
+                related.extend(storage.lookup(
+                    self.cls_name, self.foreign_key, obj_id
+                ).values())
+            return found
+        for obj in storage.all(self.cls_name).values():
+            foreign_id = getattr(obj, self.foreign_key, None)
+            if type(foreign_id) is str and foreign_id in found:
+                found[foreign_id].append(obj)
+        return found
+
+
+class BelongsTo(Relationship):
+    """
+    The instance of another class whose id is the foreign key of the
+    instance (e.g. the state of a city).
+    """
+
+    many = False
+
+    def join(self, objs):
+        """
+        Returns the instance related to each of (objs) by id
+        (None if the foreign key doesn't match any instance).
+
+        Returns:
+        -   dict: The related instances by id.
+        """
+        storage = models.storage
+        found = {}
+        for obj in objs:
+            foreign_id = getattr(obj, self.foreign_key, None)
+            found[obj.id] = storage.get(self.cls_name, foreign_id) \
+                if type(foreign_id) is str and foreign_id else None
+        return found
+
+
+class HasList(Relationship):
+    """
+    The instances of another class whose ids are listed in the foreign
+    key of the instance (e.g. the amenities of a place).
+    """
+
+    def join(self, objs):
+        """
+        Returns the instances related to each of (objs) by id
+        (the ids that don't match any instance are left out).
+
+        Returns:
+        -   dict: The lists of related instances by id.
+        """
+        storage = models.storage
+        found = {}
+        for obj in objs:
+            ids = getattr(obj, self.foreign_key, None)
+            related = (
+                storage.get(self.cls_name, foreign_id)
+                for foreign_id in (ids if type(ids) is list else [])
+                if type(foreign_id) is str and foreign_id
+            )
+            found[obj.id] = [o for o in related if o is not None]
+        return found
+
+
+def relationship(cls, name):
+    """
+    Returns the (name) relationship of the (cls) model class.
+
+    Raises:
+    -   ValueError: If cls has no (name) relationship.
+    """
+    relation = getattr(cls, name, None)
+    if not isinstance(relation, Relationship):
+        raise ValueError(f"{cls.__name__} has no relationship {name}")
+    return relation
+
+
+def prefetch(objs, *paths):
+    """
+    Loads the relationships (paths) of (objs) with one join per
+    relationship and level (e.g. "cities.places.reviews" joins the
+    cities of all the states, then the places of all these cities,
+    then the reviews of all these places).
+
+    Args:
+    -   objs (iterable): The instances.
+    -   *paths (str): The dotted relationship paths.
+
+    Returns:
+    -   dict: The related instances (a list, an instance or None)
+            by relationship name by instance key
+            ({<class name>.<id>: {<relationship>: <related>}}).
+
+    Raises:
+    -   ValueError: If a relationship doesn't exist.
+    """
+    objs = list(objs)
+    joined = {}
+    for path in paths:
+        level = objs
+        for name in path.split('.'):
+            level = _join(level, name, joined)
+    return joined
+
+
+def _join(objs, name, joined):
+    """
+    Joins the (name) relationship of (objs) into (joined).
+
+    Returns:
+    -   list: The related instances (each once).
+    """
+    groups = {}
+    for obj in objs:
+        groups.setdefault(type(obj), []).append(obj)
+    found = {}
+    for cls, group in groups.items():
+        relation = relationship(cls, name)
+        related = relation.join(group)
+        for obj in group:
+            value = related[obj.id]
+            key = f"{cls.__name__}.{obj.id}"
+            joined.setdefault(key, {})[name] = value
+            for other in (value if relation.many else [value]):
+                if other is not None:
+                    found[f"{type(other).__name__}.{other.id}"] = other
+    return list(found.values())
@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 """Define the Review class module"""
 from models.base_model import BaseModel
+from models.relationships import BelongsTo
 
 
 class Review(BaseModel):
@@ -9,3 +10,5 @@ class Review(BaseModel):
     place_id = ""  # it will be the Place.id later
     user_id = ""  # it will be the User.id later
     text = ""
+    place = BelongsTo("Place", "place_id")
+    user = BelongsTo("User", "user_id")
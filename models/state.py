@@ -1,9 +1,11 @@
 #!/usr/bin/python3
 """Define the State class module"""
 from models.base_model import BaseModel
+from models.relationships import HasMany
 
 
 class State(BaseModel):
     """The State class"""
 
     name = ""
+    cities = HasMany("City", "state_id")
@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 """Define the User class module"""
 from models.base_model import BaseModel
+from models.relationships import HasMany
 
 
 class User(BaseModel):
@@ -10,3 +11,5 @@ class User(BaseModel):
     password = ""
     first_name = ""
     last_name = ""
+    places = HasMany("Place", "user_id")
+    reviews = HasMany("Review", "user_id")
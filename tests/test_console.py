@@ -159,6 +159,18 @@ class TestBaseModel(unittest.TestCase):
         expected = error_messages["no_attr_val"]
         self.assertEqual(output, expected)
 
+    def test_update_with_invalid_date(self):
+        obj = classes[self.cls_name]()
+        created_at = obj.created_at
+        with patch('sys.stdout', new=StringIO()) as mock_stdout:
+            self.console.onecmd(
+                f"update {self.cls_name} {obj.id} created_at garbage"
+            )
+        output = mock_stdout.getvalue().strip()
+        self.assertEqual(output, error_messages["no_date"])
+        self.assertEqual(obj.created_at, created_at)
+        self.assertIn(obj.id, str(obj))
+
     def test_do_count(self):
         with patch('sys.stdout', new=StringIO()) as mock_stdout:
             self.console.onecmd(f"count {self.cls_name}")
@@ -1056,6 +1068,32 @@ class TestReview(unittest.TestCase):
         self.assertRegex(output, uuid_pattern)
         self.assertIn(f"{self.cls_name}.{output}", storage.all().keys())
 
+    def test_create_many(self):
+        """Test the create_many method with and without attributes."""
+        with patch('sys.stdout', new=StringIO()) as mock_stdout:
+            self.console.onecmd(
+                f'create_many {self.cls_name} 3 {{"text": "Great stay"}}'
+            )
+        output = mock_stdout.getvalue().split()
+        self.assertEqual(len(output), 3)
+        uuid_pattern = r"^[a-f0-9]{8}(-[a-f0-9]{4}){3}-[a-f0-9]{12}$"
+        for obj_id in output:
+            self.assertRegex(obj_id, uuid_pattern)
+            obj = storage.all()[f"{self.cls_name}.{obj_id}"]
+            self.assertEqual(obj.text, "Great stay")
+        for arg, expected in (
+            ("", error_messages["no_number"]),
+            (" x", error_messages["no_number"]),
+            (" 2 [1]", error_messages["no_json"]),
+        ):
+            with patch('sys.stdout', new=StringIO()) as mock_stdout:
+                self.console.onecmd(f"create_many {self.cls_name}{arg}")
+            self.assertEqual(mock_stdout.getvalue().strip(), expected)
+        with patch('sys.stdout', new=StringIO()) as mock_stdout:
+            self.console.onecmd("create_many base 2")
+        self.assertEqual(mock_stdout.getvalue().strip(),
+                         error_messages["no_cls"])
+
     def test_create_without_clsname(self):
         with patch('sys.stdout', new=StringIO()) as mock_stdout:
             self.console.onecmd("create")
@@ -1234,6 +1272,18 @@ class TestReviewDotNotation(unittest.TestCase):
         self.assertRegex(output, uuid_pattern)
         self.assertIn(f"{self.cls_name}.{output}", storage.all().keys())
 
+    def test_create_many(self):
+        """Test the create_many method using the <class>.<method>() formate."""
+        with patch('sys.stdout', new=StringIO()) as mock_stdout:
+            self.console.default(
+                f'{self.cls_name}.create_many(2, {{"user_id": "u1"}})'
+            )
+        output = mock_stdout.getvalue().split()
+        self.assertEqual(len(output), 2)
+        for obj_id in output:
+            obj = storage.all()[f"{self.cls_name}.{obj_id}"]
+            self.assertEqual(obj.user_id, "u1")
+
     def test_create_with_invalid_clsname(self):
         with patch('sys.stdout', new=StringIO()) as mock_stdout:
             self.console.default("base.create()")
@@ -1547,6 +1597,145 @@ class TestPlace(unittest.TestCase):
         expected = error_messages["no_obj"]
         self.assertEqual(output, expected)
 
+    def test_near(self):
+        """Test the near method (nearest first, within the radius)."""
+        near = classes[self.cls_name]()
+        near.latitude, near.longitude = 45.01, -120.01
+        nearest = classes[self.cls_name]()
+        nearest.latitude, nearest.longitude = "45.0", "-120.0"
+        far = classes[self.cls_name]()
+        far.latitude, far.longitude = 46.0, -120.0
+        with patch('sys.stdout', new=StringIO()) as mock_stdout:
+            self.console.onecmd(f"near {self.cls_name} 45 -120 5")
+        output = mock_stdout.getvalue().strip()
+        self.assertEqual(output, str([str(nearest), str(near)]))
+
+    def test_near_errors(self):
+        """Test the near method with invalid arguments."""
+        for arg, message in (
+            ("City 1 2 3", "no_geo"),
+            (f"{self.cls_name} 1 2", "no_coords"),
+            (f"{self.cls_name} north 2 3", "no_number"),
+        ):
+            with patch('sys.stdout', new=StringIO()) as mock_stdout:
+                self.console.onecmd(f"near {arg}")
+            output = mock_stdout.getvalue().strip()
+            self.assertEqual(output, error_messages[message])
+
+    def test_search(self):
+        """Test the search method (every term, or any term with OR)."""
+        loft = classes[self.cls_name]()
+        loft.name, loft.description = "Zanzibar loft", "Quiet, with a pool"
+        villa = classes[self.cls_name]()
+        villa.name = "Zanzibar villa"
+        with patch('sys.stdout', new=StringIO()) as mock_stdout:
+            self.console.onecmd(f"search {self.cls_name} zanzibar POOL")
+        output = mock_stdout.getvalue().strip()
+        self.assertEqual(output, str([str(loft)]))
+        with patch('sys.stdout', new=StringIO()) as mock_stdout:
+            self.console.onecmd(f"search {self.cls_name} loft OR villa")
+        output = mock_stdout.getvalue().strip()
+        self.assertIn(str(loft), output)
+        self.assertIn(str(villa), output)
+
+    def test_search_errors(self):
+        """Test the search method with invalid arguments."""
+        for arg, message in (
+            ("City cairo", "no_text"),
+            (f"{self.cls_name}", "no_terms"),
+            (f"{self.cls_name} OR", "no_terms"),
+        ):
+            with patch('sys.stdout', new=StringIO()) as mock_stdout:
+                self.console.onecmd(f"search {arg}")
+            output = mock_stdout.getvalue().strip()
+            self.assertEqual(output, error_messages[message])
+
+    def test_where(self):
+        """Test the where method (filtered, ordered, limited, projected)."""
+        for name, price in (("wh-a", 70), ("wh-b", 90), ("wh-c", 80)):
+            obj = classes[self.cls_name]()
+            obj.name, obj.city_id, obj.price_by_night = name, "wh", price
+        with patch('sys.stdout', new=StringIO()) as mock_stdout:
+            self.console.onecmd(
+                f'where {self.cls_name} city_id = "wh", price_by_night > 70,'
+                f' order_by=-price_by_night, fields(name)'
+            )
+        output = mock_stdout.getvalue().strip()
+        self.assertEqual(output.splitlines(),
+                         ["{'name': 'wh-b'}", "{'name': 'wh-c'}"])
+        with patch('sys.stdout', new=StringIO()) as mock_stdout:
+            self.console.onecmd(
+                f'where {self.cls_name} city_id = "wh", name in ["wh-a"]'
+            )
+        output = mock_stdout.getvalue().strip()
+        self.assertEqual(len(output.splitlines()), 1)
+        self.assertIn("'name': 'wh-a'", output)
+
+    def test_where_errors(self):
+        """Test the where method with invalid predicates or modifiers."""
+        for arg, message in (
+            ("base a = 1", "no_cls"),
+            (f"{self.cls_name} price_by_night < cheap", "no_query"),
+            (f"{self.cls_name} name", "no_query"),
+            (f"{self.cls_name} name ~ 1", "no_query"),
+            (f"{self.cls_name} limit=-1", "no_query"),
+        ):
+            with patch('sys.stdout', new=StringIO()) as mock_stdout:
+                self.console.onecmd(f"where {arg}")
+            output = mock_stdout.getvalue().strip()
+            self.assertEqual(output, error_messages[message])
+
+    def test_aggregate(self):
+        """Test the aggregate method (grouped, filtered)."""
+        for user_id, price in (("ag-a", 70), ("ag-a", 90), ("ag-b", 80)):
+            obj = classes[self.cls_name]()
+            obj.city_id, obj.user_id, obj.price_by_night = "ag", user_id, price
+        with patch('sys.stdout', new=StringIO()) as mock_stdout:
+            self.console.onecmd(
+                f'aggregate {self.cls_name} avg(price_by_night), by=user_id,'
+                f' city_id = "ag"'
+            )
+            self.console.onecmd(
+                f'aggregate {self.cls_name} count(), city_id = "ag",'
+                f' price_by_night > 75'
+            )
+            self.console.onecmd(
+                f'aggregate {self.cls_name} count(), by=[city_id, user_id],'
+                f' city_id = "ag"'
+            )
+        output = mock_stdout.getvalue().strip().splitlines()
+        self.assertEqual(output[:3], ["'ag-a': 80.0", "'ag-b': 80.0", "2"])
+        self.assertEqual(sorted(output[3:]),
+                         ["('ag', 'ag-a'): 2", "('ag', 'ag-b'): 1"])
+        for arg, message in (
+            ("base count()", "no_cls"),
+            (f"{self.cls_name} city_id = 'ag'", "no_aggregate"),
+            (f"{self.cls_name} median(price_by_night)", "no_aggregate"),
+            (f"{self.cls_name} count(), by=colour", "no_aggregate"),
+            (f"{self.cls_name} count(), name ~ 1", "no_query"),
+        ):
+            with patch('sys.stdout', new=StringIO()) as mock_stdout:
+                self.console.onecmd(f"aggregate {arg}")
+            output = mock_stdout.getvalue().strip()
+            self.assertEqual(output, error_messages[message])
+
+    def test_show_include(self):
+        """Test the show method with the related instances."""
+        obj = classes[self.cls_name]()
+        review = classes["Review"]()
+        review.place_id = obj.id
+        with patch('sys.stdout', new=StringIO()) as mock_stdout:
+            self.console.onecmd(
+                f"show {self.cls_name} {obj.id} include=reviews.user"
+            )
+        output = mock_stdout.getvalue().strip()
+        self.assertEqual(output.splitlines(),
+                         [str(obj), f"    reviews: {review}"])
+        with patch('sys.stdout', new=StringIO()) as mock_stdout:
+            self.console.onecmd(f"show {self.cls_name} {obj.id} include=x")
+        output = mock_stdout.getvalue().strip()
+        self.assertEqual(output, error_messages["no_relation"])
+
 
 class TestPlaceDotNotation(unittest.TestCase):
     """Testing with the method.notation formate"""
@@ -1704,6 +1893,61 @@ class TestPlaceDotNotation(unittest.TestCase):
         expected = error_messages["no_obj"]
         self.assertEqual(output, expected)
 
+    def test_near(self):
+        """Test the near method using the <class>.near() format."""
+        obj = classes[self.cls_name]()
+        obj.latitude, obj.longitude = -33.5, 151.25
+        with patch('sys.stdout', new=StringIO()) as mock_stdout:
+            self.console.default(f"{self.cls_name}.near(-33.5, 151.25, 1)")
+        output = mock_stdout.getvalue().strip()
+        self.assertEqual(output, str([str(obj)]))
+
+    def test_where(self):
+        """Test the where method using the <class>.where() format."""
+        obj = classes[self.cls_name]()
+        obj.user_id, obj.number_rooms = "where-dot", 3
+        with patch('sys.stdout', new=StringIO()) as mock_stdout:
+            self.console.default(
+                f'{self.cls_name}.where(user_id = "where-dot", '
+                f'number_rooms >= 2, limit=5)'
+            )
+        output = mock_stdout.getvalue().strip()
+        self.assertEqual(output, str(obj))
+
+    def test_explain(self):
+        """Test the explain method using the <class>.explain() format."""
+        with patch('sys.stdout', new=StringIO()) as mock_stdout:
+            self.console.default(
+                f'{self.cls_name}.explain(user_id = "explain-dot")'
+            )
+        output = mock_stdout.getvalue().strip()
+        self.assertIn("'access': 'lookup'", output)
+        self.assertIn("'index': 'Place.user_id'", output)
+        self.assertIn("'returned': 0", output)
+
+    def test_aggregate(self):
+        """Test the aggregate method using the <class>.aggregate() format."""
+        obj = classes[self.cls_name]()
+        obj.user_id, obj.number_rooms = "aggregate-dot", 3
+        with patch('sys.stdout', new=StringIO()) as mock_stdout:
+            self.console.default(
+                f'{self.cls_name}.aggregate(max(number_rooms), '
+                f'by=(user_id, name), user_id = "aggregate-dot")'
+            )
+        output = mock_stdout.getvalue().strip()
+        self.assertEqual(output, "('aggregate-dot', ''): 3.0")
+
+    def test_search(self):
+        """Test the search method using the <class>.search() format."""
+        obj = classes[self.cls_name]()
+        obj.description = "Treehouse above the Kyoto hills"
+        with patch('sys.stdout', new=StringIO()) as mock_stdout:
+            self.console.default(
+                f'{self.cls_name}.search("treehouse kyoto")'
+            )
+        output = mock_stdout.getvalue().strip()
+        self.assertEqual(output, str([str(obj)]))
+
 
 class TestCity(unittest.TestCase):
     """Testing the City Model"""
@@ -6,8 +6,9 @@ import json
 import uuid
 import unittest
 from datetime import datetime
+from models import storage
 from models import FileStorage
-from models.base_model import BaseModel
+from models.base_model import BaseModel, encodings, uuids
 
 
 class TestBase(unittest.TestCase):
@@ -77,6 +78,104 @@ class TestBase(unittest.TestCase):
         string = f"[{type(b1).__name__}] ({b1.id}) {b1.__dict__}"
         self.assertEqual(b1.__str__(), string)
 
+    def test_cached_encodings(self):
+        """to_dict() and __str__() are cached until an attribute is set"""
+        b1 = BaseModel()
+        b1_dict = b1.to_dict()
+        string = str(b1)
+        self.assertIn(b1, encodings)
+        self.assertNotIn("dict", b1.__dict__)
+        self.assertEqual(str(b1), string)
+        self.assertEqual(b1.to_dict(), b1_dict)
+        self.assertIsNot(b1.to_dict(), b1.to_dict())
+        b1.to_dict()["name"] = "xxx"
+        self.assertNotIn("name", b1.to_dict())
+        b1.name = "xxx"
+        self.assertEqual(b1.to_dict()["name"], "xxx")
+        self.assertEqual(str(b1),
+                         f"[{type(b1).__name__}] ({b1.id}) {b1.__dict__}")
+        b1.save()
+        self.assertEqual(b1.to_dict()["updated_at"],
+                         b1.updated_at.isoformat())
+        del b1.name
+        self.assertNotIn("name", b1.to_dict())
+        self.assertNotIn("xxx", str(b1))
+
+    def test_cached_encodings_in_place(self):
+        """__str__() isn't cached for the lists modified in place"""
+        b1 = BaseModel()
+        b1.tags = ["a"]
+        self.assertIn("['a']", str(b1))
+        b1.tags.append("b")
+        self.assertIn("['a', 'b']", str(b1))
+        self.assertEqual(b1.to_dict()["tags"], ["a", "b"])
+
+    def test_cached_encodings_rollback(self):
+        """A rolled back instance drops its cached encodings"""
+        b1 = BaseModel()
+        with self.assertRaises(KeyError):
+            with storage.batch():
+                b1.name = "xxx"
+                self.assertIn("xxx", str(b1))
+                raise KeyError("rollback")
+        self.assertNotIn("name", b1.to_dict())
+        self.assertNotIn("xxx", str(b1))
+
+    def test_lazy_timestamps(self):
+        """The timestamps read as strings are parsed when accessed"""
+        kwargs = BaseModel().to_dict()
+        b1 = BaseModel(**kwargs)
+        self.assertIs(type(b1.__dict__["created_at"]), str)
+        self.assertEqual(b1.to_dict(), kwargs)
+        self.assertIsInstance(b1.created_at, datetime)
+        self.assertIsInstance(b1.__dict__["created_at"], datetime)
+        self.assertIs(type(b1.__dict__["updated_at"]), str)
+        self.assertIn("datetime.datetime(", str(b1))
+        self.assertEqual(b1.to_dict(), kwargs)
+        with self.assertRaises(AttributeError):
+            BaseModel(id="xxx").created_at
+
+    def test_set_timestamps(self):
+        """The assigned timestamps are parsed and checked"""
+        b1 = BaseModel()
+        now = datetime.now()
+        b1.updated_at = now.isoformat()
+        self.assertEqual(b1.__dict__["updated_at"], now)
+        with self.assertRaises(ValueError):
+            b1.created_at = "garbage"
+        with self.assertRaises(TypeError):
+            b1.created_at = 12
+        self.assertIsInstance(b1.created_at, datetime)
+
+    def test_uuids(self):
+        """uuids() generates distinct version 4 ids"""
+        ids = list(uuids(10, chunk=3))
+        self.assertEqual(len(set(ids)), 10)
+        for uid in ids:
+            self.assertEqual(str(uuid.UUID(uid)), uid)
+            self.assertEqual(uuid.UUID(uid).version, 4)
+            self.assertEqual(uuid.UUID(uid).variant, uuid.RFC_4122)
+        self.assertEqual(list(uuids(0)), [])
+
+    def test_create_many(self):
+        """create_many() registers and saves the instances at once"""
+        objs = BaseModel.create_many(3, name="xxx", tags=["a"])
+        self.assertEqual(len({b.id for b in objs}), 3)
+        self.assertEqual(len({b.created_at for b in objs}), 1)
+        for b in objs:
+            self.assertEqual(b.name, "xxx")
+            self.assertEqual(b.updated_at, b.created_at)
+            self.assertIs(storage.all()[f"BaseModel.{b.id}"], b)
+        with open(FileStorage._FileStorage__file_path) as f:
+            saved = json.load(f)
+        self.assertEqual(saved[f"BaseModel.{objs[0].id}"],
+                         objs[0].to_dict())
+        objs[0].tags.append("b")
+        self.assertEqual(objs[1].tags, ["a"])
+        self.assertEqual(BaseModel.create_many(0), [])
+        with self.assertRaises(ValueError):
+            BaseModel.create_many(-1)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,121 @@
+#!/usr/bin/python3
+"""Unit tests for the `compact` module"""
+import os
+import models
+import unittest
+from io import StringIO
+from unittest.mock import patch
+from console import HBNBCommand
+from models import FileStorage
+from models import classes
+from models.compact import compact, overflow
+from models.base_model import BaseModel
+from models.place import Place
+from models.relationships import HasMany
+
+
+class TestCompact(unittest.TestCase):
+    """Test cases for the compact model classes."""
+
+    def setUp(self):
+        """Registers the compact Place class."""
+        self.cls = compact(Place)
+        self.storage = FileStorage()
+        self.patchers = [
+            patch.dict(classes, Place=self.cls),
+            patch.object(models, "storage", self.storage),
+            patch("console.storage", self.storage),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+
+    def tearDown(self):
+        """Resets FileStorage data."""
+        for patcher in self.patchers:
+            patcher.stop()
+        FileStorage._FileStorage__objects = {}
+        if os.path.exists(FileStorage._FileStorage__file_path):
+            os.remove(FileStorage._FileStorage__file_path)
+
+    def test_slots(self):
+        """The declared attributes are slots, the defaults stay on the class"""
+        pl = self.cls()
+        self.assertEqual(self.cls.__name__, "Place")
+        self.assertIn("name", self.cls.__slots__)
+        self.assertEqual(self.cls.name, "")
+        self.assertEqual(self.cls.amenity_ids, Place.amenity_ids)
+        self.assertIsInstance(self.cls.reviews, HasMany)
+        self.assertEqual(pl.number_rooms, 0)
+        self.assertNotIn("number_rooms", pl.__dict__)
+        pl.number_rooms = 3
+        self.assertEqual(pl.__dict__["number_rooms"], 3)
+        self.assertIsNone(overflow(pl))
+        self.assertIn(f"Place.{pl.id}", self.storage.all())
+
+    def test_subclass(self):
+        """A compact class is the one subclass of its model class"""
+        pl = self.cls()
+        self.assertIsInstance(pl, Place)
+        self.assertIsInstance(pl, BaseModel)
+        self.assertIs(compact(Place), self.cls)
+        self.assertIs(compact(self.cls), self.cls)
+        self.assertEqual(vars(pl), pl.__dict__)
+        self.assertIn(pl.id, str(pl))
+
+    def test_overflow(self):
+        """The other attributes go to an overflow dictionary"""
+        pl = self.cls()
+        pl.color = "blue"
+        self.assertEqual(pl.color, "blue")
+        self.assertEqual(overflow(pl), {"color": "blue"})
+        del pl.color
+        self.assertIsNone(overflow(pl))
+        with self.assertRaises(AttributeError):
+            pl.color
+
+    def test_encodings(self):
+        """to_dict() and __str__() match the ones of a Place"""
+        kwargs = Place().to_dict()
+        kwargs.update(name="Loft", number_rooms=2, color="blue")
+        pl, cpl = Place(**kwargs), self.cls(**kwargs)
+        self.assertEqual(cpl.to_dict(), pl.to_dict())
+        self.assertEqual(str(cpl), str(pl))
+        cpl.name = "Villa"
+        self.assertIn("'name': 'Villa'", str(cpl))
+
+    def test_save_reload(self):
+        """FileStorage round-trips the compact instances"""
+        pl = self.cls()
+        pl.name, pl.color = "Loft", "blue"
+        pl.save()
+        expected = pl.to_dict()
+        storage = FileStorage()
+        storage.reload()
+        obj = storage.get("Place", pl.id)
+        self.assertIsNot(obj, pl)
+        self.assertIsInstance(obj, self.cls)
+        self.assertEqual(obj.to_dict(), expected)
+
+    def test_rollback(self):
+        """A failed batch rolls back the compact instances"""
+        pl = self.cls()
+        pl.save()
+        with self.assertRaises(ZeroDivisionError):
+            with self.storage.batch():
+                pl.name, pl.color = "Loft", "blue"
+                1 / 0
+        self.assertEqual(pl.name, "")
+        self.assertNotIn("color", pl.__dict__)
+
+    def test_console_update(self):
+        """update sets the attributes of the compact instances"""
+        pl = self.cls()
+        with patch('sys.stdout', new=StringIO()):
+            HBNBCommand().onecmd(f'update Place {pl.id} name "Loft"')
+            HBNBCommand().onecmd(f'update Place {pl.id} color "blue"')
+        self.assertEqual(pl.name, "Loft")
+        self.assertEqual(pl.color, "blue")
+
+
+if __name__ == "__main__":
+    unittest.main()
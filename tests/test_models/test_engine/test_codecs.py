@@ -0,0 +1,136 @@
+#!/usr/bin/python3
+"""Defines unittests for the `codecs.py` module"""
+import io
+import os
+import models
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+from models import FileStorage
+from models import classes
+from models.engine.codecs import get_codec, convert
+
+
+class TestCodecs(unittest.TestCase):
+    """Unittests for testing the storage codecs."""
+
+    def setUp(self):
+        """Init setup for the test"""
+        self.record = {
+            "id": "1234", "__class__": "Place",
+            "created_at": datetime(2017, 9, 28, 21, 3, 54, 52298),
+            "updated_at": datetime(1969, 12, 31, 23, 59, 59, 1),
+            "name": "Cairo é", "number_rooms": 3, "latitude": 30.04,
+            "big": 2 ** 70, "is_new": True, "rating": None,
+            "amenity_ids": ["a", "b"], "extra": {"k": [1, 2.5]},
+        }
+
+    def test_unknown_codec(self):
+        """An unknown codec raises a ValueError"""
+        for name in ("xml", "framed"):
+            with self.assertRaises(ValueError):
+                get_codec(name)
+
+    def test_untrusted(self):
+        """pickle and marshal require trusted=True"""
+        for name in ("pickle", "marshal"):
+            with self.assertRaises(ValueError):
+                get_codec(name)
+            self.assertEqual(get_codec(name, trusted=True).name, name)
+
+    def test_native_round_trip(self):
+        """The binary codecs keep the values and their types"""
+        for name in ("pickle", "marshal"):
+            codec = get_codec(name, trusted=True)
+            decoded = codec.decode(codec.encode(self.record))
+            self.assertEqual(decoded, self.record, name)
+
+    def test_json_round_trip(self):
+        """The json codec stores datetimes as ISO strings"""
+        codec = get_codec("json")
+        decoded = codec.decode(codec.encode(self.record))
+        self.assertEqual(
+            decoded["created_at"], self.record["created_at"].isoformat()
+        )
+        self.assertEqual(decoded["extra"], self.record["extra"])
+
+    def test_dump_load(self):
+        """load() reads back the records written by dump()"""
+        for name in ("json", "pickle", "marshal"):
+            codec = get_codec(name, trusted=True)
+            f = io.BytesIO()
+            codec.dump(f, [("Place.1234", codec.encode(self.record))])
+            f.seek(0)
+            self.assertIn("Place.1234", codec.load(f), name)
+
+    def test_replay_partial(self):
+        """A partial last journal record ends the replay"""
+        for name in ("json", "pickle"):
+            codec = get_codec(name, trusted=True)
+            f = io.BytesIO()
+            codec.append(f, "Place.1", codec.encode(self.record))
+            codec.append(f, "Place.2", codec.encode(self.record))
+            codec.append(f, "Place.1", None)
+            end = f.tell()
+            f.write(f.getvalue()[:10])
+            f.seek(0)
+            _dict = {}
+            self.assertEqual(codec.replay(f, _dict), (3, end), name)
+            self.assertEqual(list(_dict), ["Place.2"], name)
+
+
+class TestFileStorage_codec(unittest.TestCase):
+    """Unittests for testing the codecs of the FileStorage class."""
+
+    def tearDown(self) -> None:
+        """Resets FileStorage data."""
+        FileStorage._FileStorage__objects = {}
+        for path in os.listdir():
+            if path.startswith("hbnb."):
+                os.remove(path)
+
+    def round_trip(self, **kwargs):
+        """Saves and reloads a Place, returns the reloaded Place"""
+        storage = FileStorage(**kwargs)
+        with patch.object(models, "storage", storage):
+            pl = classes["Place"]()
+            pl.number_rooms = 3
+            pl.save()
+            FileStorage._FileStorage__objects = {}
+            storage.reload()
+            reloaded = storage.get("Place", pl.id)
+        self.assertEqual(reloaded.to_dict(), pl.to_dict())
+        self.assertIs(type(reloaded.created_at), datetime)
+        return reloaded
+
+    def test_binary(self):
+        """The marshal codec writes hbnb.marshal"""
+        self.round_trip(codec=get_codec("marshal", trusted=True))
+        self.assertTrue(os.path.exists("hbnb.marshal"))
+        self.assertFalse(os.path.exists("hbnb.json"))
+
+    def test_modes(self):
+        """Every mode round-trips through the binary codecs"""
+        for name in ("pickle", "marshal"):
+            codec = get_codec(name, trusted=True)
+            for mode in ("journal", "sharded", "lazy", "indexed"):
+                with self.subTest(codec=name, mode=mode):
+                    self.round_trip(codec=codec, **{mode: True})
+                    self.tearDown()
+
+    def test_convert(self):
+        """convert() turns a JSON file into a marshal one"""
+        pl = classes["Place"]()
+        models.storage.save()
+        count = convert("hbnb.json", "json", "hbnb.marshal", "marshal")
+        self.assertEqual(count, 1)
+        storage = FileStorage(codec=get_codec("marshal", trusted=True))
+        FileStorage._FileStorage__objects = {}
+        storage.reload()
+        self.assertEqual(
+            storage.get("Place", pl.id).created_at, pl.created_at
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+#!/usr/bin/python3
+"""Defines unittests for the `columns.py` module"""
+import unittest
+from unittest.mock import patch
+from models.engine import columns
+from models.engine.columns import ColumnStore
+
+
+class TestColumnStore(unittest.TestCase):
+    """Unittests for testing the ColumnStore class (without NumPy)."""
+
+    numpy = None
+
+    def setUp(self):
+        """Init setup for the test"""
+        self.patcher = patch.object(columns, "numpy", self.numpy)
+        self.patcher.start()
+        self.store = ColumnStore(("price", "rooms"), ("city",))
+        self.store.set("a", (10, 1), ("cairo",))
+        self.store.set("b", (30, None), ("cairo",))
+        self.store.set("c", (20, 3), ("giza",))
+        self.store.set("d", (None, 2), (None,))
+
+    def tearDown(self):
+        """Restores the NumPy module"""
+        self.patcher.stop()
+
+    def test_set_remove(self):
+        """Rows are updated in place and removed by key"""
+        self.store.set("a", (15, 1), ("giza",))
+        self.store.remove("b")
+        self.store.remove("unknown")
+        self.assertEqual(len(self.store), 3)
+        self.assertNotIn("b", self.store)
+        self.assertEqual(sorted(self.store.keys()), ["a", "c", "d"])
+        self.assertEqual(self.store.aggregate("sum", "price", by="city"),
+                         {"giza": 35})
+
+    def test_keys(self):
+        """keys() returns the rows matching every predicate"""
+        self.assertEqual(self.store.keys([("price", ">=", 20)]), ["b", "c"])
+        self.assertEqual(
+            self.store.keys([("price", "!=", 10), ("city", "=", "cairo")]),
+            ["b"]
+        )
+        self.assertEqual(self.store.keys([("city", "!=", "cairo")]),
+                         ["c", "d"])
+        self.assertEqual(self.store.keys([("city", "=", "paris")]), [])
+
+    def test_aggregate(self):
+        """aggregate() leaves out the values that aren't numbers"""
+        self.assertEqual(self.store.aggregate("count"), 4)
+        self.assertEqual(self.store.aggregate("count", "price"), 3)
+        self.assertEqual(self.store.aggregate("sum", "price"), 60)
+        self.assertEqual(self.store.aggregate("mean", "rooms"), 2)
+        self.assertEqual(self.store.aggregate("min", "price"), 10)
+        self.assertEqual(
+            self.store.aggregate("max", "price", [("rooms", "<", 3)]), 10
+        )
+        self.assertIsNone(
+            self.store.aggregate("mean", "price", [("price", ">", 50)])
+        )
+        self.assertEqual(
+            self.store.aggregate("sum", "price", [("price", ">", 50)]), 0
+        )
+
+    def test_group_by(self):
+        """aggregate() groups the rows by a dictionary encoded attribute"""
+        self.assertEqual(self.store.aggregate("count", by="city"),
+                         {"cairo": 2, "giza": 1, None: 1})
+        self.assertEqual(self.store.aggregate("mean", "price", by="city"),
+                         {"cairo": 20, "giza": 20})
+        self.assertEqual(self.store.aggregate("min", "rooms", by="city"),
+                         {"cairo": 1, "giza": 3, None: 2})
+        self.assertEqual(
+            self.store.aggregate("max", "price", [("rooms", ">", 0)], "city"),
+            {"cairo": 10, "giza": 20}
+        )
+
+    def test_invalid(self):
+        """Invalid aggregates and predicates raise a ValueError"""
+        for args in (("median", "price"), ("sum",), ("sum", "city"),
+                     ("count", None, (), "price"),
+                     ("count", None, [("price", "~", 1)]),
+                     ("count", None, [("price", "<", "10")]),
+                     ("count", None, [("city", "<", "cairo")])):
+            with self.assertRaises(ValueError):
+                self.store.aggregate(*args)
+
+
+@unittest.skipIf(columns.numpy is None, "NumPy isn't installed")
+class TestColumnStore_numpy(TestColumnStore):
+    """Unittests for testing the ColumnStore class with NumPy."""
+
+    numpy = columns.numpy
+
+
+if __name__ == "__main__":
+    unittest.main()
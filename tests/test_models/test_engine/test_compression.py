@@ -0,0 +1,129 @@
+#!/usr/bin/python3
+"""Defines unittests for the `compression.py` module"""
+import io
+import os
+import zlib
+import models
+import unittest
+from unittest.mock import patch
+from models import FileStorage
+from models import classes
+from models.engine.codecs import get_codec
+from models.engine.compression import ZlibFile, RecordCodec, preset
+from models.engine.compression import open_compressed
+
+
+class TestCompression(unittest.TestCase):
+    """Unittests for testing the compression streams."""
+
+    def tearDown(self) -> None:
+        """Resets FileStorage data."""
+        FileStorage._FileStorage__objects = {}
+
+    def test_unknown_compression(self):
+        """An unknown compression raises a ValueError"""
+        with self.assertRaises(ValueError):
+            open_compressed(io.BytesIO(), "zstd")
+        with self.assertRaises(ValueError):
+            FileStorage(compression="zstd")
+
+    def test_streams(self):
+        """Every compression reads back what it wrote"""
+        data = b'{"__class__": "Place"}' * 10000
+        for compression in ("gzip", "lzma", "zlib"):
+            f = io.BytesIO()
+            with open_compressed(f, compression, 'wb') as z:
+                for i in range(0, len(data), 1000):
+                    z.write(data[i:i + 1000])
+            self.assertLess(len(f.getvalue()), len(data) // 10)
+            f.seek(0)
+            with open_compressed(f, compression) as z:
+                self.assertEqual(z.read(), data, compression)
+
+    def test_zlib_partial_reads(self):
+        """ZlibFile.read() returns at most size bytes"""
+        data = bytes(range(256)) * 1000
+        f = io.BytesIO(zlib.compress(data))
+        z = ZlibFile(f)
+        self.assertEqual(z.read(10), data[:10])
+        self.assertEqual(z.read(), data[10:])
+        self.assertEqual(z.read(), b"")
+
+    def test_record_codec(self):
+        """The preset dictionary shrinks the compressed records"""
+        codec = get_codec("json")
+        record = classes["Place"]().to_dict()
+        with_zdict = RecordCodec(codec, preset(codec, classes))
+        without = RecordCodec(codec, b"\0")
+        data = with_zdict.encode(record)
+        self.assertEqual(with_zdict.decode(data), record)
+        self.assertLess(len(data), len(without.encode(record)))
+
+
+class TestFileStorage_compression(unittest.TestCase):
+    """Unittests for testing the compression of the FileStorage class."""
+
+    def tearDown(self) -> None:
+        """Resets FileStorage data."""
+        FileStorage._FileStorage__objects = {}
+        for path in os.listdir():
+            if path.startswith("hbnb."):
+                os.remove(path)
+
+    def round_trip(self, **kwargs):
+        """Saves and reloads Places, returns the storage files"""
+        storage = FileStorage(**kwargs)
+        with patch.object(models, "storage", storage):
+            places = [classes["Place"]() for _ in range(10)]
+            places[0].name = "Cairo"
+            storage.save()
+            FileStorage._FileStorage__objects = {}
+            storage.reload()
+            self.assertEqual(storage.get("Place", places[0].id).name, "Cairo")
+            self.assertEqual(len(storage.all()), 10)
+        return sorted(p for p in os.listdir() if p.startswith("hbnb."))
+
+    def test_file(self):
+        """The compressed file is named after the compression"""
+        for compression, path in (
+            ("gzip", "hbnb.json.gz"), ("lzma", "hbnb.json.xz"),
+            ("zlib", "hbnb.json.zz")
+        ):
+            with self.subTest(compression=compression):
+                self.assertEqual(self.round_trip(compression=compression),
+                                 [path])
+                self.tearDown()
+
+    def test_sharded(self):
+        """The class files are compressed"""
+        paths = self.round_trip(compression="gzip", sharded=True)
+        self.assertEqual(paths, ["hbnb.Place.json.gz"])
+
+    def test_binary(self):
+        """The compression applies to the binary codecs as well"""
+        paths = self.round_trip(
+            compression="lzma", codec=get_codec("marshal", trusted=True)
+        )
+        self.assertEqual(paths, ["hbnb.marshal.xz"])
+
+    def test_indexed(self):
+        """In indexed mode the lines are compressed one by one"""
+        paths = self.round_trip(compression="zlib", indexed=True)
+        self.assertEqual(paths, ["hbnb.jsonl.zz", "hbnb.jsonl.zz.idx",
+                                 "hbnb.jsonl.zz.zdict"])
+        with open("hbnb.jsonl.zz", "rb") as f:
+            self.assertNotIn(b"__class__", f.read())
+
+    def test_indexed_files(self):
+        """The compressed lines don't share the uncompressed files"""
+        self.round_trip(indexed=True)
+        paths = self.round_trip(compression="gzip", indexed=True)
+        self.assertIn("hbnb.jsonl", paths)
+        self.assertIn("hbnb.jsonl.zz", paths)
+        os.remove("hbnb.jsonl.zz.zdict")
+        with self.assertRaises(ValueError):
+            FileStorage(compression="gzip", indexed=True).reload()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,281 @@
+#!/usr/bin/python3
+"""Defines unittests for the `db_storage.py` module"""
+import os
+import models
+import sqlite3
+import unittest
+from unittest.mock import patch
+from models import FileStorage
+from models import classes
+from models.engine.db_storage import DBStorage
+from models.engine.query import Query
+
+
+class TestDBStorage(unittest.TestCase):
+    """Unittests for testing the methods of the DBStorage class."""
+
+    def setUp(self):
+        """Init setup for the test"""
+        self.path = "test_hbnb.db"
+        self.storage = DBStorage(path=self.path)
+        self.storage.reload()
+        self.patcher = patch.object(models, "storage", self.storage)
+        self.patcher.start()
+
+    def tearDown(self) -> None:
+        """Removes the database."""
+        self.patcher.stop()
+        self.storage.close()
+        FileStorage._FileStorage__objects = {}
+        for ext in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + ext):
+                os.remove(self.path + ext)
+
+    def test_instantiation_with_arg(self):
+        """Basic test"""
+        with self.assertRaises(TypeError):
+            DBStorage(None)
+
+    def test_tables(self):
+        """reload() creates one table per class"""
+        conn = sqlite3.connect(self.path)
+        tables = {
+            row[0] for row in
+            conn.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        }
+        conn.close()
+        self.assertEqual(tables, set(classes))
+
+    def test_new(self):
+        """new() adds the object to the session"""
+        us = classes["User"]()
+        self.assertIs(self.storage.all()[f"User.{us.id}"], us)
+        self.assertIs(self.storage.get("User", us.id), us)
+
+    def test_new_many(self):
+        """new_many() adds the objects to the session at once"""
+        users = classes["User"].create_many(3, first_name="Betty")
+        self.storage.reload()
+        self.assertEqual(self.storage.count("User"), 3)
+        for us in users:
+            self.assertEqual(self.storage.get("User", us.id).first_name,
+                             "Betty")
+
+    def test_all_cls(self):
+        """all(cls) only loads the table of cls, count(cls) none"""
+        us = classes["User"]()
+        classes["State"]()
+        self.storage.save()
+        self.storage.reload()
+        self.assertEqual(list(self.storage.all("User")), [f"User.{us.id}"])
+        self.assertEqual(self.storage.count(classes["State"]), 1)
+        self.assertEqual(self.storage._DBStorage__tables, {"User"})
+        self.storage.delete(self.storage.get("User", us.id))
+        self.assertEqual(self.storage.count("User"), 0)
+        self.assertEqual(self.storage.count(), 0 + 1)
+
+    def test_count(self):
+        """count() counts the saved rows and the session changes"""
+        states = [classes["State"]() for _ in range(3)]
+        self.storage.save()
+        self.storage.reload()
+        self.storage.delete(self.storage.get("State", states[0].id))
+        self.storage.get("State", states[1].id).name = "Texas"
+        classes["State"]()
+        self.assertEqual(self.storage.count("State"), 3)
+        self.assertEqual(self.storage.count(), 3)
+        self.assertEqual(self.storage.count("Foo"), 0)
+        self.assertEqual(self.storage._DBStorage__tables, set())
+
+    def test_lookup(self):
+        """lookup() reads the saved rows and the session changes"""
+        saved = classes["Review"]()
+        saved.place_id = "p1"
+        moved = classes["Review"]()
+        moved.place_id = "p1"
+        self.storage.save()
+        self.storage.reload()
+        self.assertEqual(
+            set(self.storage.lookup("Review", "place_id", "p1")),
+            {f"Review.{saved.id}", f"Review.{moved.id}"}
+        )
+        self.storage.get("Review", moved.id).place_id = "p2"
+        added = classes["Review"]()
+        added.place_id = "p1"
+        self.assertEqual(
+            set(self.storage.lookup("Review", "place_id", "p1")),
+            {f"Review.{saved.id}", f"Review.{added.id}"}
+        )
+
+    def test_ordered(self):
+        """ordered() merges the saved rows and the session changes"""
+        places = []
+        for price in (30, 10, 50, 20):
+            pl = classes["Place"]()
+            pl.price_by_night = price
+            places.append(pl)
+        self.storage.save()
+        self.storage.reload()
+        self.storage.get("Place", places[2].id).price_by_night = "15"
+        prices = [
+            pl.price_by_night for pl in
+            self.storage.ordered("Place", "price_by_night", low=12, limit=2)
+        ]
+        self.assertEqual(prices, ["15", 20])
+
+    def test_near(self):
+        """near() and box() merge the saved rows and the session changes"""
+        places = []
+        for lat, lon in ((30.04, 31.24), (30.01, 31.21), (48.86, 2.35)):
+            pl = classes["Place"]()
+            pl.latitude, pl.longitude = lat, lon
+            places.append(pl)
+        self.storage.save()
+        self.storage.reload()
+        moved = self.storage.get("Place", places[2].id)
+        moved.latitude, moved.longitude = 30.05, 31.25
+        found = self.storage.near("Place", 30.05, 31.25, km=10)
+        self.assertEqual([pl.id for _, pl in found],
+                         [places[2].id, places[0].id, places[1].id])
+        found = self.storage.near("Place", 30.05, 31.25, k=1)
+        self.assertEqual([pl.id for _, pl in found], [places[2].id])
+        self.assertEqual(len(self.storage.box("Place", 29, 31, 31, 32)), 3)
+
+    def test_search(self):
+        """search() merges the saved rows and the session changes"""
+        places = []
+        for description in ("Loft with a pool", "Garden", "Quiet Studio"):
+            pl = classes["Place"]()
+            pl.description = description
+            places.append(pl)
+        self.storage.save()
+        self.storage.reload()
+        studio = self.storage.get("Place", places[2].id)
+        studio.name = "Studio by the pool"
+        found = self.storage.search("Place", "POOL")
+        self.assertEqual({pl.id for _, pl in found},
+                         {places[0].id, places[2].id})
+        found = self.storage.search("Place", "garden studio", "or")
+        self.assertEqual({pl.id for _, pl in found},
+                         {places[1].id, places[2].id})
+        self.assertEqual(self.storage.search("Place", "garden pool"), [])
+        with self.assertRaises(ValueError):
+            self.storage.search("User", "pool")
+
+    def test_query(self):
+        """A Query reads the indexes of the database"""
+        for city_id, price in (("a", 10), ("a", 50), ("b", 30)):
+            pl = classes["Place"]()
+            pl.city_id, pl.price_by_night = city_id, price
+        self.storage.save()
+        self.storage.reload()
+        query = Query(self.storage, "Place").where("city_id", "=", "a") \
+            .order_by("price_by_night", reverse=True)
+        self.assertEqual([pl.price_by_night for pl in query], [50, 10])
+        query = Query(self.storage, "Place").where("price_by_night", ">", 20)
+        self.assertEqual(query.explain()["examined"], 2)
+
+    def test_aggregate(self):
+        """Aggregates read the sorted indexes or the session instances"""
+        for city_id, price in (("a", 10), ("a", 50), ("b", 30)):
+            pl = classes["Place"]()
+            pl.city_id, pl.price_by_night = city_id, price
+        self.storage.save()
+        self.storage.reload()
+        query = Query(self.storage, "Place")
+        self.assertEqual(query.aggregate("max", "price_by_night"), 50)
+        self.assertEqual(query.aggregated, "index")
+        self.assertEqual(query.aggregate("sum", "price_by_night", "city_id"),
+                         {"a": 60, "b": 30})
+        self.assertEqual(query.aggregated, "hash")
+        pl = classes["Place"]()
+        pl.city_id, pl.price_by_night = "b", "70"
+        self.assertEqual(query.aggregate("max", "price_by_night"), 70)
+        self.assertEqual(query.aggregate("avg", "price_by_night", "city_id"),
+                         {"a": 30, "b": 50})
+
+    def test_save_reload(self):
+        """save() writes the objects read back after reload()"""
+        us = classes["User"]()
+        us.first_name = "Betty"
+        pl = classes["Place"]()
+        pl.amenity_ids = ["a", "b"]
+        self.storage.save()
+        self.storage.reload()
+        objs = self.storage.all()
+        self.assertEqual(objs[f"User.{us.id}"].first_name, "Betty")
+        self.assertEqual(objs[f"User.{us.id}"].created_at, us.created_at)
+        self.assertEqual(objs[f"Place.{pl.id}"].amenity_ids, ["a", "b"])
+        self.assertIsNot(objs[f"User.{us.id}"], us)
+
+    def test_close(self):
+        """close() saves the session, which stays usable"""
+        us = classes["User"]()
+        self.storage.close()
+        self.assertIs(self.storage.get("User", us.id), us)
+        classes["State"]().save()
+        self.storage.reload()
+        self.assertEqual(self.storage.count(), 2)
+        self.assertEqual(self.storage.get("User", us.id).id, us.id)
+
+    def test_get(self):
+        """get() reads one row"""
+        us = classes["User"]()
+        us.save()
+        self.storage.reload()
+        self.assertEqual(self.storage.get(classes["User"], us.id).id, us.id)
+        self.assertIsNone(self.storage.get("User", "123"))
+        self.assertIsNone(self.storage.get("State", us.id))
+
+    def test_update(self):
+        """Modified objects are written on save()"""
+        us = classes["User"]()
+        us.save()
+        self.storage.reload()
+        obj = self.storage.get("User", us.id)
+        obj.first_name = "Betty"
+        self.storage.save()
+        self.storage.reload()
+        self.assertEqual(self.storage.get("User", us.id).first_name, "Betty")
+
+    def test_delete(self):
+        """delete() removes the object from the database on save()"""
+        us = classes["User"]()
+        us.save()
+        self.storage.delete(us)
+        self.assertIsNone(self.storage.get("User", us.id))
+        self.storage.save()
+        self.storage.reload()
+        self.assertIsNone(self.storage.get("User", us.id))
+        self.assertEqual(self.storage.all(), {})
+
+    def test_batch(self):
+        """The saves made inside a batch are coalesced into one"""
+        query = 'SELECT COUNT(*) FROM "User"'
+        conn = sqlite3.connect(self.path)
+        with self.storage.batch():
+            for _ in range(3):
+                classes["User"]().save()
+            self.assertEqual(conn.execute(query).fetchone()[0], 0)
+        self.assertEqual(conn.execute(query).fetchone()[0], 3)
+        conn.close()
+
+    def test_batch_rollback(self):
+        """The changes made inside a failed batch are rolled back"""
+        us = classes["User"]()
+        us.save()
+        with self.assertRaises(ZeroDivisionError):
+            with self.storage.transaction():
+                st = classes["State"]()
+                us.first_name = "Betty"
+                us.save()
+                1 / 0
+        self.assertIsNone(self.storage.get("State", st.id))
+        self.assertNotIn("first_name", us.__dict__)
+        self.storage.reload()
+        us = self.storage.get("User", us.id)
+        self.assertNotIn("first_name", us.__dict__)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,15 @@
 #!/usr/bin/python3
 """Defines unittests for the `file_storage.py` module"""
 import os
+import json
+import time
 import models
 import unittest
+import threading
+from unittest.mock import patch
 from models import FileStorage
 from models import classes
+from models.engine.codecs import get_codec
 
 
 class TestFileStorage_instantiation(unittest.TestCase):
@@ -153,5 +158,1181 @@ class TestFileStorage_methods(unittest.TestCase):
             models.storage.reload({})
 
 
+class TestFileStorage_partitions(unittest.TestCase):
+    """Unittests for testing all(cls) and count() of the FileStorage class."""
+
+    def setUp(self):
+        """Init setup for the test"""
+        self.patcher = patch.object(models, "storage", FileStorage())
+        self.patcher.start()
+
+    def tearDown(self) -> None:
+        """Resets FileStorage data."""
+        self.patcher.stop()
+        FileStorage._FileStorage__objects = {}
+        for path in os.listdir():
+            if path.startswith("hbnb."):
+                os.remove(path)
+
+    def test_all_cls(self):
+        """all(cls) returns only the instances of cls"""
+        us = classes["User"]()
+        classes["State"]()
+        self.assertEqual(models.storage.all("User"), {f"User.{us.id}": us})
+        self.assertEqual(models.storage.all(classes["User"]),
+                         {f"User.{us.id}": us})
+        self.assertEqual(models.storage.all("City"), {})
+
+    def test_count(self):
+        """count() follows new() and delete()"""
+        users = [classes["User"]() for _ in range(3)]
+        classes["State"]()
+        self.assertEqual(models.storage.count("User"), 3)
+        self.assertEqual(models.storage.count(), 4)
+        models.storage.delete(users[0])
+        self.assertEqual(models.storage.count("User"), 2)
+        self.assertEqual(models.storage.count(classes["State"]), 1)
+
+    def test_new_many(self):
+        """new_many() adds the instances to __objects and partitions"""
+        storage = models.storage
+        storage.count()
+        users = [classes["User"](id=str(i)) for i in range(3)]
+        version = storage.version
+        storage.new_many([*users, classes["State"](id="s")])
+        self.assertEqual(storage.version, version + 1)
+        self.assertEqual(storage.count("User"), 3)
+        self.assertEqual(storage.get("State", "s").id, "s")
+        self.assertEqual(storage.all("User"),
+                         {f"User.{us.id}": us for us in users})
+        with self.assertRaises(KeyError):
+            with storage.batch():
+                storage.new_many([classes["User"](id="3")])
+                raise KeyError("rollback")
+        self.assertEqual(storage.count("User"), 3)
+
+    def test_reset(self):
+        """The partitions follow a replaced __objects"""
+        classes["User"]()
+        self.assertEqual(models.storage.count("User"), 1)
+        FileStorage._FileStorage__objects = {}
+        self.assertEqual(models.storage.count("User"), 0)
+
+    def test_count_unbuilt(self):
+        """count() doesn't build the lazy and indexed instances"""
+        for mode in ("lazy", "indexed"):
+            storage = FileStorage(**{mode: True})
+            with patch.object(models, "storage", storage):
+                users = [classes["User"]() for _ in range(3)]
+                classes["State"]()
+                storage.save()
+                FileStorage._FileStorage__objects = {}
+                storage.reload()
+                self.assertEqual(storage.count("User"), 3, mode)
+                self.assertEqual(storage._FileStorage__objects, {}, mode)
+                self.assertEqual(
+                    set(storage.all("User")),
+                    {f"User.{us.id}" for us in users}, mode
+                )
+                self.assertEqual(
+                    len(storage._FileStorage__objects), 3, mode
+                )
+            FileStorage._FileStorage__objects = {}
+
+    def test_sharded(self):
+        """all(cls) only loads the file of cls"""
+        storage = FileStorage(sharded=True)
+        with patch.object(models, "storage", storage):
+            classes["User"]()
+            classes["State"]()
+            storage.save()
+            FileStorage._FileStorage__objects = {}
+            storage.reload()
+            self.assertEqual(storage.count("User"), 1)
+            self.assertEqual(storage._FileStorage__unloaded, {"State"})
+            self.assertEqual(storage.count(), 2)
+
+
+class TestFileStorage_lookup(unittest.TestCase):
+    """Unittests for testing the secondary indexes of the FileStorage class."""
+
+    def setUp(self):
+        """Init setup for the test"""
+        self.storage = FileStorage()
+        self.patcher = patch.object(models, "storage", self.storage)
+        self.patcher.start()
+
+    def tearDown(self) -> None:
+        """Resets FileStorage data."""
+        self.patcher.stop()
+        FileStorage._FileStorage__objects = {}
+        for path in os.listdir():
+            if path.startswith("hbnb."):
+                os.remove(path)
+
+    def review(self, place_id):
+        """Returns a new Review of the (place_id) Place"""
+        rv = classes["Review"]()
+        rv.place_id = place_id
+        return rv
+
+    def test_not_indexed(self):
+        """Looking up an attribute that isn't indexed raises a ValueError"""
+        with self.assertRaises(ValueError):
+            self.storage.lookup("Review", "text", "")
+        with self.assertRaises(TypeError):
+            self.storage.lookup(None, "place_id", "")
+
+    def test_lookup(self):
+        """lookup() follows new(), updates and delete()"""
+        lookup = self.storage.lookup
+        rv = self.review("p1")
+        self.review("p2")
+        self.assertEqual(lookup("Review", "place_id", "p1"),
+                         {f"Review.{rv.id}": rv})
+        other = self.review("p1")
+        self.assertEqual(len(lookup("Review", "place_id", "p1")), 2)
+        rv.place_id = "p2"
+        self.assertEqual(lookup(classes["Review"], "place_id", "p1"),
+                         {f"Review.{other.id}": other})
+        self.storage.delete(other)
+        self.assertEqual(lookup("Review", "place_id", "p1"), {})
+        self.assertEqual(len(lookup("Review", "place_id", "p2")), 2)
+
+    def test_lookup_unhashable(self):
+        """Values that can't be hashed don't break the index"""
+        lookup = self.storage.lookup
+        cities = []
+        for _ in range(20):
+            cy = classes["City"]()
+            cy.state_id = "old"
+            cities.append(cy)
+        self.assertEqual(len(lookup("City", "state_id", "old")), 20)
+        for cy in cities[:19]:
+            cy.state_id = "new"
+        cities[19].state_id = ["x"]
+        self.assertEqual(len(lookup("City", "state_id", "new")), 19)
+        self.assertEqual(lookup("City", "state_id", "old"), {})
+        self.assertEqual(lookup("City", "state_id", ["x"]),
+                         {f"City.{cities[19].id}": cities[19]})
+        self.assertEqual(lookup("City", "state_id", ["y"]), {})
+        cities[19].state_id = "new"
+        self.assertEqual(len(lookup("City", "state_id", "new")), 20)
+
+    def test_refresh_failure(self):
+        """The keys left stale by a failed refresh are refreshed later"""
+        lookup = self.storage.lookup
+        cities = [classes["City"]() for _ in range(5)]
+        lookup("City", "state_id", "s1")
+        for cy in cities:
+            cy.state_id = "s1"
+        values = FileStorage._FileStorage__values
+        calls = []
+
+        def failing(storage, key, names):
+            calls.append(key)
+            if len(calls) == 3:
+                raise OSError("read failed")
+            return values(storage, key, names)
+
+        with patch.object(FileStorage, "_FileStorage__values", failing):
+            with self.assertRaises(OSError):
+                lookup("City", "state_id", "s1")
+        self.assertEqual(len(lookup("City", "state_id", "s1")), 5)
+
+    def test_lookup_new_many(self):
+        """lookup() follows new_many()"""
+        rv = self.review("p1")
+        self.storage.lookup("Review", "place_id", "p1")
+        others = [classes["Review"](id=str(i), place_id="p1")
+                  for i in range(2)]
+        self.storage.new_many(others)
+        self.assertEqual(
+            self.storage.lookup("Review", "place_id", "p1"),
+            {f"Review.{obj.id}": obj for obj in (rv, *others)}
+        )
+
+    def test_rollback(self):
+        """A rolled back batch restores the indexed values"""
+        rv = self.review("p1")
+        self.storage.lookup("Review", "place_id", "p1")
+        with self.assertRaises(KeyError):
+            with self.storage.batch():
+                rv.place_id = "p2"
+                self.review("p1")
+                raise KeyError
+        self.assertEqual(self.storage.lookup("Review", "place_id", "p1"),
+                         {f"Review.{rv.id}": rv})
+
+    def test_reload(self):
+        """The indexes are rebuilt after reload() (lazy and indexed too)"""
+        for mode in ({}, {"lazy": True}, {"indexed": True}):
+            storage = FileStorage(**mode)
+            with patch.object(models, "storage", storage):
+                rv = self.review("p1")
+                self.review("p2")
+                storage.save()
+                storage.lookup("Review", "place_id", "p1")
+                FileStorage._FileStorage__objects = {}
+                storage.reload()
+                found = storage.lookup("Review", "place_id", "p1")
+                self.assertEqual(list(found), [f"Review.{rv.id}"], mode)
+                self.assertEqual(found[f"Review.{rv.id}"].place_id, "p1")
+            FileStorage._FileStorage__objects = {}
+
+
+class TestFileStorage_ordered(unittest.TestCase):
+    """Unittests for testing the sorted indexes of the FileStorage class."""
+
+    def setUp(self):
+        """Init setup for the test"""
+        self.storage = FileStorage()
+        self.patcher = patch.object(models, "storage", self.storage)
+        self.patcher.start()
+        self.places = []
+        for price in (30, 10, 50, 20, 40):
+            pl = classes["Place"]()
+            pl.price_by_night = price
+            self.places.append(pl)
+
+    def tearDown(self) -> None:
+        """Resets FileStorage data."""
+        self.patcher.stop()
+        FileStorage._FileStorage__objects = {}
+        for path in os.listdir():
+            if path.startswith("hbnb."):
+                os.remove(path)
+
+    def prices(self, *args, **kwargs):
+        """Returns the prices of the places returned by ordered()"""
+        return [
+            pl.price_by_night
+            for pl in self.storage.ordered("Place", "price_by_night",
+                                           *args, **kwargs)
+        ]
+
+    def test_not_indexed(self):
+        """Ordering by an attribute that isn't indexed raises a ValueError"""
+        with self.assertRaises(ValueError):
+            self.storage.ordered("Place", "latitude")
+        with self.assertRaises(ValueError):
+            self.storage.ordered("Place", "max_guest", low="many")
+
+    def test_ordered(self):
+        """ordered() supports ranges, reverse order and top-k"""
+        self.assertEqual(self.prices(), [10, 20, 30, 40, 50])
+        self.assertEqual(self.prices(20, 40), [20, 30, 40])
+        self.assertEqual(self.prices(high=25), [10, 20])
+        self.assertEqual(self.prices(low=25, reverse=True), [50, 40, 30])
+        self.assertEqual(self.prices(reverse=True, limit=2), [50, 40])
+        self.assertEqual(self.prices(15, 45, limit=2), [20, 30])
+
+    def test_updates(self):
+        """The index follows the updates (strings included) and deletes"""
+        self.prices()
+        self.places[0].price_by_night = "5"
+        self.places[1].price_by_night = "free"
+        self.storage.delete(self.places[2])
+        pl = classes["Place"]()
+        pl.price_by_night = 45.5
+        self.assertEqual(self.prices(), ["5", 20, 40, 45.5])
+
+    def test_reload(self):
+        """The index is rebuilt after reload()"""
+        self.prices()
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(self.prices(limit=1), [10])
+
+
+class TestFileStorage_geo(unittest.TestCase):
+    """Unittests for testing the geospatial index of the FileStorage class."""
+
+    def setUp(self):
+        """Init setup for the test"""
+        self.storage = FileStorage()
+        self.patcher = patch.object(models, "storage", self.storage)
+        self.patcher.start()
+        self.places = {}
+        for name, lat, lon in (
+            ("cairo", 30.04, 31.24), ("giza", 30.01, 31.21),
+            ("alexandria", 31.2, 29.92), ("paris", 48.86, 2.35),
+        ):
+            pl = classes["Place"]()
+            pl.name, pl.latitude, pl.longitude = name, lat, lon
+            self.places[name] = pl
+
+    def tearDown(self) -> None:
+        """Resets FileStorage data."""
+        self.patcher.stop()
+        FileStorage._FileStorage__objects = {}
+
+    def names(self, found):
+        """Returns the names of the (distance, place) pairs"""
+        return [pl.name for _, pl in found]
+
+    def test_no_index(self):
+        """Classes without coordinates raise a ValueError"""
+        with self.assertRaises(ValueError):
+            self.storage.near("City", 0, 0, km=1)
+        with self.assertRaises(ValueError):
+            self.storage.near("Place", 0, 0)
+        with self.assertRaises(ValueError):
+            self.storage.near("Place", "north", 0, km=1)
+
+    def test_near(self):
+        """near() returns the places within a radius, nearest first"""
+        found = self.storage.near("Place", 30.05, 31.25, km=10)
+        self.assertEqual(self.names(found), ["cairo", "giza"])
+        self.assertLess(found[0][0], found[1][0])
+        found = self.storage.near(classes["Place"], 30.05, 31.25, k=3)
+        self.assertEqual(self.names(found), ["cairo", "giza", "alexandria"])
+        found = self.storage.near("Place", 30.05, 31.25, km=10, k=1)
+        self.assertEqual(self.names(found), ["cairo"])
+
+    def test_box(self):
+        """box() returns the places within a bounding box"""
+        found = self.storage.box("Place", 29, 29, 32, 32)
+        self.assertEqual({pl.name for pl in found},
+                         {"cairo", "giza", "alexandria"})
+
+    def test_updates(self):
+        """The index follows the updates and deletes"""
+        self.storage.near("Place", 0, 0, k=1)
+        self.places["paris"].latitude = "30.05"
+        self.places["paris"].longitude = "31.25"
+        self.storage.delete(self.places["giza"])
+        self.places["cairo"].latitude = "unknown"
+        found = self.storage.near("Place", 30.05, 31.25, km=10)
+        self.assertEqual(self.names(found), ["paris"])
+
+
+class TestFileStorage_text(unittest.TestCase):
+    """Unittests for testing the full-text index of the FileStorage class."""
+
+    def setUp(self):
+        """Init setup for the test"""
+        self.storage = FileStorage()
+        self.patcher = patch.object(models, "storage", self.storage)
+        self.patcher.start()
+        self.places = {}
+        for name, description in (
+            ("loft", "Quiet loft near the river, fast wifi"),
+            ("villa", "Villa with a pool"),
+            ("resort", "Pool, pool and more pool; wifi included"),
+        ):
+            pl = classes["Place"]()
+            pl.name, pl.description = name, description
+            self.places[name] = pl
+
+    def tearDown(self) -> None:
+        """Resets FileStorage data."""
+        self.patcher.stop()
+        FileStorage._FileStorage__objects = {}
+        for path in os.listdir():
+            if path.startswith("hbnb."):
+                os.remove(path)
+
+    def names(self, found):
+        """Returns the names of the (score, place) pairs"""
+        return [pl.name for _, pl in found]
+
+    def reloaded(self):
+        """Returns a new FileStorage reloaded from the files"""
+        storage = FileStorage()
+        self.patcher.stop()
+        self.patcher = patch.object(models, "storage", storage)
+        self.patcher.start()
+        storage.reload()
+        return storage
+
+    def test_no_index(self):
+        """Classes without text attributes raise a ValueError"""
+        with self.assertRaises(ValueError):
+            self.storage.search("City", "cairo")
+        with self.assertRaises(ValueError):
+            self.storage.search("Place", "pool", mode="xor")
+
+    def test_search(self):
+        """search() returns the ranked places holding the terms"""
+        self.assertEqual(
+            set(self.names(self.storage.search("Place", "wifi"))),
+            {"resort", "loft"}
+        )
+        self.assertEqual(
+            self.names(self.storage.search(classes["Place"], "RIVER wifi")),
+            ["loft"]
+        )
+        self.assertEqual(
+            self.names(self.storage.search("Place", "pool river", "or")),
+            ["loft", "resort", "villa"]
+        )
+        self.assertEqual(self.storage.search("Review", "pool"), [])
+
+    def test_updates(self):
+        """The index follows the updates and deletes"""
+        self.storage.search("Place", "pool")
+        self.places["loft"].description = "Loft with a pool"
+        self.storage.delete(self.places["resort"])
+        pl = classes["Place"]()
+        pl.name = "Pool house"
+        self.assertEqual(
+            {p.name for _, p in self.storage.search("Place", "pool")},
+            {"loft", "villa", "Pool house"}
+        )
+        with self.assertRaises(KeyError):
+            with self.storage.batch():
+                self.places["villa"].description = "Villa"
+                self.storage.search("Place", "pool")
+                raise KeyError("rollback")
+        found = self.storage.search("Place", "pool")
+        self.assertIn("villa", self.names(found))
+
+    def test_persisted(self):
+        """The saved index is reused by reload() if the files match"""
+        self.storage.save()
+        self.storage.search("Place", "pool")
+        self.places["villa"].description = "Villa"
+        self.storage.close()
+        self.assertTrue(os.path.exists("hbnb.text.json"))
+        storage = self.reloaded()
+        texts = storage._FileStorage__texts
+        self.assertEqual(len(texts["Place"]), 3)
+        self.assertEqual(self.names(storage.search("Place", "pool")),
+                         ["resort", "villa"])
+
+    def test_outdated(self):
+        """The saved index is rebuilt if the files changed"""
+        self.storage.save()
+        self.storage.search("Place", "pool")
+        self.storage.close()
+        self.places["villa"].description = "Villa"
+        self.storage.save()
+        storage = self.reloaded()
+        self.assertEqual(storage._FileStorage__texts, {})
+        self.assertEqual(self.names(storage.search("Place", "pool")),
+                         ["resort"])
+
+
+class TestFileStorage_columns(unittest.TestCase):
+    """Unittests for testing the columnar store of the FileStorage class."""
+
+    def setUp(self):
+        """Init setup for the test"""
+        self.storage = FileStorage()
+        self.patcher = patch.object(models, "storage", self.storage)
+        self.patcher.start()
+        self.places = []
+        for city_id, price, guest in (
+            ("cairo", 10, 2), ("cairo", 30, 4), ("giza", 20, 6),
+        ):
+            pl = classes["Place"]()
+            pl.city_id, pl.price_by_night, pl.max_guest = city_id, price, guest
+            self.places.append(pl)
+
+    def tearDown(self) -> None:
+        """Resets FileStorage data."""
+        self.patcher.stop()
+        FileStorage._FileStorage__objects = {}
+
+    def test_no_store(self):
+        """Classes without numeric attributes raise a ValueError"""
+        with self.assertRaises(ValueError):
+            self.storage.columns("City")
+
+    def test_aggregate(self):
+        """The columns aggregate the places, grouped by a foreign key"""
+        columns = self.storage.columns(classes["Place"])
+        self.assertEqual(columns.aggregate("sum", "price_by_night"), 60)
+        self.assertEqual(
+            columns.aggregate("mean", "price_by_night", by="city_id"),
+            {"cairo": 20, "giza": 20}
+        )
+        self.assertEqual(
+            columns.aggregate("max", "max_guest", by="city_id",
+                              where=[("price_by_night", "<", 25)]),
+            {"cairo": 2, "giza": 6}
+        )
+        self.assertEqual(
+            columns.keys([("city_id", "=", "giza")]),
+            [f"Place.{self.places[2].id}"]
+        )
+
+    def test_updates(self):
+        """The columns follow the updates, deletes and rollbacks"""
+        self.storage.columns("Place")
+        self.places[0].price_by_night = "50"
+        self.places[1].price_by_night = "unknown"
+        self.storage.delete(self.places[2])
+        classes["Place"]().city_id = "giza"
+        with self.assertRaises(KeyError):
+            with self.storage.batch():
+                self.places[0].city_id = "giza"
+                self.storage.columns("Place")
+                raise KeyError("rollback")
+        columns = self.storage.columns("Place")
+        self.assertEqual(len(columns), 3)
+        self.assertEqual(
+            columns.aggregate("sum", "price_by_night", by="city_id"),
+            {"cairo": 50, "giza": 0}
+        )
+        self.assertEqual(columns.aggregate("count", by="city_id"),
+                         {"cairo": 2, "giza": 1})
+
+
+class TestFileStorage_journal(unittest.TestCase):
+    """Unittests for testing the journal mode of the FileStorage class."""
+
+    def setUp(self):
+        """Init setup for the test"""
+        self.path = FileStorage._FileStorage__file_path
+        self.log_path = f"{self.path}.log"
+        self.storage = FileStorage(journal=True)
+        self.patcher = patch.object(models, "storage", self.storage)
+        self.patcher.start()
+
+    def tearDown(self) -> None:
+        """Resets FileStorage data."""
+        self.patcher.stop()
+        FileStorage._FileStorage__objects = {}
+        for path in (self.path, self.log_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_save_appends_to_journal(self):
+        """save() appends one record per change and keeps the JSON file"""
+        us = classes["User"]()
+        us.save()
+        self.assertFalse(os.path.exists(self.path))
+        with open(self.log_path) as f:
+            lines = f.readlines()
+        self.assertEqual(len(lines), 1)
+        self.assertIn(f"User.{us.id}", lines[0])
+        us.first_name = "Betty"
+        us.save()
+        self.storage.delete(us)
+        self.storage.save()
+        with open(self.log_path) as f:
+            self.assertEqual(len(f.readlines()), 3)
+
+    def test_reload_replays_journal(self):
+        """reload() applies the journal on top of the JSON file"""
+        us = classes["User"]()
+        st = classes["State"]()
+        self.storage.compact()
+        us.first_name = "Betty"
+        us.save()
+        self.storage.delete(st)
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        objs = self.storage.all()
+        self.assertNotIn(f"State.{st.id}", objs)
+        self.assertEqual(objs[f"User.{us.id}"].first_name, "Betty")
+
+    def test_reload_ignores_partial_record(self):
+        """A truncated last journal record is dropped on reload()"""
+        us = classes["User"]()
+        us.save()
+        with open(self.log_path, "a") as f:
+            f.write('{"op": "set", "key": "User.1", "ob')
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertIn(f"User.{us.id}", self.storage.all())
+        self.assertNotIn("User.1", self.storage.all())
+
+    def test_writes_after_partial_record(self):
+        """The records saved after a crash survive the next reload()"""
+        for codec in ("json", get_codec("pickle", trusted=True)):
+            storage = FileStorage(journal=True, codec=codec)
+            log_path = storage._FileStorage__journal_path
+            with patch.object(models, "storage", storage):
+                users = [classes["User"]()]
+                storage.save()
+                with open(log_path, "ab") as f:
+                    f.write(b'{"op": "set", "key": "User.1", "ob')
+                FileStorage._FileStorage__objects = {}
+                storage.reload()
+                users += [classes["User"](), classes["User"]()]
+                storage.save()
+                FileStorage._FileStorage__objects = {}
+                storage.reload()
+                self.assertEqual(
+                    set(storage.all()), {f"User.{us.id}" for us in users},
+                    codec
+                )
+            os.remove(log_path)
+            FileStorage._FileStorage__objects = {}
+
+    def test_save_in_place_changes(self):
+        """Only the instances modified in place are appended"""
+        pl = classes["Place"]()
+        pl.amenity_ids = []
+        classes["User"]().save()
+        pl.amenity_ids.append("a")
+        self.storage.save()
+        with open(self.log_path) as f:
+            lines = f.readlines()
+        self.assertEqual(len(lines), 3)
+        self.assertIn(pl.id, lines[-1])
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(self.storage.get("Place", pl.id).amenity_ids, ["a"])
+
+    def test_compact(self):
+        """compact() folds the journal back into the JSON file"""
+        us = classes["User"]()
+        us.save()
+        self.storage.compact()
+        self.assertFalse(os.path.exists(self.log_path))
+        with open(self.path) as f:
+            self.assertIn(f"User.{us.id}", f.read())
+
+
+class TestFileStorage_dirty(unittest.TestCase):
+    """Unittests for testing the dirty tracking of the FileStorage class."""
+
+    def tearDown(self) -> None:
+        """Resets FileStorage data."""
+        FileStorage._FileStorage__objects = {}
+        if os.path.exists(FileStorage._FileStorage__file_path):
+            os.remove(FileStorage._FileStorage__file_path)
+
+    def count_encodings(self):
+        """Returns the number of records encoded by save()"""
+        codec = models.storage._FileStorage__codec
+        with patch.object(
+            codec, "encode", wraps=codec.encode
+        ) as mock:
+            models.storage.save()
+        return mock.call_count
+
+    def test_save_encodes_only_modified(self):
+        """Unchanged instances are written from the cached encoding"""
+        objs = [classes["User"]() for _ in range(5)]
+        self.assertEqual(self.count_encodings(), 5)
+        self.assertEqual(self.count_encodings(), 0)
+        objs[0].first_name = "Betty"
+        setattr(objs[1], "last_name", "Holberton")
+        self.assertEqual(self.count_encodings(), 2)
+        with open("hbnb.json") as f:
+            text = f.read()
+        self.assertIn("Betty", text)
+        self.assertIn("Holberton", text)
+        self.assertEqual(len(json.loads(text)), 5)
+
+    def test_save_deleted_attribute(self):
+        """Deleting an attribute drops it on the next save"""
+        us = classes["User"]()
+        us.first_name = "Betty"
+        models.storage.save()
+        del us.first_name
+        self.assertEqual(self.count_encodings(), 1)
+        with open("hbnb.json") as f:
+            self.assertNotIn("Betty", f.read())
+
+    def test_save_drops_deleted(self):
+        """Deleted instances are no longer written"""
+        us = classes["User"]()
+        models.storage.save()
+        models.storage.delete(us)
+        self.assertEqual(self.count_encodings(), 0)
+        with open("hbnb.json") as f:
+            self.assertNotIn(us.id, f.read())
+
+    def test_save_in_place_changes(self):
+        """Lists modified in place are written on the next save()"""
+        storage = FileStorage()
+        with patch.object(models, "storage", storage):
+            pl = classes["Place"]()
+            pl.amenity_ids = ["a"]
+            classes["User"]()
+            storage.save()
+            storage.reload()
+            pl = storage.get("Place", pl.id)
+            storage.save()
+            pl.amenity_ids.append("b")
+            self.assertEqual(self.count_encodings(), 1)
+            storage.reload()
+            self.assertEqual(storage.get("Place", pl.id).amenity_ids,
+                             ["a", "b"])
+
+    def test_touch_unregistered(self):
+        """Instances that are not stored are not tracked"""
+        us = classes["User"]()
+        copy = classes["User"](**us.to_dict())
+        self.assertEqual(self.count_encodings(), 1)
+        copy.first_name = "Betty"
+        self.assertEqual(self.count_encodings(), 0)
+
+
+class TestFileStorage_sharded(unittest.TestCase):
+    """Unittests for testing the sharded mode of the FileStorage class."""
+
+    def setUp(self):
+        """Init setup for the test"""
+        self.storage = FileStorage(sharded=True)
+        self.patcher = patch.object(models, "storage", self.storage)
+        self.patcher.start()
+
+    def tearDown(self) -> None:
+        """Resets FileStorage data."""
+        self.patcher.stop()
+        FileStorage._FileStorage__objects = {}
+        for name in classes:
+            if os.path.exists(f"hbnb.{name}.json"):
+                os.remove(f"hbnb.{name}.json")
+
+    def test_sharded_with_journal(self):
+        """Sharded and journal modes can't be combined"""
+        with self.assertRaises(ValueError):
+            FileStorage(journal=True, sharded=True)
+
+    def test_save_writes_modified_shards(self):
+        """save() only rewrites the files of the modified classes"""
+        us = classes["User"]()
+        st = classes["State"]()
+        self.storage.save()
+        self.assertTrue(os.path.exists("hbnb.User.json"))
+        self.assertTrue(os.path.exists("hbnb.State.json"))
+        self.assertFalse(os.path.exists("hbnb.json"))
+        os.remove("hbnb.State.json")
+        us.first_name = "Betty"
+        self.storage.save()
+        self.assertFalse(os.path.exists("hbnb.State.json"))
+        with open("hbnb.User.json") as f:
+            self.assertIn("Betty", f.read())
+
+    def test_reload_loads_on_demand(self):
+        """reload() defers loading a class file until it is accessed"""
+        us = classes["User"]()
+        st = classes["State"]()
+        self.storage.save()
+        self.storage.reload()
+        self.assertEqual(self.storage._FileStorage__objects, {})
+        self.assertEqual(self.storage.get("User", us.id).id, us.id)
+        self.assertNotIn(f"State.{st.id}", self.storage._FileStorage__objects)
+        self.assertIn(f"State.{st.id}", self.storage.all())
+
+    def test_save_keeps_unloaded_instances(self):
+        """Saving a class before loading its file keeps the stored ones"""
+        us = classes["User"]()
+        self.storage.save()
+        self.storage.reload()
+        other = classes["User"]()
+        self.storage.save()
+        self.storage.reload()
+        self.assertIsNotNone(self.storage.get("User", us.id))
+        self.assertIsNotNone(self.storage.get("User", other.id))
+
+
+class TestFileStorage_lazy(unittest.TestCase):
+    """Unittests for testing the lazy mode of the FileStorage class."""
+
+    def setUp(self):
+        """Init setup for the test"""
+        self.storage = FileStorage(lazy=True)
+        self.patcher = patch.object(models, "storage", self.storage)
+        self.patcher.start()
+        self.us = classes["User"]()
+        self.st = classes["State"]()
+        self.storage.save()
+        self.storage.reload()
+
+    def tearDown(self) -> None:
+        """Resets FileStorage data."""
+        self.patcher.stop()
+        FileStorage._FileStorage__objects = {}
+        if os.path.exists("hbnb.json"):
+            os.remove("hbnb.json")
+
+    def test_reload_builds_nothing(self):
+        """reload() keeps the deserialized dictionaries"""
+        self.assertEqual(self.storage._FileStorage__objects, {})
+
+    def test_get_builds_one(self):
+        """get() only builds the requested instance"""
+        us = self.storage.get("User", self.us.id)
+        self.assertIsInstance(us, classes["User"])
+        self.assertEqual(us.created_at, self.us.created_at)
+        self.assertIs(self.storage.get(classes["User"], self.us.id), us)
+        self.assertEqual(list(self.storage._FileStorage__objects),
+                         [f"User.{us.id}"])
+
+    def test_all_builds_all(self):
+        """all() builds every instance"""
+        objs = self.storage.all()
+        self.assertIsInstance(objs[f"State.{self.st.id}"], classes["State"])
+        self.assertIsInstance(objs[f"User.{self.us.id}"], classes["User"])
+
+    def test_save_keeps_unbuilt(self):
+        """save() writes the instances that were never built"""
+        us = self.storage.get("User", self.us.id)
+        us.first_name = "Betty"
+        us.save()
+        with open("hbnb.json") as f:
+            _dict = json.load(f)
+        self.assertIn(f"State.{self.st.id}", _dict)
+        self.assertEqual(_dict[f"User.{us.id}"]["first_name"], "Betty")
+
+
+class TestFileStorage_indexed(unittest.TestCase):
+    """Unittests for testing the indexed mode of the FileStorage class."""
+
+    def setUp(self):
+        """Init setup for the test"""
+        self.remove_files()
+        self.storage = FileStorage(indexed=True)
+        self.patcher = patch.object(models, "storage", self.storage)
+        self.patcher.start()
+        self.us = classes["User"]()
+        self.st = classes["State"]()
+        self.storage.save()
+        self.storage.reload()
+
+    def tearDown(self) -> None:
+        """Resets FileStorage data."""
+        self.patcher.stop()
+        FileStorage._FileStorage__objects = {}
+        self.remove_files()
+
+    @staticmethod
+    def remove_files():
+        """Removes the lines file and its index."""
+        for path in ("hbnb.jsonl", "hbnb.jsonl.idx",
+                     "hbnb.jsonl.new", "hbnb.jsonl.idx.new"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_exclusive_modes(self):
+        """Indexed mode can't be combined with journal or sharded modes"""
+        with self.assertRaises(ValueError):
+            FileStorage(journal=True, indexed=True)
+        with self.assertRaises(ValueError):
+            FileStorage(sharded=True, indexed=True)
+
+    def test_files(self):
+        """save() writes one line per instance and the index"""
+        with open("hbnb.jsonl") as f:
+            lines = f.readlines()
+        with open("hbnb.jsonl.idx") as f:
+            index = json.load(f)
+        self.assertEqual(len(lines), 2)
+        offset, length = index[f"User.{self.us.id}"]
+        with open("hbnb.jsonl", "rb") as f:
+            f.seek(offset)
+            self.assertEqual(json.loads(f.read(length))["id"], self.us.id)
+
+    def test_get_reads_one_line(self):
+        """get() only builds the requested instance"""
+        us = self.storage.get("User", self.us.id)
+        self.assertEqual(us.to_dict(), self.us.to_dict())
+        self.assertEqual(list(self.storage._FileStorage__objects),
+                         [f"User.{us.id}"])
+        self.assertIsNone(self.storage.get("User", "123"))
+
+    def test_save_appends(self):
+        """save() appends the modified instances and updates the index"""
+        us = self.storage.get("User", self.us.id)
+        us.first_name = "Betty"
+        us.save()
+        st = self.storage.get("State", self.st.id)
+        self.storage.delete(st)
+        self.storage.save()
+        with open("hbnb.jsonl") as f:
+            self.assertEqual(len(f.readlines()), 3)
+        self.storage.reload()
+        self.assertEqual(
+            self.storage.get("User", self.us.id).first_name, "Betty"
+        )
+        self.assertIsNone(self.storage.get("State", self.st.id))
+        self.assertEqual(len(self.storage.all()), 1)
+
+    def test_save_appends_index(self):
+        """save() appends the changed positions to the index"""
+        us = self.storage.get("User", self.us.id)
+        us.first_name = "Betty"
+        us.save()
+        with open("hbnb.jsonl.idx") as f:
+            lines = f.readlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(list(json.loads(lines[1])), [f"User.{us.id}"])
+        with open("hbnb.jsonl.idx", "a") as f:
+            f.write('{"User.1": [0, ')
+        self.storage.reload()
+        self.assertEqual(
+            self.storage.get("User", self.us.id).first_name, "Betty"
+        )
+        self.assertNotIn("User.1", self.storage.all())
+        us = self.storage.get("User", self.us.id)
+        us.first_name = "Holberton"
+        us.save()
+        self.storage.close()
+        with open("hbnb.jsonl.idx") as f:
+            self.assertEqual(len(f.readlines()), 1)
+        self.storage.reload()
+        self.assertEqual(
+            self.storage.get("User", self.us.id).first_name, "Holberton"
+        )
+        self.assertEqual(len(self.storage.all()), 2)
+
+    def test_compact(self):
+        """compact() drops the stale lines"""
+        us = self.storage.get("User", self.us.id)
+        us.first_name = "Betty"
+        us.save()
+        self.storage.compact()
+        with open("hbnb.jsonl") as f:
+            self.assertEqual(len(f.readlines()), 2)
+        self.storage.reload()
+        self.assertEqual(
+            self.storage.get("User", self.us.id).first_name, "Betty"
+        )
+        self.assertIsNotNone(self.storage.get("State", self.st.id))
+
+    def crash_compact(self, path):
+        """Runs compact() with a crash before (path) is switched"""
+        replace = os.replace
+
+        def crash(src, dst):
+            if src == path:
+                raise KeyboardInterrupt
+            replace(src, dst)
+        us = self.storage.get("User", self.us.id)
+        us.first_name = "Betty"
+        us.save()
+        with patch("os.replace", side_effect=crash):
+            with self.assertRaises(KeyboardInterrupt):
+                self.storage.compact()
+        storage = FileStorage(indexed=True)
+        storage.reload()
+        self.assertEqual(
+            set(storage.all()),
+            {f"User.{self.us.id}", f"State.{self.st.id}"}
+        )
+        self.assertEqual(storage.get("User", self.us.id).first_name, "Betty")
+        self.assertFalse(os.path.exists("hbnb.jsonl.new"))
+        self.assertFalse(os.path.exists("hbnb.jsonl.idx.new"))
+        return storage
+
+    def test_crash_before_lines_switch(self):
+        """A crash before the compacted lines are switched keeps the
+        previous lines and index"""
+        self.crash_compact("hbnb.jsonl.new")
+        with open("hbnb.jsonl") as f:
+            self.assertEqual(len(f.readlines()), 3)
+
+    def test_crash_before_index_switch(self):
+        """A crash between the switch of the compacted lines and the one
+        of their index is completed by reload()"""
+        self.crash_compact("hbnb.jsonl.idx.new")
+        with open("hbnb.jsonl") as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+    def test_crash_leftover_lines(self):
+        """The compacted lines left by a crash before their switch are
+        dropped by reload()"""
+        with open("hbnb.jsonl.new", "w") as f:
+            f.write('{"__class__": "User", "id": "1"}\n')
+        with open("hbnb.jsonl.idx.new", "w") as f:
+            f.write('{"User.1": [0, 33]}\n')
+        storage = FileStorage(indexed=True)
+        storage.reload()
+        self.assertEqual(
+            set(storage.all()),
+            {f"User.{self.us.id}", f"State.{self.st.id}"}
+        )
+        self.assertFalse(os.path.exists("hbnb.jsonl.new"))
+        self.assertFalse(os.path.exists("hbnb.jsonl.idx.new"))
+
+
+class TestFileStorage_batch(unittest.TestCase):
+    """Unittests for testing the batch() method of the FileStorage class."""
+
+    def tearDown(self) -> None:
+        """Resets FileStorage data."""
+        FileStorage._FileStorage__objects = {}
+        if os.path.exists("hbnb.json"):
+            os.remove("hbnb.json")
+
+    def test_batch_saves_once(self):
+        """The saves made inside a batch are coalesced into one"""
+        write = models.storage._FileStorage__write_file
+        with patch.object(models.storage, "_FileStorage__write_file",
+                          wraps=write) as mock:
+            with models.storage.batch():
+                objs = [classes["State"]() for _ in range(10)]
+                for obj in objs:
+                    obj.save()
+                with models.storage.transaction():
+                    objs[0].save()
+                self.assertEqual(mock.call_count, 0)
+                self.assertFalse(os.path.exists("hbnb.json"))
+        self.assertEqual(mock.call_count, 1)
+        with open("hbnb.json") as f:
+            self.assertEqual(len(json.load(f)), 10)
+
+    def test_batch_rollback(self):
+        """The changes made inside a failed batch are rolled back"""
+        us = classes["User"]()
+        us.first_name = "Betty"
+        gone = classes["User"]()
+        models.storage.save()
+        with self.assertRaises(ZeroDivisionError):
+            with models.storage.batch():
+                st = classes["State"]()
+                us.first_name = "Holberton"
+                us.last_name = "School"
+                models.storage.delete(gone)
+                us.save()
+                1 / 0
+        objs = models.storage.all()
+        self.assertNotIn(f"State.{st.id}", objs)
+        self.assertIs(objs[f"User.{gone.id}"], gone)
+        self.assertEqual(us.first_name, "Betty")
+        self.assertNotIn("last_name", us.__dict__)
+        with open("hbnb.json") as f:
+            self.assertNotIn("Holberton", f.read())
+
+
+class TestFileStorage_write_behind(unittest.TestCase):
+    """Unittests for testing the write-behind mode of the FileStorage class."""
+
+    def setUp(self):
+        """Init setup for the test"""
+        self.storage = FileStorage(write_behind=0.05, write_behind_changes=5)
+        self.patcher = patch.object(models, "storage", self.storage)
+        self.patcher.start()
+
+    def tearDown(self) -> None:
+        """Resets FileStorage data."""
+        self.storage.close()
+        self.patcher.stop()
+        FileStorage._FileStorage__objects = {}
+        if os.path.exists("hbnb.json"):
+            os.remove("hbnb.json")
+
+    def read(self):
+        """Returns the content of the JSON file"""
+        with open("hbnb.json") as f:
+            return json.load(f)
+
+    def test_save_is_deferred(self):
+        """save() returns before the file is written"""
+        self.storage = FileStorage(write_behind=10)
+        with patch.object(models, "storage", self.storage):
+            us = classes["User"]()
+            us.save()
+            self.assertFalse(os.path.exists("hbnb.json"))
+            self.storage.close()
+        self.assertIn(f"User.{us.id}", self.read())
+
+    def test_window_coalesces_saves(self):
+        """The saves of one window are written at once"""
+        write = self.storage._FileStorage__write_file
+        with patch.object(self.storage, "_FileStorage__write_file",
+                          wraps=write) as mock:
+            for _ in range(3):
+                classes["User"]().save()
+            time.sleep(0.3)
+        self.assertEqual(mock.call_count, 1)
+        self.assertEqual(len(self.read()), 3)
+
+    def test_changes_end_window(self):
+        """Reaching write_behind_changes ends the window early"""
+        self.storage = FileStorage(write_behind=10, write_behind_changes=5)
+        with patch.object(models, "storage", self.storage):
+            for _ in range(5):
+                classes["User"]().save()
+            for _ in range(50):
+                if os.path.exists("hbnb.json"):
+                    break
+                time.sleep(0.02)
+            self.assertEqual(len(self.read()), 5)
+            self.storage.close()
+
+    def test_close_flushes(self):
+        """close() writes the queued saves"""
+        us = classes["User"]()
+        us.save()
+        self.storage.close()
+        self.assertIn(f"User.{us.id}", self.read())
+
+    def test_write_unlocked(self):
+        """The storage isn't locked while the files are written"""
+        writing, release = threading.Event(), threading.Event()
+        dump = self.storage._FileStorage__dump
+
+        def slow_dump(path, items):
+            writing.set()
+            release.wait(5)
+            dump(path, items)
+
+        us = classes["User"]()
+        with patch.object(self.storage, "_FileStorage__dump", slow_dump):
+            us.save()
+            self.assertTrue(writing.wait(5))
+            reader = threading.Thread(
+                target=self.storage.get, args=("User", us.id)
+            )
+            reader.start()
+            reader.join(1)
+            self.assertFalse(reader.is_alive())
+            release.set()
+            self.storage.close()
+        self.assertIn(f"User.{us.id}", self.read())
+
+
+class TestFileStorage_durability(unittest.TestCase):
+    """Unittests for testing the durability of the FileStorage class."""
+
+    def tearDown(self) -> None:
+        """Resets FileStorage data."""
+        FileStorage._FileStorage__objects = {}
+        for path in ("hbnb.json", "hbnb.json.tmp", "hbnb.json.log"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_unknown_durability(self):
+        """An unknown durability level raises a ValueError"""
+        with self.assertRaises(ValueError):
+            FileStorage(durability="always")
+
+    def test_failed_save_keeps_file(self):
+        """A failed save() leaves the previous JSON file intact"""
+        us = classes["User"]()
+        models.storage.save()
+        with open("hbnb.json") as f:
+            before = f.read()
+        classes["User"]()
+        with patch("os.replace", side_effect=OSError):
+            with self.assertRaises(OSError):
+                models.storage.save()
+        with open("hbnb.json") as f:
+            self.assertEqual(f.read(), before)
+        self.assertFalse(os.path.exists("hbnb.json.tmp"))
+
+    def test_fsync(self):
+        """The fsync durability levels call os.fsync"""
+        expected = {"none": 0, "flush": 0, "fsync-file": 1, "fsync-dir": 2}
+        for durability, calls in expected.items():
+            storage = FileStorage(durability=durability)
+            with patch.object(models, "storage", storage):
+                classes["User"]()
+                with patch("os.fsync") as mock:
+                    storage.save()
+                self.assertEqual(mock.call_count, calls, durability)
+
+    def test_fsync_journal(self):
+        """Journal appends are synced as well"""
+        storage = FileStorage(journal=True, durability="fsync-file")
+        with patch.object(models, "storage", storage):
+            classes["User"]()
+            with patch("os.fsync") as mock:
+                storage.save()
+            self.assertEqual(mock.call_count, 1)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+"""Defines unittests for the `geo.py` module"""
+import random
+import unittest
+from models.engine.geo import GridIndex, distance, bounds
+
+
+class TestGeo(unittest.TestCase):
+    """Unittests for testing the GridIndex class."""
+
+    def setUp(self):
+        """Init setup for the test"""
+        rand = random.Random(0)
+        self.points = {
+            f"p{i}": (rand.uniform(-89, 89), rand.uniform(-180, 180))
+            for i in range(2000)
+        }
+        self.grid = GridIndex(cell=1)
+        for key, point in self.points.items():
+            self.grid.add(key, *point)
+
+    def test_distance(self):
+        """distance() returns the great-circle distance in km"""
+        self.assertAlmostEqual(distance(0, 0, 0, 1), 111.195, places=2)
+        self.assertAlmostEqual(distance(0, 179.5, 0, -179.5), 111.195,
+                               places=2)
+        self.assertAlmostEqual(distance(30, 31, 30, 31), 0)
+
+    def test_bounds(self):
+        """bounds() wraps around the antimeridian and the poles"""
+        south, west, north, east = bounds(0, 179.9, 50)
+        self.assertGreater(west, east)
+        self.assertEqual(bounds(89.9, 0, 50)[1:4:2], (-180, 180))
+
+    def test_near(self):
+        """near() matches a linear scan"""
+        for lat, lon, km in ((0, 0, 1500), (60, 179, 900), (-88, 10, 700)):
+            expected = sorted(
+                (distance(lat, lon, *point), key)
+                for key, point in self.points.items()
+                if distance(lat, lon, *point) <= km
+            )
+            self.assertEqual(self.grid.near(lat, lon, km), expected)
+
+    def test_nearest(self):
+        """nearest() returns the k nearest points"""
+        expected = sorted(
+            (distance(10, -170, *point), key)
+            for key, point in self.points.items()
+        )[:5]
+        self.assertEqual(self.grid.nearest(10, -170, 5), expected)
+        self.assertEqual(len(self.grid.nearest(0, 0, 5000)), 2000)
+
+    def test_box(self):
+        """box() handles the boxes crossing the antimeridian"""
+        found = set(self.grid.box(-10, 170, 10, -170))
+        expected = {
+            key for key, (lat, lon) in self.points.items()
+            if -10 <= lat <= 10 and (lon >= 170 or lon <= -170)
+        }
+        self.assertEqual(found, expected)
+
+    def test_move_remove(self):
+        """add() moves an indexed point and remove() drops it"""
+        self.grid.add("p0", 0.5, 0.5)
+        self.assertEqual(self.grid.nearest(0.5, 0.5, 1)[0][1], "p0")
+        self.grid.remove("p0")
+        self.grid.remove("p0")
+        self.assertEqual(len(self.grid), 1999)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+#!/usr/bin/python3
+"""Defines unittests for the `query.py` module"""
+import models
+import unittest
+from unittest.mock import patch
+from models import FileStorage
+from models import classes
+from models.engine.query import Query
+
+
+class TestQuery(unittest.TestCase):
+    """Unittests for testing the Query class."""
+
+    def setUp(self):
+        """Init setup for the test"""
+        self.storage = FileStorage()
+        self.patcher = patch.object(models, "storage", self.storage)
+        self.patcher.start()
+        self.places = {}
+        for name, city_id, price, amenity_ids in (
+            ("loft", "cairo", 80, ["wifi"]),
+            ("villa", "cairo", 300, ["wifi", "pool"]),
+            ("studio", "giza", 45, []),
+            ("cabin", "giza", 120, ["fireplace"]),
+            ("tent", "siwa", 10, []),
+        ):
+            pl = classes["Place"]()
+            pl.name, pl.city_id = name, city_id
+            pl.price_by_night, pl.amenity_ids = price, amenity_ids
+            self.places[name] = pl
+
+    def tearDown(self) -> None:
+        """Resets FileStorage data."""
+        self.patcher.stop()
+        FileStorage._FileStorage__objects = {}
+
+    def query(self):
+        """Returns a new Place query"""
+        return Query(self.storage, "Place")
+
+    def names(self, query):
+        """Returns the names of the places selected by (query)"""
+        return [pl.name for pl in query]
+
+    def test_invalid(self):
+        """Unknown operators and non-number bounds raise a ValueError"""
+        with self.assertRaises(ValueError):
+            self.query().where("name", "~", "loft")
+        with self.assertRaises(ValueError):
+            self.query().where("price_by_night", "<", "cheap")
+        with self.assertRaises(TypeError):
+            Query(self.storage, 1)
+
+    def test_lookup(self):
+        """An equality on a secondary index is read from the index"""
+        query = self.query().where("city_id", "=", "cairo") \
+            .where("price_by_night", ">", 100)
+        self.assertEqual(self.names(query), ["villa"])
+        plan = query.explain()
+        self.assertEqual(plan["access"], "lookup")
+        self.assertEqual(plan["index"], "Place.city_id")
+        self.assertEqual((plan["examined"], plan["returned"]), (2, 1))
+        query = self.query().where("city_id", "in", ["giza", "siwa"])
+        self.assertEqual(set(self.names(query)), {"studio", "cabin", "tent"})
+        self.assertEqual(query.explain()["access"], "lookup")
+
+    def test_range(self):
+        """Bounds on a sorted index are read from the index, in order"""
+        query = self.query().where("price_by_night", ">=", 45) \
+            .where("price_by_night", "<", "300") \
+            .order_by("price_by_night", reverse=True)
+        self.assertEqual(self.names(query), ["cabin", "loft", "studio"])
+        plan = query.explain()
+        self.assertEqual(plan["access"], "range")
+        self.assertEqual((plan["low"], plan["high"]), (45, 300))
+        self.assertEqual(plan["order"], "index")
+        self.assertEqual(plan["examined"], 4)
+        query = self.query().where("price_by_night", "<=", 1000).limit(2)
+        self.assertEqual(self.names(query), ["tent", "studio"])
+        self.assertEqual(query.explain()["examined"], 2)
+
+    def test_scan(self):
+        """Other predicates scan the partition of the class"""
+        self.storage.new(classes["City"]())
+        query = self.query().where("amenity_ids", "contains", "wifi") \
+            .where("name", "!=", "loft")
+        self.assertEqual(self.names(query), ["villa"])
+        plan = query.explain()
+        self.assertEqual((plan["access"], plan["index"]), ("scan", None))
+        self.assertEqual(plan["examined"], 5)
+        query = self.query().where("name", "contains", "o")
+        self.assertEqual(set(self.names(query)), {"loft", "studio"})
+
+    def test_order_limit_fields(self):
+        """Queries are ordered, limited and projected"""
+        self.places["tent"].name = None
+        query = self.query().order_by("name")
+        self.assertEqual(self.names(query),
+                         ["cabin", "loft", "studio", "villa", None])
+        query = self.query().order_by("name", reverse=True).limit(2)
+        self.assertEqual(self.names(query), ["villa", "studio"])
+        query = self.query().where("city_id", "=", "giza") \
+            .order_by("price_by_night").fields("name", "price_by_night")
+        self.assertEqual(query.all(), [
+            {"name": "studio", "price_by_night": 45},
+            {"name": "cabin", "price_by_night": 120},
+        ])
+        self.assertEqual(query.explain()["order"], "sort")
+
+    def test_stream(self):
+        """Matches are yielded as they are found"""
+        query = iter(self.query().where("price_by_night", ">", 0))
+        self.assertEqual(next(query).name, "tent")
+        self.assertEqual(next(query).name, "studio")
+
+    def test_aggregate(self):
+        """aggregate() reads the partition, the columns or the instances"""
+        query = self.query()
+        self.assertEqual(query.aggregate("count"), 5)
+        self.assertEqual(query.aggregated, "partition")
+        self.assertEqual(query.aggregate("sum", "price_by_night"), 555)
+        self.assertEqual(query.aggregated, "columns")
+        self.assertEqual(query.aggregate("distinct", "city_id"), 3)
+        self.assertEqual(query.aggregated, "hash")
+        query = self.query().where("name", "!=", "tent")
+        self.assertEqual(query.aggregate("min", "price_by_night"), 45)
+        self.assertEqual(query.aggregated, "hash")
+        query = self.query().where("price_by_night", ">", 500)
+        self.assertEqual(query.aggregate("count"), 0)
+        self.assertIsNone(query.aggregate("avg", "price_by_night"))
+        with self.assertRaises(ValueError):
+            query.aggregate("median", "price_by_night")
+        with self.assertRaises(ValueError):
+            query.aggregate("sum")
+
+    def test_aggregate_groups(self):
+        """aggregate() groups by one or several attributes"""
+        query = self.query().where("price_by_night", ">=", 40)
+        self.assertEqual(
+            query.aggregate("avg", "price_by_night", by="city_id"),
+            {"cairo": 190, "giza": 82.5}
+        )
+        self.assertEqual(query.aggregated, "columns")
+        self.assertEqual(
+            query.aggregate("max", "name", by=("city_id", "user_id")), {}
+        )
+        self.assertEqual(
+            query.aggregate("count", "name", by=["city_id", "user_id"]),
+            {("cairo", ""): 2, ("giza", ""): 2}
+        )
+        self.assertEqual(query.aggregated, "hash")
+        self.assertEqual(
+            self.query().aggregate("distinct", "amenity_ids", by="city_id"),
+            {"cairo": 2, "giza": 2, "siwa": 1}
+        )
+        for by in ("colour", ["city_id", "colour"], [], [None], 3):
+            with self.assertRaises(ValueError):
+                query.aggregate("count", by=by)
+        self.places["loft"].colour = "red"
+        self.assertEqual(self.query().aggregate("count", by="colour"),
+                         {"red": 1, None: 4})
+
+    def test_aggregate_cache(self):
+        """Aggregates are cached until the storage changes"""
+        query = self.query().where("city_id", "=", "cairo")
+        self.assertEqual(query.aggregate("max", "price_by_night"), 300)
+        found = query.aggregate("count", by="city_id")
+        found["cairo"] = 0
+        self.assertEqual(query.aggregate("count", by="city_id"),
+                         {"cairo": 2})
+        self.assertEqual(query.aggregated, "cache")
+        self.places["villa"].price_by_night = 60
+        self.assertEqual(query.aggregate("max", "price_by_night"), 80)
+        self.assertEqual(query.aggregated, "columns")
+        self.storage.delete(self.places["loft"])
+        self.assertEqual(query.aggregate("count", by="city_id"),
+                         {"cairo": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
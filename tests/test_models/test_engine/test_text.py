@@ -0,0 +1,68 @@
+#!/usr/bin/python3
+"""Defines unittests for the `text.py` module"""
+import json
+import unittest
+from models.engine.text import TextIndex, tokenize
+
+
+class TestText(unittest.TestCase):
+    """Unittests for testing the TextIndex class."""
+
+    def setUp(self):
+        """Init setup for the test"""
+        self.index = TextIndex()
+        self.index.add("a", "Quiet loft near the river, fast wifi")
+        self.index.add("b", "Loft with a pool")
+        self.index.add("c", "Pool, pool and more pool; wifi included")
+        self.index.add("d", "")
+
+    def keys(self, found):
+        """Returns the keys of the (score, key) pairs"""
+        return [key for _, key in found]
+
+    def test_tokenize(self):
+        """tokenize() returns the lowercase words"""
+        self.assertEqual(tokenize("Fast WiFi, café!"),
+                         ["fast", "wifi", "café"])
+        self.assertEqual(tokenize(None), [])
+
+    def test_and(self):
+        """An and search returns the documents holding every term"""
+        self.assertEqual(self.keys(self.index.search("loft wifi")), ["a"])
+        self.assertEqual(self.index.search("loft sauna"), [])
+        self.assertEqual(self.index.search(""), [])
+
+    def test_or(self):
+        """An or search returns the documents holding any term, ranked"""
+        found = self.index.search("pool wifi", mode="or")
+        self.assertEqual(self.keys(found), ["c", "b", "a"])
+        self.assertGreater(found[0][0], found[1][0])
+        self.assertEqual(
+            self.keys(self.index.search("pool wifi", "or", limit=1)), ["c"]
+        )
+        with self.assertRaises(ValueError):
+            self.index.search("pool", mode="xor")
+
+    def test_updates(self):
+        """add() replaces a document and remove() drops it"""
+        self.index.add("a", "Sunny studio")
+        self.index.remove("c")
+        self.index.remove("unknown")
+        self.assertEqual(self.keys(self.index.search("wifi")), [])
+        self.assertEqual(self.keys(self.index.search("pool")), ["b"])
+        self.assertEqual(self.keys(self.index.search("sunny")), ["a"])
+        self.assertEqual(len(self.index), 3)
+
+    def test_dump(self):
+        """load() rebuilds the same index from a JSON dump()"""
+        index = TextIndex.load(json.loads(json.dumps(self.index.dump())))
+        self.assertEqual(len(index), 4)
+        for query in ("pool", "loft wifi", "river pool"):
+            self.assertEqual(index.search(query, "or"),
+                             self.index.search(query, "or"))
+        index.remove("c")
+        self.assertEqual(self.keys(index.search("pool")), ["b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
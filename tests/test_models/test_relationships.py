@@ -0,0 +1,102 @@
+#!/usr/bin/python3
+"""Unit tests for the `relationships` module"""
+import models
+import unittest
+from unittest.mock import patch
+from models import FileStorage
+from models import classes
+from models.relationships import HasMany, Relationship, prefetch
+
+
+class TestRelationships(unittest.TestCase):
+    """Test cases for the relationships between the models."""
+
+    def setUp(self):
+        """Builds a state with two cities, places, reviews and amenities"""
+        self.storage = FileStorage()
+        self.patcher = patch.object(models, "storage", self.storage)
+        self.patcher.start()
+        self.state = classes["State"]()
+        self.cities = [classes["City"]() for _ in range(2)]
+        self.user = classes["User"]()
+        self.wifi = classes["Amenity"]()
+        self.places = []
+        self.reviews = []
+        for city in self.cities:
+            city.state_id = self.state.id
+            for _ in range(2):
+                pl = classes["Place"]()
+                pl.city_id, pl.user_id = city.id, self.user.id
+                pl.amenity_ids = [self.wifi.id, "unknown"]
+                self.places.append(pl)
+                rv = classes["Review"]()
+                rv.place_id, rv.user_id = pl.id, self.user.id
+                self.reviews.append(rv)
+        classes["City"]()
+
+    def tearDown(self):
+        """Resets FileStorage data."""
+        self.patcher.stop()
+        FileStorage._FileStorage__objects = {}
+
+    def ids(self, objs):
+        """Returns the set of the ids of (objs)"""
+        return {obj.id for obj in objs}
+
+    def test_has_many(self):
+        """One-to-many relationships follow the foreign keys"""
+        self.assertEqual(self.ids(self.state.cities), self.ids(self.cities))
+        self.assertEqual(self.ids(self.cities[0].places),
+                         self.ids(self.places[:2]))
+        self.assertEqual(self.ids(self.places[0].reviews),
+                         {self.reviews[0].id})
+        self.assertEqual(self.ids(self.user.places), self.ids(self.places))
+        self.reviews[0].place_id = self.places[1].id
+        self.assertEqual(self.places[0].reviews, [])
+        self.assertIsInstance(classes["State"].cities, HasMany)
+
+    def test_belongs_to(self):
+        """Many-to-one relationships get the instance by id"""
+        self.assertIs(self.cities[0].state, self.state)
+        self.assertIs(self.reviews[0].place, self.places[0])
+        self.assertIs(self.places[0].user, self.user)
+        self.assertIsNone(classes["Review"]().place)
+
+    def test_has_list(self):
+        """Place.amenities gets the listed amenities that exist"""
+        self.assertEqual(self.places[0].amenities, [self.wifi])
+        self.assertEqual(classes["Place"]().amenities, [])
+
+    def test_prefetch(self):
+        """prefetch() joins a whole graph, level by level"""
+        joined = prefetch(
+            [self.state], "cities.places.reviews", "cities.places.amenities"
+        )
+        cities = joined[f"State.{self.state.id}"]["cities"]
+        self.assertEqual(self.ids(cities), self.ids(self.cities))
+        for pl, rv in zip(self.places, self.reviews):
+            self.assertEqual(joined[f"Place.{pl.id}"],
+                             {"reviews": [rv], "amenities": [self.wifi]})
+        joined = prefetch(self.reviews, "place.city.state")
+        for rv in self.reviews:
+            self.assertIs(joined[f"Review.{rv.id}"]["place"].city.state,
+                          self.state)
+        with self.assertRaises(ValueError):
+            prefetch([self.state], "cities.bogus")
+
+    def test_abstract(self):
+        """A relationship must implement join()"""
+        with self.assertRaises(TypeError):
+            Relationship("City", "state_id")
+
+    def test_hash_join(self):
+        """Many instances are joined in one pass instead of lookups"""
+        with patch.object(self.storage, "lookup") as lookup:
+            joined = prefetch(self.places, "reviews")
+        lookup.assert_not_called()
+        for pl, rv in zip(self.places, self.reviews):
+            self.assertEqual(joined[f"Place.{pl.id}"]["reviews"], [rv])
+
+
+if __name__ == "__main__":
+    unittest.main()